@@ -1,75 +1,176 @@
-from flask import Flask, jsonify, request, send_from_directory
-from aws.cognito_utils import create_user_pool, create_app_client
-from aws.dynamodb_utils import create_appointments_table, put_appointment
-from aws.s3_utils import get_s3_client, create_bucket, upload_car_image
-# from aws.sns_utils import send_notification
+from flask import Flask, Response, abort, g, jsonify, request
+from aws.bootstrap import bootstrap, is_warm, start_revalidation
+from aws.clients import get_client
+from aws.token_utils import CognitoTokenVerifier, InvalidTokenError, unverified_claims
+from aws.dynamodb_utils import (
+    APPOINTMENT_FIELDS, decode_cursor, encode_cursor, iter_user_appointment_pages,
+    SlotUnavailableError, book_appointment
+)
+from aws.models import Appointment, dumps
+from aws.cache import make_cache
+from aws.metrics import REGISTRY
+from aws.ratelimit import client_ip, make_limiter
+from aws.sessions import make_sessions
+from aws.resilience import DEGRADED_RESPONSES, is_unavailable, retry_after
+from aws.telemetry import configure_logging, end_trace, observe_request, span, start_trace
+from aws.assets import AssetBundle
+from aws.availability import SLOTS, AvailabilityIndex, start_refresh
+from aws.image_utils import DerivativePipeline, derivative_keys, is_image_key
+from aws.rules import SERVICE_DURATIONS, SERVICES
+from aws.s3_utils import (
+    abort_multipart_upload, complete_multipart_upload, create_multipart_upload, get_s3_client,
+    object_url, plan_parts, presign_upload_parts, presign_uploads,
+    upload_car_image
+)
+from aws.sns_utils import BOOKED, NotificationOutbox
+from aws.validators import SLOT_UNAVAILABLE, make_validator
 from aws.lambda_utils import invoke_lambda_function
-import boto3
+import contextvars
+import hashlib
+import hmac
+import logging
+import os
+import re
+import time
 import uuid
 import json
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
 from functools import wraps
 
-app = Flask(__name__, static_folder='frontend', static_url_path='')
+# frontend/ is served from memory by the asset bundle below
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'frontend')
+app = Flask(__name__, static_folder=None)
+
+configure_logging()
+logger = logging.getLogger('app')
 
 # AWS Configuration
 REGION = 'us-east-1'
-USER_POOL_ID = None
-CLIENT_ID = None
+USER_POOL_NAME = 'AutoCareUserPool'
 BUCKET_NAME = 'autocare-images1'
 PORT = 5555
-# SNS_TOPIC_ARN = None
+# Topic for appointment notifications (unset disables them)
+SNS_TOPIC_ARN = os.getenv('SNS_TOPIC_ARN')
 APPOINTMENTS_TABLE = 'Appointments'
+# Seconds between background re-checks of AWS resources (0 disables)
+REVALIDATE_INTERVAL = int(os.getenv('AWS_REVALIDATE_INTERVAL', '0'))
+# Page size for GET /api/appointments
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# Upper bound on appointments accepted by POST /api/appointments/batch
+MAX_BATCH_APPOINTMENTS = 100
+# Parallel booking transactions per batch request
+BOOKING_CONCURRENCY = int(os.getenv('BOOKING_CONCURRENCY', '8'))
+REQUIRED_APPOINTMENT_FIELDS = ('carMake', 'carModel', 'carYear', 'serviceType', 'date', 'time')
+# Presigned upload URLs
+UPLOAD_URL_EXPIRY = 3600
+MAX_UPLOAD_URLS = 20
+MAX_UPLOAD_SIZE = 5 * 1024 ** 3
+# Service bays, i.e. how many appointments can share a slot
+SERVICE_BAYS = int(os.getenv('SERVICE_BAYS', '1'))
+# Seconds between availability index reloads, which pick up bookings taken
+# by other workers (0 disables)
+AVAILABILITY_REFRESH_INTERVAL = int(os.getenv('AVAILABILITY_REFRESH_INTERVAL', '30'))
+MAX_AVAILABILITY_DAYS = 93
+# 'remote' checks every token with cognito.get_user, 'local' verifies the
+# JWT signature and claims against the user pool's JWKS
+AUTH_VERIFY_MODE = os.getenv('AUTH_VERIFY_MODE', 'remote')
+# Optional local JWKS file, used instead of downloading the key set
+JWKS_FILE = os.getenv('COGNITO_JWKS_FILE')
 
-def init_aws_services():
-    global USER_POOL_ID, CLIENT_ID, APPOINTMENTS_TABLE
-    
-    # Initialize S3 first
-    s3_client = get_s3_client(REGION)
-    if not s3_client:
-        print("Failed to initialize S3 client")
-        return False
-        
-    bucket = create_bucket(s3_client, BUCKET_NAME, REGION)
-    if not bucket:
-        print("Failed to create S3 bucket")
-        return False
-    
-    print(f"Successfully created/verified bucket: {BUCKET_NAME}")
-    
-    # Initialize Cognito
-    try:
-        pool_name = 'AutoCareUserPool'
-        USER_POOL_ID = create_user_pool(pool_name)
-        if not USER_POOL_ID:
-            print("Failed to get/create user pool")
-            return False
-            
-        CLIENT_ID = create_app_client(USER_POOL_ID)
-        if not CLIENT_ID:
-            print("Failed to get/create client ID")
-            return False
-            
-        print(f"Using User Pool ID: {USER_POOL_ID}")
-        print(f"Using Client ID: {CLIENT_ID}")
-    except Exception as e:
-        print(f"Error initializing Cognito: {str(e)}")
-        return False
+def get_aws_config():
+    """Return the process-wide AWS config, bootstrapping it on first use."""
+    return bootstrap(REGION, BUCKET_NAME, USER_POOL_NAME, APPOINTMENTS_TABLE)
 
-    # Initialize DynamoDB
-    try:
-        APPOINTMENTS_TABLE = create_appointments_table()
-    except Exception as e:
-        print(f"Error initializing DynamoDB: {str(e)}")
-        return False
+def require_aws_config(f):
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        config = get_aws_config()
+        if config is None:
+            return jsonify({'error': 'AWS services are not initialized'}), 503
+        return f(*args, **kwargs, config=config)
 
-    return True
+    return decorated
 
-# Call initialization before the first request
-@app.before_request
-def initialize():
-    if not init_aws_services():
-        print("WARNING: Failed to initialize AWS services")
+availability_index = AvailabilityIndex(capacity=SERVICE_BAYS)
+derivative_pipeline = DerivativePipeline(region=REGION)
+appointment_cache = make_cache()
+static_assets = AssetBundle(FRONTEND_DIR)
+rate_limiter = make_limiter()
+sessions = make_sessions()
+notification_outbox = NotificationOutbox(SNS_TOPIC_ARN, region=REGION)
+validator = make_validator(region=REGION)
+booking_executor = ThreadPoolExecutor(max_workers=BOOKING_CONCURRENCY,
+                                      thread_name_prefix='booking')
+
+_token_verifier = None
+
+def get_token_verifier(config):
+    """Return the local JWT verifier for the current user pool."""
+    global _token_verifier
+    verifier = _token_verifier
+    if verifier is None or verifier.client_id != config.client_id:
+        verifier = CognitoTokenVerifier(
+            config.region, config.user_pool_id, config.client_id,
+            jwks_path=JWKS_FILE
+        )
+        _token_verifier = verifier
+    return verifier
+
+def verify_token(token):
+    """Resolve an access token to a user, locally or through Cognito."""
+    if AUTH_VERIFY_MODE == 'local':
+        config = get_aws_config()
+        if config is None:
+            raise InvalidTokenError('AWS services are not initialized')
+        claims = get_token_verifier(config).verify(token)
+        return {'Username': claims['username'], 'UserAttributes': [], 'Claims': claims}
+
+    cognito = get_client('cognito-idp', REGION)
+    return cognito.get_user(AccessToken=token)
+
+def end_sessions(username):
+    """Forget the cached sessions and verified tokens of a signed-out user."""
+    sessions.invalidate_user(username)
+    if _token_verifier is not None:
+        _token_verifier.sign_out(username)
+
+def unavailable_response(error):
+    """503 with Retry-After for throttling, outages and open circuits."""
+    logger.warning(f"Dependency unavailable: {str(error)}")
+    response = jsonify({'error': 'Service temporarily unavailable, please try again shortly'})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(retry_after(error))
+    return response
+
+def error_response(error, status_code=400):
+    if is_unavailable(error):
+        return unavailable_response(error)
+    return jsonify({'error': str(error)}), status_code
+
+def rate_limited(route):
+    """Reject requests over the route's per-IP, per-email or route-wide
+    limit with 429 before any AWS call is made."""
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            data = request.get_json(silent=True)
+            email = data.get('email') if isinstance(data, dict) else None
+            wait = rate_limiter.check(
+                route,
+                ip=client_ip(request.remote_addr, request.headers.get('X-Forwarded-For')),
+                email=email if isinstance(email, str) else None
+            )
+            if wait:
+                response = jsonify({'error': 'Too many requests, please try again later'})
+                response.status_code = 429
+                response.headers['Retry-After'] = str(wait)
+                return response
+            return f(*args, **kwargs)
+
+        return decorated
+    return decorator
 
 # Authentication decorator
 def require_auth(f):
@@ -79,52 +180,103 @@ def require_auth(f):
         if not auth_header:
             return jsonify({'error': 'No authorization header'}), 401
         
-        # Verify token with Cognito
         try:
-            cognito = boto3.client('cognito-idp', region_name=REGION)
-            response = cognito.get_user(AccessToken=auth_header)
-            return f(*args, **kwargs, user=response)
+            user = verify_token(auth_header)
         except Exception as e:
+            if is_unavailable(e):
+                return unavailable_response(e)
             return jsonify({'error': 'Invalid token'}), 401
+        return f(*args, **kwargs, user=user)
     
     return decorated
 
+# Per-request tracing: AWS calls made while handling a request are added as
+# spans by the botocore hooks in aws.telemetry
+@app.before_request
+def begin_request_trace():
+    g.trace, g.trace_token = start_trace(request.headers.get('X-Request-Id'))
+
+@app.after_request
+def finish_request_trace(response):
+    trace = g.pop('trace', None)
+    if trace is None:
+        return response
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    observe_request(trace, request.method, route, response.status_code)
+    response.headers['X-Request-Id'] = trace.request_id
+    response.headers['Server-Timing'] = trace.server_timing()
+    end_trace(g.pop('trace_token'))
+    return response
+
 # Routes
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+def asset_response(name):
+    """Serve a bundled asset in the best encoding the client accepts."""
+    asset = static_assets.get(name)
+    if asset is None:
+        abort(404)
+    encoding = asset.negotiate(request.headers.get('Accept-Encoding'))
+    body, etag = asset.variants[encoding]
+    headers = {'Cache-Control': asset.cache_control, 'ETag': etag, 'Vary': 'Accept-Encoding'}
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    if request.if_none_match.contains(etag.strip('"')):
+        return Response(status=304, headers=headers)
+    return Response(body, headers=headers, content_type=asset.content_type)
+
 @app.route('/')
 def index():
-    return send_from_directory(app.static_folder, 'index.html')
+    return asset_response('index.html')
+
+@app.route('/api/health', methods=['GET'])
+def health():
+    return jsonify({'status': 'ok', 'warm': is_warm()})
+
+@app.route('/api/health/warm', methods=['GET'])
+def health_warm():
+    # Readiness probe: bootstraps AWS resources if needed and reports 503
+    # until the process can serve requests without control-plane calls
+    if get_aws_config() is None:
+        return jsonify({'status': 'cold', 'warm': False}), 503
+    return jsonify({'status': 'ok', 'warm': True})
+
+def signup_error(data):
+    """Why a signup body is rejected, or None; shared with asgi.py."""
+    if not data:
+        return 'No data provided'
+    if not isinstance(data, dict):
+        return 'Request body must be a JSON object'
+    if not data.get('email') or not isinstance(data['email'], str):
+        return 'Email is required'
+    if not data.get('password') or not isinstance(data['password'], str):
+        return 'Password is required'
+    if len(data['password']) < 8:
+        return 'Password must be at least 8 characters long'
+    return None
 
 @app.route('/api/auth/signup', methods=['POST'])
-def signup():
+@rate_limited('signup')
+@require_aws_config
+def signup(config):
     try:
-        print("Received signup request")
-        print("Request headers:", dict(request.headers))
-        print("Request data:", request.get_data())
-        
         if not request.is_json:
             return jsonify({'error': 'Content-Type must be application/json'}), 400
             
         data = request.get_json()
-        print("Parsed JSON data:", data)
         
-        if not data:
-            return jsonify({'error': 'No data provided'}), 400
-            
-        if not data.get('email'):
-            return jsonify({'error': 'Email is required'}), 400
-            
-        if not data.get('password'):
-            return jsonify({'error': 'Password is required'}), 400
-            
-        if len(data['password']) < 8:
-            return jsonify({'error': 'Password must be at least 8 characters long'}), 400
+        message = signup_error(data)
+        if message:
+            return jsonify({'error': message}), 400
             
-        cognito = boto3.client('cognito-idp', region_name=REGION)
+        cognito = get_client('cognito-idp', REGION)
         
         try:
             # Sign up the user
             response = cognito.sign_up(
-                ClientId=CLIENT_ID,
+                ClientId=config.client_id,
                 Username=data['email'],
                 Password=data['password'],
                 UserAttributes=[
@@ -134,11 +286,11 @@ def signup():
             
             # Auto confirm the user (for testing only - remove in production)
             cognito.admin_confirm_sign_up(
-                UserPoolId=USER_POOL_ID,
+                UserPoolId=config.user_pool_id,
                 Username=data['email']
             )
             
-            print(f"Signup response: {response}")
+            logger.info("User signed up", extra={'user_sub': response.get('UserSub')})
             return jsonify({'message': 'User registered and confirmed successfully'}), 201
             
         except cognito.exceptions.UsernameExistsException:
@@ -148,25 +300,27 @@ def signup():
         except cognito.exceptions.InvalidParameterException as e:
             return jsonify({'error': str(e)}), 400
         except Exception as e:
-            print(f"Cognito signup error: {str(e)}")
-            return jsonify({'error': str(e)}), 400
+            logger.error(f"Cognito signup error: {str(e)}")
+            return error_response(e)
             
     except Exception as e:
-        print(f"General signup error: {str(e)}")
+        logger.exception(f"General signup error: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/api/auth/login', methods=['POST'])
-def login():
+@rate_limited('login')
+@require_aws_config
+def login(config):
     try:
         data = request.json
-        if not data or 'email' not in data or 'password' not in data:
+        if not isinstance(data, dict) or 'email' not in data or 'password' not in data:
             return jsonify({'error': 'Email and password are required'}), 400
 
-        cognito = boto3.client('cognito-idp', region_name=REGION)
+        cognito = get_client('cognito-idp', REGION)
         
         try:
             response = cognito.initiate_auth(
-                ClientId=CLIENT_ID,
+                ClientId=config.client_id,
                 AuthFlow='USER_PASSWORD_AUTH',
                 AuthParameters={
                     'USERNAME': data['email'],
@@ -174,10 +328,7 @@ def login():
                 }
             )
             
-            return jsonify({
-                'token': response['AuthenticationResult']['AccessToken'],
-                'user': {'email': data['email']}
-            })
+            return jsonify(login_payload(data['email'], response['AuthenticationResult']))
         except cognito.exceptions.UserNotFoundException:
             return jsonify({'error': 'User not found. Please sign up first.'}), 404
         except cognito.exceptions.NotAuthorizedException:
@@ -185,113 +336,429 @@ def login():
         except cognito.exceptions.UserNotConfirmedException:
             return jsonify({'error': 'Please verify your email before logging in'}), 403
         except Exception as e:
-            print(f"Cognito login error: {str(e)}")
-            return jsonify({'error': str(e)}), 401
+            logger.error(f"Cognito login error: {str(e)}")
+            return error_response(e, 401)
             
     except Exception as e:
-        print(f"General login error: {str(e)}")
+        logger.exception(f"General login error: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+def login_payload(email, result):
+    """Login response body; the session is cached for /api/auth/refresh."""
+    username = unverified_claims(result['AccessToken']).get('username')
+    sessions.put(result['RefreshToken'], username, result['AccessToken'], result['ExpiresIn'])
+    return {
+        'token': result['AccessToken'],
+        'refreshToken': result['RefreshToken'],
+        'expiresIn': result['ExpiresIn'],
+        'user': {'email': email}
+    }
+
+# Active users renew their access token here instead of logging in again.
+# While the cached token has SESSION_REFRESH_MARGIN seconds left, refreshes
+# (other tabs, retries after a 401) are answered without calling Cognito.
+@app.route('/api/auth/refresh', methods=['POST'])
+@rate_limited('refresh')
+@require_aws_config
+def refresh(config):
+    data = request.get_json(silent=True) or {}
+    refresh_token = data.get('refreshToken')
+    if not isinstance(refresh_token, str) or not refresh_token:
+        return jsonify({'error': 'refreshToken is required'}), 400
+
+    session = sessions.get(refresh_token)
+    if session is None:
+        cognito = get_client('cognito-idp', REGION)
+        try:
+            result = cognito.initiate_auth(
+                ClientId=config.client_id,
+                AuthFlow='REFRESH_TOKEN_AUTH',
+                AuthParameters={'REFRESH_TOKEN': refresh_token}
+            )['AuthenticationResult']
+        except cognito.exceptions.NotAuthorizedException:
+            sessions.invalidate(refresh_token)
+            return jsonify({'error': 'Session expired, please log in again'}), 401
+        except Exception as e:
+            logger.error(f"Cognito refresh error: {str(e)}")
+            return error_response(e, 401)
+        # With refresh token rotation enabled Cognito also returns a new one
+        refresh_token = result.get('RefreshToken', refresh_token)
+        session = sessions.put(refresh_token, unverified_claims(result['AccessToken']).get('username'),
+                               result['AccessToken'], result['ExpiresIn'])
+
+    return jsonify({
+        'token': session['access_token'],
+        'refreshToken': refresh_token,
+        'expiresIn': max(0, int(session['expires_at'] - time.time()))
+    })
+
 @app.route('/api/auth/logout', methods=['POST'])
 @require_auth
 def logout(user):
     try:
-        cognito = boto3.client('cognito-idp', region_name=REGION)
+        cognito = get_client('cognito-idp', REGION)
         auth_header = request.headers.get('Authorization')
         cognito.global_sign_out(AccessToken=auth_header)
+        # Global sign-out revokes every token of the user
+        end_sessions(user['Username'])
         return jsonify({'message': 'Logged out successfully'})
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
+UPLOAD_KEY_PATTERN = re.compile(
+    r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}-[^/]+$'
+)
+
+def upload_key(file_name):
+    return f"{uuid.uuid4()}-{file_name.replace('/', '_')}"
+
+def _upload_owner_tag(owner, prefix):
+    return hashlib.blake2b(f'{owner}:{prefix}'.encode(), digest_size=6).hexdigest()
+
+def multipart_upload_key(file_name, owner, part_count):
+    """An upload_key that also records who started the upload and its part count.
+
+    The third group of the UUID-shaped prefix is the part count and the last
+    group a hash of the owner and the rest of the prefix, so the part, complete
+    and abort calls can check both without any server-side state.
+    """
+    random_hex = uuid.uuid4().hex
+    prefix = f"{random_hex[:8]}-{random_hex[8:12]}-{part_count:04x}-{random_hex[12:16]}"
+    return f"{prefix}-{_upload_owner_tag(owner, prefix)}-{file_name.replace('/', '_')}"
+
+def multipart_part_count(key, owner):
+    """Part count of a multipart_upload_key started by owner, else None."""
+    prefix, tag = key[:23], key[24:36]
+    if not hmac.compare_digest(tag, _upload_owner_tag(owner, prefix)):
+        return None
+    return int(prefix[14:18], 16)
+
+# The bucket is verified once by the AWS bootstrap, so presigning below is
+# purely local and needs no head_bucket round trip
 @app.route('/api/upload-url', methods=['POST'])
 @require_auth
-def get_upload_url(user):
+@require_aws_config
+def get_upload_url(user, config):
     try:
-        s3_client = get_s3_client(REGION)
-        if not s3_client:
-            return jsonify({'error': 'S3 client initialization failed'}), 500
-            
         data = request.json
-        file_name = f"{uuid.uuid4()}-{data['fileName']}"
-        
-        # Verify bucket exists
-        try:
-            s3_client.head_bucket(Bucket=BUCKET_NAME)
-        except Exception as e:
-            return jsonify({'error': f'S3 bucket not found: {str(e)}'}), 500
-            
-        url = s3_client.generate_presigned_url(
-            'put_object',
-            Params={
-                'Bucket': BUCKET_NAME,
-                'Key': file_name,
-                'ContentType': data['fileType']
-            },
-            ExpiresIn=3600
+        upload = presign_uploads(
+            get_s3_client(config.region), config.bucket_name, config.region,
+            [{'key': upload_key(data['fileName']), 'contentType': data['fileType']}],
+            expires_in=UPLOAD_URL_EXPIRY
+        )[0]
+        return jsonify(upload)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/upload-urls', methods=['POST'])
+@require_auth
+@require_aws_config
+def get_upload_urls(user, config):
+    data = request.get_json(silent=True) or {}
+    files = data.get('files')
+    if not isinstance(files, list) or not files:
+        return jsonify({'error': 'files must be a non-empty list'}), 400
+    if len(files) > MAX_UPLOAD_URLS:
+        return jsonify({'error': f'At most {MAX_UPLOAD_URLS} files per request'}), 400
+    if not all(isinstance(f, dict) and f.get('fileName') and f.get('fileType') for f in files):
+        return jsonify({'error': 'Each file needs a fileName and fileType'}), 400
+
+    try:
+        uploads = presign_uploads(
+            get_s3_client(config.region), config.bucket_name, config.region,
+            [{'key': upload_key(f['fileName']), 'contentType': f['fileType']} for f in files],
+            expires_in=UPLOAD_URL_EXPIRY
+        )
+        return jsonify({'uploads': uploads})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+def read_multipart_request(data, owner, *fields):
+    missing = [field for field in fields if not data.get(field)]
+    if missing:
+        return f"Missing fields: {', '.join(missing)}"
+    if not isinstance(data['uploadId'], str):
+        return 'uploadId must be a string'
+    # Only multipart uploads this user started can be touched
+    if (not isinstance(data['key'], str) or not UPLOAD_KEY_PATTERN.match(data['key'])
+            or multipart_part_count(data['key'], owner) is None):
+        return 'Invalid key'
+    return None
+
+@app.route('/api/uploads', methods=['POST'])
+@require_auth
+@require_aws_config
+def start_multipart_upload(user, config):
+    """Start a browser-to-S3 multipart upload and presign every part."""
+    data = request.get_json(silent=True) or {}
+    if not data.get('fileName') or not data.get('fileType'):
+        return jsonify({'error': 'fileName and fileType are required'}), 400
+    try:
+        file_size = int(data.get('fileSize', 0))
+        part_size = int(data['partSize']) if data.get('partSize') else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'fileSize and partSize must be integers'}), 400
+    if file_size <= 0 or file_size > MAX_UPLOAD_SIZE:
+        return jsonify({'error': f'fileSize must be between 1 and {MAX_UPLOAD_SIZE} bytes'}), 400
+
+    try:
+        s3_client = get_s3_client(config.region)
+        part_size, part_count = plan_parts(file_size, part_size)
+        key = multipart_upload_key(data['fileName'], user['Username'], part_count)
+        upload_id = create_multipart_upload(s3_client, config.bucket_name, key, data['fileType'])
+        parts = presign_upload_parts(
+            s3_client, config.bucket_name, key, upload_id,
+            range(1, part_count + 1), expires_in=UPLOAD_URL_EXPIRY
         )
-        
-        image_url = f"https://{BUCKET_NAME}.s3.{REGION}.amazonaws.com/{file_name}"
         return jsonify({
-            'uploadUrl': url,
-            'imageUrl': image_url
-        })
+            'key': key,
+            'uploadId': upload_id,
+            'partSize': part_size,
+            'parts': parts,
+            'imageUrl': object_url(config.bucket_name, config.region, key)
+        }), 201
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
-@app.route('/api/appointments', methods=['GET'])
+@app.route('/api/uploads/parts', methods=['POST'])
 @require_auth
-def get_appointments(user):
+@require_aws_config
+def presign_multipart_parts(user, config):
+    """Re-presign selected parts, e.g. after their URLs expired."""
+    data = request.get_json(silent=True) or {}
+    error = read_multipart_request(data, user['Username'], 'key', 'uploadId', 'partNumbers')
+    if error:
+        return jsonify({'error': error}), 400
+    part_count = multipart_part_count(data['key'], user['Username'])
+    part_numbers = data['partNumbers']
+    # type() rather than isinstance: bools are ints too
+    if not isinstance(part_numbers, list) or len(part_numbers) > part_count or not all(
+        type(n) is int and 1 <= n <= part_count for n in part_numbers
+    ):
+        return jsonify({'error': f'partNumbers must be at most {part_count} '
+                                 f'integers between 1 and {part_count}'}), 400
+
     try:
-        dynamodb = boto3.resource('dynamodb', region_name=REGION)
-        table = dynamodb.Table('Appointments')
-        
-        response = table.query(
-            IndexName='UserEmailIndex',
-            KeyConditionExpression='userEmail = :email',
-            ExpressionAttributeValues={':email': user['Username']}
+        parts = presign_upload_parts(
+            get_s3_client(config.region), config.bucket_name, data['key'], data['uploadId'],
+            part_numbers, expires_in=UPLOAD_URL_EXPIRY
         )
-        
-        return jsonify(response['Items'])
+        return jsonify({'parts': parts})
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
-# Add this function for appointment validation
-def validate_appointment(appointment_data):
+@app.route('/api/uploads/complete', methods=['POST'])
+@require_auth
+@require_aws_config
+def finish_multipart_upload(user, config):
+    data = request.get_json(silent=True) or {}
+    error = read_multipart_request(data, user['Username'], 'key', 'uploadId', 'parts')
+    if error:
+        return jsonify({'error': error}), 400
+
     try:
-        # Convert date string to datetime object
-        appointment_date = datetime.strptime(appointment_data['date'], '%Y-%m-%d')
-        current_date = datetime.now()
-
-        # Basic validation rules
-        if appointment_date.date() < current_date.date():
-            return {
-                'isValid': False,
-                'message': 'Appointment date cannot be in the past'
-            }
-
-        # Validate business hours (9 AM to 4 PM)
-        appointment_time = appointment_data['time']
-        valid_times = ['09:00', '10:00', '11:00', '13:00', '14:00', '15:00', '16:00']
-        if appointment_time not in valid_times:
-            return {
-                'isValid': False,
-                'message': 'Invalid appointment time'
-            }
-
-        # Validate service type
-        valid_services = ['oil-change', 'tire-rotation', 'brake-service', 'general-inspection', 'repair']
-        if appointment_data['serviceType'] not in valid_services:
-            return {
-                'isValid': False,
-                'message': 'Invalid service type'
-            }
-
-        return {'isValid': True}
+        complete_multipart_upload(
+            get_s3_client(config.region), config.bucket_name,
+            data['key'], data['uploadId'], data['parts']
+        )
+        return jsonify({'imageUrl': object_url(config.bucket_name, config.region, data['key'])})
     except Exception as e:
-        return {
-            'isValid': False,
-            'message': f'Validation error: {str(e)}'
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/uploads/abort', methods=['POST'])
+@require_auth
+@require_aws_config
+def cancel_multipart_upload(user, config):
+    data = request.get_json(silent=True) or {}
+    error = read_multipart_request(data, user['Username'], 'key', 'uploadId')
+    if error:
+        return jsonify({'error': error}), 400
+
+    try:
+        abort_multipart_upload(get_s3_client(config.region), config.bucket_name,
+                               data['key'], data['uploadId'])
+        return jsonify({'message': 'Upload aborted'})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+def parse_listing_args(args):
+    """Validate GET /api/appointments query parameters.
+
+    Returns (options, error) where options holds keyword arguments for
+    iter_user_appointment_pages.
+    """
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return None, 'limit must be an integer'
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        return None, f'limit must be between 1 and {MAX_PAGE_SIZE}'
+
+    try:
+        start_key = decode_cursor(args.get('cursor'))
+    except ValueError:
+        return None, 'Invalid cursor'
+
+    fields = None
+    if args.get('fields'):
+        fields = [field.strip() for field in args['fields'].split(',') if field.strip()]
+        unknown = [field for field in fields if field not in APPOINTMENT_FIELDS]
+        if unknown:
+            return None, f"Unknown fields: {', '.join(unknown)}"
+
+    for name in ('from', 'to'):
+        if args.get(name):
+            try:
+                datetime.strptime(args[name], '%Y-%m-%d')
+            except ValueError:
+                return None, f'{name} must be a date in YYYY-MM-DD format'
+
+    return {
+        'limit': limit,
+        'start_key': start_key,
+        'fields': fields,
+        'status': args.get('status'),
+        'date_from': args.get('from'),
+        'date_to': args.get('to'),
+    }, None
+
+def render_appointment_page(pages):
+    """Serialize (appointments, last_key) pages as {"items": [...], "nextCursor": ...}."""
+    items = []
+    last_key = None
+    for appointments, last_key in pages:
+        items.extend(appointment.to_dict() for appointment in appointments)
+    return dumps({'items': items, 'nextCursor': encode_cursor(last_key)})
+
+def appointment_list_etag(body):
+    return hashlib.blake2b(body.encode(), digest_size=16).hexdigest()
+
+def cached_appointment_response(body):
+    """JSON response for a rendered list that browsers revalidate by ETag."""
+    response = Response(body, mimetype='application/json')
+    response.set_etag(appointment_list_etag(body))
+    response.headers['Cache-Control'] = 'private, no-cache'
+    # Turns into a bodiless 304 when If-None-Match matches
+    return response.make_conditional(request)
+
+@app.route('/api/appointments', methods=['GET'])
+@require_auth
+def get_appointments(user):
+    options, error = parse_listing_args(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+
+    # Lists are cached per user and query; any booking by the user drops
+    # all of that user's entries
+    user_email = user['Username']
+    variant = json.dumps(options, sort_keys=True)
+    body = appointment_cache.get(user_email, variant)
+    if body is None:
+        # A booking made while this list is read invalidates it; set() then
+        # sees a newer generation and drops the stale list
+        generation = appointment_cache.generation(user_email)
+        try:
+            pages = iter_user_appointment_pages(
+                user_email, table_name=APPOINTMENTS_TABLE, **options
+            )
+            body = render_appointment_page(pages)
+        except Exception as e:
+            # Degraded mode: while DynamoDB is throttling or down, serve the
+            # last list we rendered for this user, if recent enough
+            stale = appointment_cache.get_stale(user_email, variant) if is_unavailable(e) else None
+            if stale is None:
+                return error_response(e)
+            DEGRADED_RESPONSES.inc(route='/api/appointments')
+            response = cached_appointment_response(stale)
+            response.headers['Warning'] = '110 - "Response is Stale"'
+            return response
+        appointment_cache.set(user_email, variant, body, generation)
+
+    return cached_appointment_response(body)
+
+def get_availability_index():
+    """Return the slot availability index, loading it on first use."""
+    availability_index.ensure_loaded(APPOINTMENTS_TABLE)
+    return availability_index
+
+@app.route('/api/availability', methods=['GET'])
+def get_availability():
+    try:
+        today = date.today()
+        date_from = date.fromisoformat(request.args['from']) if request.args.get('from') else today
+        date_to = (date.fromisoformat(request.args['to']) if request.args.get('to')
+                   else date_from + timedelta(days=30))
+    except ValueError:
+        return jsonify({'error': 'from and to must be dates in YYYY-MM-DD format'}), 400
+    if date_to < date_from:
+        return jsonify({'error': 'to must not be before from'}), 400
+    if (date_to - date_from).days >= MAX_AVAILABILITY_DAYS:
+        return jsonify({'error': f'At most {MAX_AVAILABILITY_DAYS} days per request'}), 400
+
+    try:
+        availability = get_availability_index()
+    except Exception as e:
+        return error_response(e)
+
+    return jsonify({
+        'from': date_from.isoformat(),
+        'to': date_to.isoformat(),
+        'slots': SLOTS,
+        'capacity': availability.capacity,
+        'days': availability.query(date_from, date_to),
+        # 'open' has one slot bitmask per service, in this order
+        'services': SERVICES,
+        'durations': [SERVICE_DURATIONS[service] for service in SERVICES],
+        'open': availability.calendar(date_from, date_to)
+    })
+
+def image_key(image_url):
+    """Return the S3 key of an image uploaded to our bucket, else None."""
+    config = get_aws_config()
+    if config is None or not image_url:
+        return None
+    prefix = object_url(config.bucket_name, config.region, '')
+    if not image_url.startswith(prefix):
+        return None
+    key = image_url[len(prefix):]
+    return key if is_image_key(key) else None
+
+def build_appointment(appointment_id, user_email, data):
+    appointment = Appointment(
+        appointment_id=appointment_id,
+        user_email=user_email,
+        car_make=data['carMake'],
+        car_model=data['carModel'],
+        car_year=data['carYear'],
+        service_type=data['serviceType'],
+        date=data['date'],
+        time=data['time'],
+        description=data.get('description', ''),
+        image_url=data.get('imageUrl', ''),
+        status='Pending',
+        created_at=datetime.utcnow().isoformat()
+    )
+
+    # Derivative URLs are known up front; the files appear once the
+    # background pipeline has rendered them
+    key = image_key(appointment.image_url)
+    if key and derivative_pipeline.enabled:
+        config = get_aws_config()
+        appointment.image_derivatives = {
+            name: object_url(config.bucket_name, config.region, derivative_key)
+            for name, derivative_key in derivative_keys(key).items()
         }
+    return appointment
+
+def notify_appointment(event, appointment):
+    """Queue an SNS notification; publishing happens off the request path."""
+    notification_outbox.enqueue(event, {'appointment': appointment.to_dict()},
+                                key=f'{event}:{appointment.appointment_id}')
+
+def schedule_image_derivatives(appointment):
+    if appointment.image_derivatives:
+        derivative_pipeline.submit(get_aws_config().bucket_name,
+                                   image_key(appointment.image_url))
 
 # Modify the create_appointment route
 @app.route('/api/appointments', methods=['POST'])
@@ -299,44 +766,161 @@ def validate_appointment(appointment_data):
 def create_appointment(user):
     try:
         data = request.json
+        missing = [field for field in REQUIRED_APPOINTMENT_FIELDS if not data.get(field)]
+        if missing:
+            return jsonify({'error': f"Missing fields: {', '.join(missing)}"}), 400
         appointment_id = str(uuid.uuid4())
         
-        # Replace Lambda validation with local validation
-        validation_result = validate_appointment({
+        validation_result = validator.validate({
             'date': data['date'],
             'time': data['time'],
             'serviceType': data['serviceType']
         })
         
         if not validation_result.get('isValid', False):
-            return jsonify({'error': validation_result.get('message', 'Invalid appointment')}), 400
+            status_code = 409 if validation_result.get('code') == SLOT_UNAVAILABLE else 400
+            return jsonify({'error': validation_result.get('message', 'Invalid appointment')}), status_code
         
-        # Store appointment in DynamoDB
-        appointment_data = {
-            'appointment_id': appointment_id,
-            'userEmail': user['Username'],
-            'carMake': data['carMake'],
-            'carModel': data['carModel'],
-            'carYear': data['carYear'],
-            'serviceType': data['serviceType'],
-            'date': data['date'],
-            'time': data['time'],
-            'description': data.get('description', ''),
-            'imageUrl': data.get('imageUrl', ''),
-            'status': 'Pending',
-            'createdAt': datetime.utcnow().isoformat()
-        }
+        # Built before reserving so a bad request cannot leave the slot taken
+        appointment_data = build_appointment(appointment_id, user['Username'], data)
         
-        put_appointment(appointment_id, appointment_data)
-        return jsonify(appointment_data), 201
+        availability = get_availability_index()
+        if not availability.reserve(data['date'], data['time']):
+            return jsonify({'error': 'This time slot is already booked'}), 409
+        
+        # Store appointment in DynamoDB
+        try:
+            book_appointment(appointment_data, SERVICE_BAYS, APPOINTMENTS_TABLE)
+            appointment_cache.invalidate(user['Username'])
+        except SlotUnavailableError:
+            # Another worker took the slot; keep the local count reserved
+            return jsonify({'error': 'This time slot is already booked'}), 409
+        except Exception:
+            availability.release(data['date'], data['time'])
+            raise
+        schedule_image_derivatives(appointment_data)
+        notify_appointment(BOOKED, appointment_data)
+        return jsonify(appointment_data.to_dict()), 201
         
     except Exception as e:
-        print(f"Error creating appointment: {str(e)}")  # Add debug logging
-        return jsonify({'error': str(e)}), 400
+        logger.exception(f"Error creating appointment: {str(e)}")
+        return error_response(e)
+
+@app.route('/api/appointments/batch', methods=['POST'])
+@require_auth
+def create_appointments_batch(user):
+    data = request.get_json(silent=True) or {}
+    requested = data.get('appointments')
+    if not isinstance(requested, list) or not requested:
+        return jsonify({'error': 'appointments must be a non-empty list'}), 400
+    if len(requested) > MAX_BATCH_APPOINTMENTS:
+        return jsonify({'error': f'At most {MAX_BATCH_APPOINTMENTS} appointments per batch'}), 400
+
+    try:
+        availability = get_availability_index()
+    except Exception as e:
+        return error_response(e)
+
+    # Validate everything before writing anything
+    results = []
+    candidates = []
+    for index, item in enumerate(requested):
+        if not isinstance(item, dict):
+            results.append({'index': index, 'status': 'invalid', 'error': 'Appointment must be an object'})
+            continue
+        missing = [field for field in REQUIRED_APPOINTMENT_FIELDS if not item.get(field)]
+        if missing:
+            results.append({'index': index, 'status': 'invalid',
+                            'error': f"Missing fields: {', '.join(missing)}"})
+            continue
+        candidates.append((index, item))
+
+    try:
+        with span('validate', count=len(candidates)):
+            validations = validator.validate_many([item for _, item in candidates])
+    except Exception as e:
+        return error_response(e)
+    appointments = []
+    for (index, item), validation in zip(candidates, validations):
+        if not validation['isValid']:
+            status = 'conflict' if validation['code'] == SLOT_UNAVAILABLE else 'invalid'
+            results.append({'index': index, 'status': status, 'code': validation['code'],
+                            'error': validation['message']})
+            continue
+
+        # Built before reserving so a bad item cannot leave its slot taken
+        try:
+            appointment = build_appointment(str(uuid.uuid4()), user['Username'], item)
+        except Exception as e:
+            logger.error(f"Error building appointment {index}: {str(e)}")
+            results.append({'index': index, 'status': 'failed', 'error': str(e)})
+            continue
+
+        if not availability.reserve(item['date'], item['time']):
+            results.append({'index': index, 'status': 'conflict',
+                            'error': 'This time slot is already booked'})
+            continue
+
+        result = {'index': index, 'appointment_id': appointment.appointment_id}
+        appointments.append((appointment, result))
+        results.append(result)
+
+    # BatchWriteItem cannot carry conditions, so each appointment is booked
+    # with its own slot-lock transaction, several at a time
+    def book(entry):
+        appointment, result = entry
+        try:
+            result['bay'] = book_appointment(appointment, SERVICE_BAYS, APPOINTMENTS_TABLE)
+            result['status'] = 'created'
+            schedule_image_derivatives(appointment)
+            notify_appointment(BOOKED, appointment)
+        except SlotUnavailableError:
+            result['status'] = 'conflict'
+            result['error'] = 'This time slot is already booked'
+        except Exception as e:
+            logger.error(f"Error booking appointment {appointment.appointment_id}: {str(e)}")
+            availability.release(appointment.date, appointment.time)
+            result['status'] = 'failed'
+            result['error'] = str(e)
+
+    # Executor threads do not inherit contextvars; each booking runs in its
+    # own copy of this request's context so its AWS calls join the trace
+    context = contextvars.copy_context()
+    list(booking_executor.map(lambda entry: context.copy().run(book, entry), appointments))
+    results.sort(key=lambda result: result['index'])
+
+    created = sum(1 for result in results if result['status'] == 'created')
+    if created:
+        appointment_cache.invalidate(user['Username'])
+    status_code = 201 if created == len(results) else 207
+    return jsonify({'created': created, 'results': results}), status_code
 
 @app.route('/<path:path>')
 def serve_static_files(path):
-    return send_from_directory(app.static_folder, path)
+    return asset_response(path)
+
+_background_started = False
+
+def start_background_tasks():
+    """Start the periodic revalidation and availability refresh threads.
+
+    Threads do not survive a fork, so this runs once in each serving
+    process: from gunicorn's post_fork hook, the ASGI lifespan startup or
+    the development server below, never at import.
+    """
+    global _background_started
+    if _background_started:
+        return
+    _background_started = True
+    if REVALIDATE_INTERVAL > 0:
+        start_revalidation(REGION, BUCKET_NAME, USER_POOL_NAME,
+                           APPOINTMENTS_TABLE, REVALIDATE_INTERVAL)
+    if AVAILABILITY_REFRESH_INTERVAL > 0:
+        start_refresh(availability_index, APPOINTMENTS_TABLE,
+                      AVAILABILITY_REFRESH_INTERVAL)
 
 if __name__ == '__main__':
+    # Resolve AWS resources once at startup instead of on the request path
+    get_aws_config()
+    start_background_tasks()
     app.run(debug=True, port=PORT)
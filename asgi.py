@@ -0,0 +1,416 @@
+"""Async serving mode: uvicorn asgi:application --port 5555
+
+The auth, appointment and upload-url routes run as coroutines on pooled
+aiobotocore clients, so a worker waiting on Cognito or DynamoDB holds no
+thread. Every other route (static files, batch booking, multipart uploads,
+availability) is served by the Flask app in app.py through asgiref's WSGI
+adapter, and app.py still runs on its own under Flask or gunicorn.
+"""
+import asyncio
+import json
+import logging
+import uuid
+from urllib.parse import parse_qsl
+
+from asgiref.wsgi import WsgiToAsgi
+from werkzeug.http import parse_etags
+
+import app as sync_app
+from aws.async_clients import AsyncClientRegistry
+from aws.dynamodb_utils import SlotUnavailableError, booking_attempts, user_appointments_query
+from aws.models import Appointment, decode_item, dumps, encode_item
+from aws.ratelimit import client_ip
+from aws.resilience import DEGRADED_RESPONSES, is_unavailable, retry_after
+from aws.s3_utils import get_s3_client, presign_uploads
+from aws.sns_utils import BOOKED
+from aws.validators import SLOT_UNAVAILABLE
+from aws.telemetry import end_trace, observe_request, start_trace
+
+clients = AsyncClientRegistry()
+flask_app = WsgiToAsgi(sync_app.app)
+logger = logging.getLogger('asgi')
+
+
+class Request:
+    def __init__(self, scope, body):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.headers = {k.decode('latin-1').lower(): v.decode('latin-1')
+                        for k, v in scope['headers']}
+        self.args = dict(parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+        self.remote_addr = (scope.get('client') or (None,))[0]
+        self.body = body
+
+    def json(self):
+        try:
+            return json.loads(self.body) if self.body else None
+        except ValueError:
+            return None
+
+
+class Response:
+    def __init__(self, body, status=200, headers=()):
+        self.body = body.encode()
+        self.status = status
+        self.headers = list(headers)
+
+    async def send(self, send, headers=()):
+        await send({
+            'type': 'http.response.start',
+            'status': self.status,
+            'headers': [(name.encode(), value.encode())
+                        for name, value in [*self.headers, *headers]]
+                       + [(b'content-length', str(len(self.body)).encode())],
+        })
+        await send({'type': 'http.response.body', 'body': self.body})
+
+
+class JSONResponse(Response):
+    def __init__(self, payload, status=200, headers=()):
+        super().__init__(dumps(payload), status, [('Content-Type', 'application/json'), *headers])
+
+
+def error(message, status):
+    return JSONResponse({'error': message}, status)
+
+
+def error_response(e, status=400):
+    """Same mapping as app.error_response: 503 + Retry-After when a
+    dependency is throttling, down or behind an open circuit."""
+    if is_unavailable(e):
+        logger.warning(f"Dependency unavailable: {str(e)}")
+        return JSONResponse(
+            {'error': 'Service temporarily unavailable, please try again shortly'}, 503,
+            [('Retry-After', str(retry_after(e)))]
+        )
+    return error(str(e), status)
+
+
+async def cognito():
+    return await clients.get_client('cognito-idp', sync_app.REGION)
+
+
+async def get_config():
+    # Already resolved during lifespan startup unless AWS was unreachable
+    return await asyncio.to_thread(sync_app.get_aws_config)
+
+
+async def verify_token(token):
+    if sync_app.AUTH_VERIFY_MODE == 'local':
+        # Pure CPU once the JWKS is cached; no AWS round trip
+        return await asyncio.to_thread(sync_app.verify_token, token)
+    client = await cognito()
+    return await client.get_user(AccessToken=token)
+
+
+def require_auth(handler):
+    async def decorated(request, **kwargs):
+        token = request.headers.get('authorization')
+        if not token:
+            return error('No authorization header', 401)
+        try:
+            user = await verify_token(token)
+        except Exception as e:
+            if is_unavailable(e):
+                return error_response(e)
+            return error('Invalid token', 401)
+        return await handler(request, **kwargs, user=user)
+
+    return decorated
+
+
+def rate_limited(route):
+    """Same limits as app.rate_limited, checked before any AWS call."""
+    def wrap(handler):
+        async def decorated(request, **kwargs):
+            data = request.json()
+            email = data.get('email') if isinstance(data, dict) else None
+            limiter = sync_app.rate_limiter
+            args = (route, client_ip(request.remote_addr, request.headers.get('x-forwarded-for')),
+                    email if isinstance(email, str) else None)
+            if limiter.blocking:
+                wait = await asyncio.to_thread(limiter.check, *args)
+            else:
+                wait = limiter.check(*args)
+            if wait:
+                return JSONResponse({'error': 'Too many requests, please try again later'}, 429,
+                                    [('Retry-After', str(wait))])
+            return await handler(request, **kwargs)
+
+        return decorated
+    return wrap
+
+
+def require_aws_config(handler):
+    async def decorated(request, **kwargs):
+        config = await get_config()
+        if config is None:
+            return error('AWS services are not initialized', 503)
+        return await handler(request, **kwargs, config=config)
+
+    return decorated
+
+
+# Routes
+@rate_limited('signup')
+@require_aws_config
+async def signup(request, config):
+    data = request.json()
+    message = sync_app.signup_error(data)
+    if message:
+        return error(message, 400)
+
+    client = await cognito()
+    try:
+        await client.sign_up(
+            ClientId=config.client_id,
+            Username=data['email'],
+            Password=data['password'],
+            UserAttributes=[{'Name': 'email', 'Value': data['email']}]
+        )
+        # Auto confirm the user (for testing only - remove in production)
+        await client.admin_confirm_sign_up(
+            UserPoolId=config.user_pool_id,
+            Username=data['email']
+        )
+        return JSONResponse({'message': 'User registered and confirmed successfully'}, 201)
+    except client.exceptions.UsernameExistsException:
+        return error('User already exists', 400)
+    except Exception as e:
+        logger.error(f"Cognito signup error: {str(e)}")
+        return error_response(e)
+
+
+@rate_limited('login')
+@require_aws_config
+async def login(request, config):
+    data = request.json()
+    if not isinstance(data, dict) or 'email' not in data or 'password' not in data:
+        return error('Email and password are required', 400)
+
+    client = await cognito()
+    try:
+        response = await client.initiate_auth(
+            ClientId=config.client_id,
+            AuthFlow='USER_PASSWORD_AUTH',
+            AuthParameters={'USERNAME': data['email'], 'PASSWORD': data['password']}
+        )
+        return JSONResponse(sync_app.login_payload(data['email'], response['AuthenticationResult']))
+    except client.exceptions.UserNotFoundException:
+        return error('User not found. Please sign up first.', 404)
+    except client.exceptions.NotAuthorizedException:
+        return error('Incorrect username or password', 401)
+    except client.exceptions.UserNotConfirmedException:
+        return error('Please verify your email before logging in', 403)
+    except Exception as e:
+        logger.error(f"Cognito login error: {str(e)}")
+        return error_response(e, 401)
+
+
+@require_auth
+async def logout(request, user):
+    client = await cognito()
+    try:
+        await client.global_sign_out(AccessToken=request.headers['authorization'])
+        sync_app.end_sessions(user['Username'])
+        return JSONResponse({'message': 'Logged out successfully'})
+    except Exception as e:
+        return error(str(e), 400)
+
+
+@require_auth
+@require_aws_config
+async def get_upload_url(request, user, config):
+    data = request.json() or {}
+    try:
+        # Presigning is local signing only, so the sync client is fine here
+        upload = presign_uploads(
+            get_s3_client(config.region), config.bucket_name, config.region,
+            [{'key': sync_app.upload_key(data['fileName']), 'contentType': data['fileType']}],
+            expires_in=sync_app.UPLOAD_URL_EXPIRY
+        )[0]
+        return JSONResponse(upload)
+    except Exception as e:
+        return error(str(e), 400)
+
+
+async def iter_appointment_pages(client, params, limit, start_key):
+    """Async twin of iter_user_appointment_pages on the low-level client."""
+    remaining = limit
+    while True:
+        params['Limit'] = remaining
+        if start_key:
+            params['ExclusiveStartKey'] = encode_item(start_key)
+        response = await client.query(**params)
+
+        appointments = [Appointment.from_item(item) for item in response['Items']]
+        last_key = response.get('LastEvaluatedKey')
+        start_key = decode_item(last_key) if last_key else None
+        remaining -= len(appointments)
+        yield appointments, start_key
+
+        if not start_key or remaining <= 0:
+            return
+
+
+def cached_appointment_response(request, body):
+    etag = sync_app.appointment_list_etag(body)
+    headers = [('ETag', f'"{etag}"'), ('Cache-Control', 'private, no-cache')]
+    # Weak comparison, as Flask's make_conditional does for the sync route
+    if parse_etags(request.headers.get('if-none-match')).contains_weak(etag):
+        return Response('', 304, headers)
+    return Response(body, 200, headers + [('Content-Type', 'application/json')])
+
+
+@require_auth
+async def get_appointments(request, user):
+    options, message = sync_app.parse_listing_args(request.args)
+    if message:
+        return error(message, 400)
+
+    # Shares app.appointment_cache, so both serving modes see the same
+    # entries and invalidations
+    user_email = user['Username']
+    variant = json.dumps(options, sort_keys=True)
+    cache = sync_app.appointment_cache
+    body = await asyncio.to_thread(cache.get, user_email, variant)
+    if body is None:
+        generation = await asyncio.to_thread(cache.generation, user_email)
+        params = user_appointments_query(
+            user_email, options['fields'], options['status'],
+            options['date_from'], options['date_to'], sync_app.APPOINTMENTS_TABLE
+        )
+        client = await clients.get_client('dynamodb', sync_app.REGION)
+        try:
+            pages = [page async for page in iter_appointment_pages(
+                client, params, options['limit'], options['start_key']
+            )]
+        except Exception as e:
+            stale = None
+            if is_unavailable(e):
+                stale = await asyncio.to_thread(cache.get_stale, user_email, variant)
+            if stale is None:
+                return error_response(e)
+            DEGRADED_RESPONSES.inc(route='/api/appointments')
+            response = cached_appointment_response(request, stale)
+            response.headers.append(('Warning', '110 - "Response is Stale"'))
+            return response
+        body = sync_app.render_appointment_page(pages)
+        await asyncio.to_thread(cache.set, user_email, variant, body, generation)
+
+    return cached_appointment_response(request, body)
+
+
+async def book_appointment(appointment, capacity, table_name):
+    """Async twin of aws.dynamodb_utils.book_appointment, on the same booking_attempts."""
+    client = await clients.get_client('dynamodb', sync_app.REGION)
+    attempts = booking_attempts(appointment, capacity, table_name)
+    delay, transact_items = next(attempts)
+    while True:
+        if delay:
+            await asyncio.sleep(delay)
+        try:
+            await client.transact_write_items(TransactItems=transact_items)
+        except client.exceptions.TransactionCanceledException as e:
+            delay, transact_items = attempts.send(e)
+            continue
+        return appointment.bay
+
+
+@require_auth
+async def create_appointment(request, user):
+    try:
+        data = request.json() or {}
+        missing = [field for field in sync_app.REQUIRED_APPOINTMENT_FIELDS if not data.get(field)]
+        if missing:
+            return error(f"Missing fields: {', '.join(missing)}", 400)
+        payload = {
+            'date': data['date'],
+            'time': data['time'],
+            'serviceType': data['serviceType']
+        }
+        if sync_app.validator.blocking:
+            validation_result = await asyncio.to_thread(sync_app.validator.validate, payload)
+        else:
+            validation_result = sync_app.validator.validate(payload)
+        if not validation_result['isValid']:
+            status = 409 if validation_result.get('code') == SLOT_UNAVAILABLE else 400
+            return error(validation_result['message'], status)
+
+        # Built before reserving so a bad request cannot leave the slot taken
+        appointment = sync_app.build_appointment(str(uuid.uuid4()), user['Username'], data)
+        availability = await asyncio.to_thread(sync_app.get_availability_index)
+        if not availability.reserve(data['date'], data['time']):
+            return error('This time slot is already booked', 409)
+
+        try:
+            await book_appointment(appointment, sync_app.SERVICE_BAYS,
+                                   sync_app.APPOINTMENTS_TABLE)
+            await asyncio.to_thread(sync_app.appointment_cache.invalidate, user['Username'])
+        except SlotUnavailableError:
+            # Another worker took the slot; keep the local count reserved
+            return error('This time slot is already booked', 409)
+        except Exception:
+            availability.release(data['date'], data['time'])
+            raise
+        sync_app.schedule_image_derivatives(appointment)
+        sync_app.notify_appointment(BOOKED, appointment)
+        return JSONResponse(appointment.to_dict(), 201)
+    except Exception as e:
+        logger.exception(f"Error creating appointment: {str(e)}")
+        return error_response(e)
+
+
+ROUTES = {
+    ('POST', '/api/auth/signup'): signup,
+    ('POST', '/api/auth/login'): login,
+    ('POST', '/api/auth/logout'): logout,
+    ('POST', '/api/upload-url'): get_upload_url,
+    ('GET', '/api/appointments'): get_appointments,
+    ('POST', '/api/appointments'): create_appointment,
+}
+
+
+async def read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            # Resolve AWS resources once at startup instead of on the request path
+            await get_config()
+            sync_app.start_background_tasks()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await clients.close()
+            await asyncio.to_thread(sync_app.notification_outbox.close)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+
+    handler = None
+    if scope['type'] == 'http':
+        handler = ROUTES.get((scope['method'], scope['path']))
+    if handler is None:
+        return await flask_app(scope, receive, send)
+
+    request = Request(scope, await read_body(receive))
+    trace, token = start_trace(request.headers.get('x-request-id'))
+    try:
+        response = await handler(request)
+        observe_request(trace, request.method, request.path, response.status)
+    finally:
+        end_trace(token)
+    await response.send(send, [('X-Request-Id', trace.request_id),
+                               ('Server-Timing', trace.server_timing())])
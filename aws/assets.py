@@ -0,0 +1,153 @@
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import posixpath
+import re
+
+try:
+    import brotli
+except ImportError:  # assets are served gzip-compressed only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Files rewritten to reference fingerprinted names; served with no-cache
+PAGE_EXTENSIONS = frozenset(['.html'])
+# Content types worth compressing; images and fonts are already compressed
+COMPRESSIBLE_TYPES = frozenset([
+    'text/html', 'text/css', 'text/javascript', 'application/javascript',
+    'application/json', 'image/svg+xml', 'text/plain',
+])
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+
+# src="..." and href="..." attributes in pages
+_REFERENCE = re.compile(r'''(\b(?:src|href)\s*=\s*)(["'])([^"']+)\2''')
+
+
+class Asset:
+    """One file held in memory with its precompressed variants."""
+    __slots__ = ('content_type', 'cache_control', 'digest', 'variants')
+
+    def __init__(self, body, content_type, cache_control):
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.digest = hashlib.blake2b(body, digest_size=8).hexdigest()
+        # Content-Encoding -> (body, strong ETag for that representation)
+        self.variants = {None: (body, f'"{self.digest}"')}
+        if content_type.split(';')[0] in COMPRESSIBLE_TYPES:
+            encoded = {'gzip': gzip.compress(body, 9, mtime=0)}
+            if brotli is not None:
+                encoded['br'] = brotli.compress(body, quality=11)
+            for encoding, data in encoded.items():
+                if len(data) < len(body):
+                    self.variants[encoding] = (data, f'"{self.digest}-{encoding}"')
+
+    def negotiate(self, accept_encoding):
+        """Pick the smallest variant the client accepts: br, gzip or identity."""
+        accepted = parse_accept_encoding(accept_encoding)
+        for encoding in ('br', 'gzip'):
+            if encoding in self.variants and accepted.get(encoding, accepted.get('*', 0)) > 0:
+                return encoding
+        return None
+
+
+def parse_accept_encoding(header):
+    """Map each coding in an Accept-Encoding header to its q value."""
+    accepted = {}
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+def fingerprinted_name(name, digest):
+    stem, ext = posixpath.splitext(name)
+    return f'{stem}.{digest}{ext}'
+
+
+class AssetBundle:
+    """Every file under a directory, fingerprinted and compressed at startup.
+
+    Assets are reachable both under their own name (no-cache) and under a
+    name with a content hash (immutable, cached for a year). Pages have
+    their src/href references rewritten to the hashed names, so a new
+    deploy is picked up as soon as the page is revalidated.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._assets = {}
+        self.hashed_names = {}
+        self._build()
+
+    def _files(self):
+        for directory, _, files in os.walk(self.root):
+            for file_name in sorted(files):
+                path = os.path.join(directory, file_name)
+                yield os.path.relpath(path, self.root).replace(os.sep, '/'), path
+
+    def _build(self):
+        pages = []
+        for name, path in self._files():
+            with open(path, 'rb') as f:
+                body = f.read()
+            if posixpath.splitext(name)[1] in PAGE_EXTENSIONS:
+                pages.append((name, body))
+                continue
+            content_type = content_type_for(name)
+            self._assets[name] = Asset(body, content_type, REVALIDATE)
+            hashed = fingerprinted_name(name, self._assets[name].digest)
+            self._assets[hashed] = Asset(body, content_type, IMMUTABLE)
+            self.hashed_names[name] = hashed
+
+        # Pages last, once every hashed name is known
+        for name, body in pages:
+            page = self.rewrite(name, body.decode('utf-8')).encode('utf-8')
+            self._assets[name] = Asset(page, content_type_for(name), REVALIDATE)
+
+        compressed = sum(1 for asset in self._assets.values() if len(asset.variants) > 1)
+        logger.info(f"Loaded {len(self.hashed_names) + len(pages)} static assets "
+                    f"({compressed} compressed, brotli {'on' if brotli else 'off'}).")
+
+    def rewrite(self, page_name, html):
+        """Point src/href attributes of a page at fingerprinted names."""
+        base = posixpath.dirname(page_name)
+
+        def replace(match):
+            prefix, quote, url = match.groups()
+            if '//' in url or url.startswith(('#', 'data:', 'mailto:')):
+                return match.group(0)
+            path, suffix = re.match(r'([^?#]*)(.*)', url).groups()
+            if path.startswith('/'):
+                target = path.lstrip('/')
+            else:
+                target = posixpath.normpath(posixpath.join(base, path))
+            hashed = self.hashed_names.get(target)
+            if hashed is None:
+                return match.group(0)
+            new_path = posixpath.join(posixpath.dirname(path), posixpath.basename(hashed))
+            return f'{prefix}{quote}{new_path}{suffix}{quote}'
+
+        return _REFERENCE.sub(replace, html)
+
+    def get(self, name):
+        return self._assets.get(name)
+
+
+def content_type_for(name):
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    if content_type.startswith('text/') or content_type == 'application/javascript':
+        content_type += '; charset=utf-8'
+    return content_type
@@ -0,0 +1,62 @@
+import asyncio
+import contextlib
+
+try:
+    from aiobotocore.config import AioConfig
+    from aiobotocore.session import get_session
+except ImportError:  # only the ASGI entry point needs aiobotocore
+    AioConfig = get_session = None
+
+from aws.clients import DEFAULT_REGION, client_settings
+from aws.resilience import install as install_circuit_breakers
+from aws.telemetry import instrument
+
+
+class AsyncClientRegistry:
+    """aiobotocore clients shared by every request on one event loop.
+
+    Each client keeps its own aiohttp connection pool, sized by the same
+    settings as the sync registry, and lives until close() is awaited on
+    shutdown.
+    """
+
+    def __init__(self):
+        self._session = None
+        self._stack = None
+        self._clients = {}
+        self._lock = None
+
+    async def get_client(self, service, region=None):
+        if get_session is None:
+            raise RuntimeError('aiobotocore is required for the async server')
+
+        key = (service, region or DEFAULT_REGION)
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                if self._stack is None:
+                    self._session = get_session()
+                    instrument(self._session)
+                    install_circuit_breakers(self._session)
+                    self._stack = contextlib.AsyncExitStack()
+                client = await self._stack.enter_async_context(
+                    self._session.create_client(
+                        service, region_name=key[1],
+                        config=AioConfig(**client_settings())
+                    )
+                )
+                self._clients[key] = client
+            return client
+
+    async def close(self):
+        if self._stack is not None:
+            await self._stack.aclose()
+        self._session = None
+        self._stack = None
+        self._clients = {}
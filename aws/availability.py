@@ -0,0 +1,197 @@
+import functools
+import logging
+import threading
+import time
+from array import array
+from datetime import date, datetime, timedelta
+
+from boto3.dynamodb.conditions import Attr
+from aws.clients import get_resource
+from aws.rules import SERVICE_SLOT_MASKS, SERVICES, SLOT_MINUTES, SLOTS
+
+logger = logging.getLogger(__name__)
+
+SLOT_INDEX = {slot: index for index, slot in enumerate(SLOTS)}
+ALL_SLOTS = (1 << len(SLOTS)) - 1
+
+
+@functools.lru_cache(maxsize=ALL_SLOTS + 1)
+def _service_masks(open_slots):
+    # Only 2**len(SLOTS) distinct rows exist, so each is built once
+    return [open_slots & SERVICE_SLOT_MASKS[service] for service in SERVICES]
+
+
+class AvailabilityIndex:
+    """In-memory booking counts for every day and fixed slot.
+
+    Each day is a bytearray with one counter per slot (an array of wider
+    counters when capacity exceeds 255), so a month of availability is a few
+    hundred bytes and answering a range query never
+    touches DynamoDB. Counters are loaded once from the table and then kept
+    current by the write path through reserve()/release().
+
+    Alongside the counters each booked day keeps a bitmask of the slots that
+    still have a free bay, updated with every reserve()/release(), which is
+    what calendar() is rendered from.
+    """
+
+    def __init__(self, capacity=1):
+        self.capacity = capacity
+        self.loaded_at = None
+        self._days = {}
+        self._open = {}
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def _counts(self):
+        if self.capacity <= 255:
+            return bytearray(len(SLOTS))
+        return array('L', [0] * len(SLOTS))
+
+    def _day(self, day):
+        counts = self._days.get(day)
+        if counts is None:
+            counts = self._days[day] = self._counts()
+        return counts
+
+    def load(self, items):
+        """Replace the counters with the given (date, time) bookings."""
+        days = {}
+        for item in items:
+            slot = SLOT_INDEX.get(item.get('time'))
+            if slot is None or not item.get('date'):
+                continue
+            counts = days.get(item['date'])
+            if counts is None:
+                counts = days[item['date']] = self._counts()
+            # Overbooked slots are just full; this also keeps counts in range
+            counts[slot] = min(counts[slot] + 1, self.capacity)
+        open_slots = {day: self._open_mask(counts) for day, counts in days.items()}
+
+        with self._lock:
+            self._days = days
+            self._open = open_slots
+            self.loaded_at = time.time()
+
+    def load_from_table(self, table_name='Appointments'):
+        """Rebuild the index from a projected scan of upcoming appointments."""
+        table = get_resource('dynamodb').Table(table_name)
+        params = {
+            'ProjectionExpression': '#date, #time',
+            'ExpressionAttributeNames': {'#date': 'date', '#time': 'time'},
+            'FilterExpression': Attr('date').gte(date.today().isoformat()),
+        }
+        items = []
+        while True:
+            response = table.scan(**params)
+            items.extend(response['Items'])
+            if 'LastEvaluatedKey' not in response:
+                break
+            params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+        self.load(items)
+        logger.info(f"Loaded availability index from {len(items)} appointments.")
+
+    def ensure_loaded(self, table_name='Appointments'):
+        if self.loaded_at is not None:
+            return
+        with self._load_lock:
+            if self.loaded_at is None:
+                self.load_from_table(table_name)
+
+    def _open_mask(self, counts):
+        return sum(1 << slot for slot, booked in enumerate(counts) if booked < self.capacity)
+
+    def remaining(self, day, slot_time):
+        slot = SLOT_INDEX.get(slot_time)
+        if slot is None:
+            return 0
+        counts = self._days.get(day)
+        booked = counts[slot] if counts is not None else 0
+        return max(self.capacity - booked, 0)
+
+    def is_available(self, day, slot_time):
+        return self.remaining(day, slot_time) > 0
+
+    def reserve(self, day, slot_time):
+        """Count a booking if the slot has room. Returns False when full."""
+        slot = SLOT_INDEX.get(slot_time)
+        if slot is None:
+            return False
+        with self._lock:
+            counts = self._day(day)
+            if counts[slot] >= self.capacity:
+                return False
+            counts[slot] += 1
+            if counts[slot] >= self.capacity:
+                self._open[day] = self._open.get(day, ALL_SLOTS) & ~(1 << slot)
+            return True
+
+    def release(self, day, slot_time):
+        """Undo a reserve(), e.g. when the DynamoDB write failed."""
+        slot = SLOT_INDEX.get(slot_time)
+        if slot is None:
+            return
+        with self._lock:
+            counts = self._days.get(day)
+            if counts is not None and counts[slot] > 0:
+                counts[slot] -= 1
+                self._open[day] = self._open.get(day, ALL_SLOTS) | (1 << slot)
+
+    def query(self, date_from, date_to):
+        """Return {date: [remaining per slot]} for an inclusive date range."""
+        days = {}
+        full = [self.capacity] * len(SLOTS)
+        current = date_from
+        while current <= date_to:
+            day = current.isoformat()
+            counts = self._days.get(day)
+            if counts is None:
+                days[day] = full
+            else:
+                days[day] = [max(self.capacity - booked, 0) for booked in counts]
+            current += timedelta(days=1)
+        return days
+
+    def calendar(self, date_from, date_to, now=None):
+        """Return {date: [bookable slot bitmask per service]} for a date range.
+
+        Bit i of a mask is set when SLOTS[i] has a free bay and the service
+        (in SERVICES order) finishes by closing time. Weekends, past slots
+        and days without any opening are left out, so every slot listed is
+        one check_appointment accepts.
+        """
+        now = now or datetime.now()
+        today = now.date()
+        now_minutes = now.hour * 60 + now.minute
+        started = sum(1 << index for index, slot in enumerate(SLOTS)
+                      if SLOT_MINUTES[slot] < now_minutes)
+
+        days = {}
+        current = max(date_from, today)
+        while current <= date_to:
+            if current.weekday() < 5:
+                day = current.isoformat()
+                open_slots = self._open.get(day, ALL_SLOTS)
+                if current == today:
+                    open_slots &= ~started
+                masks = _service_masks(open_slots)
+                if any(masks):
+                    days[day] = masks
+            current += timedelta(days=1)
+        return days
+
+
+def start_refresh(index, table_name, interval):
+    """Reload the index periodically to pick up other workers' bookings."""
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                index.load_from_table(table_name)
+            except Exception as e:
+                logger.error(f"Error refreshing availability index: {str(e)}")
+
+    thread = threading.Thread(target=run, name='availability-refresh', daemon=True)
+    thread.start()
+    return thread
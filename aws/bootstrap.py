@@ -0,0 +1,157 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+from aws.cognito_utils import create_user_pool, create_app_client
+from aws.dynamodb_utils import create_appointments_table, verify_appointments_table
+from aws.s3_utils import get_s3_client, create_bucket
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait before retrying a failed bootstrap on the request path
+RETRY_COOLDOWN = 30
+
+
+@dataclass(frozen=True)
+class AwsConfig:
+    """AWS resources resolved once per process."""
+    region: str
+    bucket_name: str
+    user_pool_id: str
+    client_id: str
+    appointments_table: str
+    resolved_at: float
+
+
+_config = None
+_last_failure = 0.0
+_lock = threading.Lock()
+_revalidation_thread = None
+_stop_revalidation = threading.Event()
+
+
+def resolve_config(region, bucket_name, pool_name, table_name, capacity=None):
+    """Create or verify every AWS resource the app needs.
+
+    Makes control-plane calls, so it should only run at startup or from the
+    background revalidation thread. The table is only verified unless a
+    TableCapacity is given, as python -m aws.provision does; then it is
+    created or migrated to match, which can take many minutes.
+    Returns an AwsConfig or None on failure.
+    """
+    # Initialize S3 first
+    s3_client = get_s3_client(region, verify_credentials=True)
+    if not s3_client:
+        logger.error("Failed to initialize S3 client")
+        return None
+
+    bucket = create_bucket(s3_client, bucket_name, region)
+    if not bucket:
+        logger.error("Failed to create S3 bucket")
+        return None
+
+    logger.info(f"Successfully created/verified bucket: {bucket_name}")
+
+    # Initialize Cognito
+    try:
+        user_pool_id = create_user_pool(pool_name, region)
+        if not user_pool_id:
+            logger.error("Failed to get/create user pool")
+            return None
+
+        client_id = create_app_client(user_pool_id, region)
+        if not client_id:
+            logger.error("Failed to get/create client ID")
+            return None
+
+        logger.info(f"Using User Pool ID: {user_pool_id}")
+        logger.info(f"Using Client ID: {client_id}")
+    except Exception as e:
+        logger.error(f"Error initializing Cognito: {str(e)}")
+        return None
+
+    # Initialize DynamoDB
+    try:
+        if capacity is None:
+            table = verify_appointments_table(table_name, region)
+        else:
+            table = create_appointments_table(table_name, capacity, region)
+    except Exception as e:
+        logger.error(f"Error initializing DynamoDB: {str(e)}")
+        return None
+
+    return AwsConfig(
+        region=region,
+        bucket_name=bucket_name,
+        user_pool_id=user_pool_id,
+        client_id=client_id,
+        appointments_table=table.name,
+        resolved_at=time.time(),
+    )
+
+
+def bootstrap(region, bucket_name, pool_name, table_name, force=False):
+    """Return the cached AwsConfig, resolving it on first use.
+
+    Safe to call from every request: once resolved this is a lock-free
+    attribute read. Concurrent first callers wait on a single resolution, and
+    after a failure further attempts are suppressed for RETRY_COOLDOWN seconds
+    so an outage does not turn every request into control-plane calls.
+    """
+    global _config, _last_failure
+
+    config = _config
+    if config is not None and not force:
+        return config
+
+    with _lock:
+        if _config is not None and not force:
+            return _config
+        if not force and time.time() - _last_failure < RETRY_COOLDOWN:
+            return None
+
+        config = resolve_config(region, bucket_name, pool_name, table_name)
+        if config is None:
+            _last_failure = time.time()
+            logger.warning("Failed to initialize AWS services")
+            return _config
+
+        _config = config
+        return config
+
+
+def get_config():
+    """Return the resolved AwsConfig without triggering resolution."""
+    return _config
+
+
+def is_warm():
+    return _config is not None
+
+
+def start_revalidation(region, bucket_name, pool_name, table_name, interval):
+    """Periodically re-resolve resources in a daemon thread.
+
+    A failed revalidation keeps the last good config, so request handlers are
+    never left without one once the process is warm.
+    """
+    global _revalidation_thread
+
+    if _revalidation_thread is not None and _revalidation_thread.is_alive():
+        return _revalidation_thread
+
+    def run():
+        while not _stop_revalidation.wait(interval):
+            bootstrap(region, bucket_name, pool_name, table_name, force=True)
+
+    _stop_revalidation.clear()
+    _revalidation_thread = threading.Thread(
+        target=run, name='aws-revalidation', daemon=True
+    )
+    _revalidation_thread.start()
+    return _revalidation_thread
+
+
+def stop_revalidation():
+    _stop_revalidation.set()
@@ -0,0 +1,176 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# redis://host:port/db to share the cache between workers
+APPOINTMENT_CACHE_URL = os.getenv('APPOINTMENT_CACHE_URL')
+# Seconds a cached list may be served; 0 disables caching. A booking only
+# invalidates the in-process cache of the worker that took it, so without
+# a shared cache this defaults to 0; set it for single-worker deployments
+APPOINTMENT_CACHE_TTL = int(os.getenv('APPOINTMENT_CACHE_TTL',
+                                      '60' if APPOINTMENT_CACHE_URL else '0'))
+# Seconds an expired list is kept for degraded mode, when DynamoDB is down
+APPOINTMENT_CACHE_STALE_TTL = int(os.getenv('APPOINTMENT_CACHE_STALE_TTL', '3600'))
+# Users kept by the in-process cache
+APPOINTMENT_CACHE_SIZE = int(os.getenv('APPOINTMENT_CACHE_SIZE', '1024'))
+# Lists (pages and filters) kept per user; cursors make the variants unbounded
+APPOINTMENT_CACHE_VARIANTS = int(os.getenv('APPOINTMENT_CACHE_VARIANTS', '32'))
+
+
+class MemoryCache:
+    """Per-process LRU of rendered appointment lists with a TTL.
+
+    Entries are grouped by owner (the user's email) so invalidate() drops
+    every page and filter variant of that user's list at once. The least
+    recently used owner is evicted beyond maxsize, and the least recently
+    stored variant beyond max_variants. Expired entries are kept for another
+    stale_ttl seconds so get_stale() can serve them while the table is
+    unreachable; with ttl 0 lists are only kept for that.
+
+    A list read before an invalidation must not be stored after it, so
+    readers take generation() before querying and pass it to set(), which
+    drops the write if the owner was invalidated in between.
+    """
+
+    def __init__(self, maxsize=APPOINTMENT_CACHE_SIZE, ttl=APPOINTMENT_CACHE_TTL,
+                 stale_ttl=APPOINTMENT_CACHE_STALE_TTL,
+                 max_variants=APPOINTMENT_CACHE_VARIANTS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_variants = max_variants
+        self._lock = threading.Lock()
+        # owner -> (generation, OrderedDict of variant -> (stored_at, value))
+        self._owners = OrderedDict()
+        self._counter = 0
+        # Highest generation of an evicted owner, whose own is forgotten
+        self._evicted = 0
+
+    def _add_owner(self, owner, generation):
+        record = self._owners[owner] = (generation, OrderedDict())
+        while len(self._owners) > self.maxsize:
+            _, (evicted, _) = self._owners.popitem(last=False)
+            self._evicted = max(self._evicted, evicted)
+        return record
+
+    def _get(self, owner, variant, max_age):
+        with self._lock:
+            record = self._owners.get(owner)
+            if record is None:
+                return None
+            self._owners.move_to_end(owner)
+            entries = record[1]
+            entry = entries.get(variant)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            age = time.monotonic() - stored_at
+            if age > self.ttl + self.stale_ttl:
+                del entries[variant]
+                return None
+            return value if age <= max_age else None
+
+    def get(self, owner, variant):
+        if self.ttl <= 0:
+            return None
+        return self._get(owner, variant, self.ttl)
+
+    def get_stale(self, owner, variant):
+        """Like get() but also returns entries up to stale_ttl past expiry."""
+        return self._get(owner, variant, self.ttl + self.stale_ttl)
+
+    def generation(self, owner):
+        with self._lock:
+            record = self._owners.get(owner)
+            return record[0] if record is not None else self._counter
+
+    def set(self, owner, variant, value, generation=None):
+        if self.ttl + self.stale_ttl <= 0:
+            return
+        with self._lock:
+            record = self._owners.get(owner)
+            current = record[0] if record is not None else self._evicted
+            if generation is not None and generation < current:
+                return
+            if record is None:
+                record = self._add_owner(owner, current)
+            self._owners.move_to_end(owner)
+            entries = record[1]
+            entries[variant] = (time.monotonic(), value)
+            entries.move_to_end(variant)
+            while len(entries) > self.max_variants:
+                entries.popitem(last=False)
+
+    def invalidate(self, owner):
+        with self._lock:
+            self._counter += 1
+            self._owners.pop(owner, None)
+            self._add_owner(owner, self._counter)
+
+
+class RedisCache:
+    """The same interface backed by a Redis-compatible client.
+
+    Each owner is one hash whose fields are the cached variants, so
+    invalidation is a single DEL visible to every worker; a hash that
+    reaches max_variants is started over. The generation is a counter key
+    bumped by invalidate(). Only hget, hset, hlen, get, incr, expire and
+    delete are used, which any fake client can provide.
+    """
+
+    def __init__(self, client, ttl=APPOINTMENT_CACHE_TTL,
+                 stale_ttl=APPOINTMENT_CACHE_STALE_TTL, prefix='appointments:',
+                 max_variants=APPOINTMENT_CACHE_VARIANTS):
+        self.client = client
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.prefix = prefix
+        self.max_variants = max_variants
+
+    def _get(self, owner, variant, max_age):
+        raw = self.client.hget(self.prefix + owner, variant)
+        if raw is None:
+            return None
+        stored_at, value = json.loads(raw)
+        # The hash TTL is refreshed by every write, so check each field's age
+        if stored_at + max_age < time.time():
+            return None
+        return value
+
+    def get(self, owner, variant):
+        return self._get(owner, variant, self.ttl)
+
+    def get_stale(self, owner, variant):
+        return self._get(owner, variant, self.ttl + self.stale_ttl)
+
+    def generation(self, owner):
+        return int(self.client.get(self.prefix + 'generation:' + owner) or 0)
+
+    def set(self, owner, variant, value, generation=None):
+        if self.ttl <= 0:
+            return
+        key = self.prefix + owner
+        if self.client.hlen(key) >= self.max_variants:
+            self.client.delete(key)
+        self.client.hset(key, variant, json.dumps([time.time(), value]))
+        self.client.expire(key, self.ttl + self.stale_ttl)
+        # Checked after writing: an invalidation racing this write either
+        # bumped the generation before this check or deletes the hash after it
+        if generation is not None and self.generation(owner) != generation:
+            self.client.delete(key)
+
+    def invalidate(self, owner):
+        generation_key = self.prefix + 'generation:' + owner
+        self.client.incr(generation_key)
+        self.client.expire(generation_key, self.ttl + self.stale_ttl)
+        self.client.delete(self.prefix + owner)
+
+
+def make_cache(url=APPOINTMENT_CACHE_URL):
+    """Return a RedisCache when url is set (requires redis-py), else a MemoryCache."""
+    if url:
+        import redis
+        return RedisCache(redis.Redis.from_url(url))
+    return MemoryCache()
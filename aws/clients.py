@@ -0,0 +1,121 @@
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+
+from aws.resilience import install as install_circuit_breakers
+from aws.telemetry import instrument
+
+DEFAULT_REGION = 'us-east-1'
+
+# Connection pool and timeout settings shared by every client
+MAX_POOL_CONNECTIONS = int(os.getenv('AWS_MAX_POOL_CONNECTIONS', '50'))
+CONNECT_TIMEOUT = float(os.getenv('AWS_CONNECT_TIMEOUT', '2'))
+READ_TIMEOUT = float(os.getenv('AWS_READ_TIMEOUT', '5'))
+MAX_ATTEMPTS = int(os.getenv('AWS_MAX_ATTEMPTS', '3'))
+# 'adaptive' adds client-side rate limiting on top of the jittered
+# exponential backoff of 'standard'; it slows down when AWS throttles us
+RETRY_MODE = os.getenv('AWS_RETRY_MODE', 'adaptive')
+
+_lock = threading.Lock()
+_session = None
+_clients = {}
+_local = threading.local()
+_pid = os.getpid()
+
+
+def client_settings(**overrides):
+    """Keyword arguments for the botocore Config shared by all clients."""
+    settings = {
+        'max_pool_connections': MAX_POOL_CONNECTIONS,
+        'connect_timeout': CONNECT_TIMEOUT,
+        'read_timeout': READ_TIMEOUT,
+        'retries': {'max_attempts': MAX_ATTEMPTS, 'mode': RETRY_MODE},
+    }
+    settings.update(overrides)
+    return settings
+
+
+def client_config(**overrides):
+    """Build the botocore Config used for all pooled clients."""
+    return Config(**client_settings(**overrides))
+
+
+def _check_pid():
+    # Clients hold sockets that must not be shared with a forked child
+    if os.getpid() != _pid:
+        reset_clients()
+
+
+def _get_session():
+    global _session
+    if _session is None:
+        _session = boto3.session.Session()
+        instrument(_session.events)
+        install_circuit_breakers(_session.events)
+    return _session
+
+
+def get_client(service, region=None):
+    """Return the process-wide client for a service and region.
+
+    botocore clients are thread-safe, so one client (and its connection pool)
+    is shared by every request handler.
+    """
+    _check_pid()
+    key = (service, region or DEFAULT_REGION)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _get_session().client(
+                service, region_name=key[1], config=client_config()
+            )
+            _clients[key] = client
+        return client
+
+
+def get_resource(service, region=None):
+    """Return a cached boto3 resource for a service and region.
+
+    boto3 resources are not thread-safe, so one is kept per thread rather
+    than per process; it is still built only once per thread.
+    """
+    _check_pid()
+    key = (service, region or DEFAULT_REGION)
+    resources = getattr(_local, 'resources', None)
+    if resources is None:
+        resources = _local.resources = {}
+
+    resource = resources.get(key)
+    if resource is None:
+        # Creating clients and resources mutates the shared Session, which
+        # is not thread-safe either
+        with _lock:
+            resource = _get_session().resource(
+                service, region_name=key[1], config=client_config()
+            )
+        resources[key] = resource
+    return resource
+
+
+def reset_clients():
+    """Drop every cached session, client and resource.
+
+    Called automatically in forked children and from the gunicorn post_fork
+    hook so each worker opens its own connection pools.
+    """
+    global _lock, _session, _clients, _local, _pid
+    _lock = threading.Lock()
+    _session = None
+    _clients = {}
+    _local = threading.local()
+    _pid = os.getpid()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reset_clients)
@@ -1,15 +1,16 @@
-import boto3
+import logging
+from aws.clients import get_client
 
-# Initialize a Cognito client
-cognito_client = boto3.client('cognito-idp', region_name='us-east-1')
+logger = logging.getLogger(__name__)
 
-def create_user_pool(pool_name):
+def create_user_pool(pool_name, region=None):
     try:
+        cognito_client = get_client('cognito-idp', region)
         # List existing user pools
         response = cognito_client.list_user_pools(MaxResults=60)
         for pool in response['UserPools']:
             if pool['Name'] == pool_name:
-                print(f"User pool {pool_name} already exists")
+                logger.info(f"User pool {pool_name} already exists")
                 return pool['Id']
 
         # Create new pool if it doesn't exist
@@ -29,11 +30,12 @@ def create_user_pool(pool_name):
         )
         return response['UserPool']['Id']
     except Exception as e:
-        print(f"Error creating/getting user pool: {str(e)}")
+        logger.error(f"Error creating/getting user pool: {str(e)}")
         return None
 
-def create_app_client(user_pool_id):
+def create_app_client(user_pool_id, region=None):
     try:
+        cognito_client = get_client('cognito-idp', region)
         # List existing clients
         response = cognito_client.list_user_pool_clients(
             UserPoolId=user_pool_id,
@@ -42,7 +44,7 @@ def create_app_client(user_pool_id):
         
         for client in response['UserPoolClients']:
             if client['ClientName'] == 'car-app-client':
-                print("App client already exists")
+                logger.info("App client already exists")
                 return client['ClientId']
 
         # Create new client if it doesn't exist
@@ -57,11 +59,5 @@ def create_app_client(user_pool_id):
         )
         return response['UserPoolClient']['ClientId']
     except Exception as e:
-        print(f"Error creating/getting app client: {str(e)}")
+        logger.error(f"Error creating/getting app client: {str(e)}")
         return None
-
-# Usage
-pool_id = create_user_pool('CarServiceUserPool')
-app_client_id = create_app_client(pool_id)
-print("User Pool ID:", pool_id)
-print("App Client ID:", app_client_id)
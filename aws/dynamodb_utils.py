@@ -1,37 +1,428 @@
-import boto3
+import base64
+import json
+import logging
+import os
+import random
 import time
+from dataclasses import dataclass
+from boto3.dynamodb.conditions import Attr, ConditionExpressionBuilder, Key
+from aws.clients import get_client, get_resource
+from aws.models import FIELD_NAMES, Appointment, decode_item, encode_item
 
-dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
-
-def create_appointments_table():
-    # Check if the table already exists
-    existing_tables = dynamodb.tables.all()
-    for table in existing_tables:
-        if table.name == 'Appointments':
-            print("Table already exists.")
-            return dynamodb.Table('Appointments')
-
-    # Create the table
-    table = dynamodb.create_table(
-        TableName='Appointments',
-        KeySchema=[{'AttributeName': 'appointment_id', 'KeyType': 'HASH'}],  # Partition key
-        AttributeDefinitions=[{'AttributeName': 'appointment_id', 'AttributeType': 'S'}],
-        ProvisionedThroughput={'ReadCapacityUnits': 5, 'WriteCapacityUnits': 5}
-    )
-    
-    # Wait for the table to be created
-    table.meta.client.get_waiter('table_exists').wait(TableName='Appointments')
-    print("Table created successfully.")
-    return table
+logger = logging.getLogger(__name__)
+
+# Attributes a client may request through a projection
+APPOINTMENT_FIELDS = frozenset(FIELD_NAMES)
+
+# Attempts per bay while a concurrent booking transaction holds its lock item
+SLOT_CONFLICT_ATTEMPTS = 3
+
+@dataclass(frozen=True)
+class TableCapacity:
+    """How the appointments table and its indexes are billed.
+
+    PAY_PER_REQUEST needs no tuning. PROVISIONED uses the given capacity for
+    the table and every index, and autoscaling_max > 0 adds target-tracking
+    autoscaling between that capacity and autoscaling_max.
+    """
+    billing_mode: str = 'PAY_PER_REQUEST'
+    read_capacity: int = 5
+    write_capacity: int = 5
+    autoscaling_max: int = 0
+    autoscaling_target: float = 70.0
+
+    @property
+    def provisioned(self):
+        return self.billing_mode == 'PROVISIONED'
+
+    def throughput(self):
+        return {'ReadCapacityUnits': self.read_capacity,
+                'WriteCapacityUnits': self.write_capacity}
+
+
+DEFAULT_CAPACITY = TableCapacity(
+    billing_mode=os.getenv('DYNAMODB_BILLING_MODE', 'PAY_PER_REQUEST'),
+    read_capacity=int(os.getenv('DYNAMODB_READ_CAPACITY', '5')),
+    write_capacity=int(os.getenv('DYNAMODB_WRITE_CAPACITY', '5')),
+    autoscaling_max=int(os.getenv('DYNAMODB_AUTOSCALING_MAX', '0')),
+    autoscaling_target=float(os.getenv('DYNAMODB_AUTOSCALING_TARGET', '70')),
+)
+
+ATTRIBUTE_DEFINITIONS = [
+    {'AttributeName': name, 'AttributeType': 'S'}
+    for name in ('appointment_id', 'userEmail', 'date', 'time')
+]
+
+# Global secondary indexes the code queries. UserEmailIndex serves the
+# appointment listing (any attribute may be requested); DateTimeIndex is
+# only used by the validation Lambda to count bookings for a slot.
+APPOINTMENT_INDEXES = {
+    'UserEmailIndex': {
+        'KeySchema': [{'AttributeName': 'userEmail', 'KeyType': 'HASH'},
+                      {'AttributeName': 'date', 'KeyType': 'RANGE'}],
+        'Projection': {'ProjectionType': 'ALL'},
+    },
+    'DateTimeIndex': {
+        'KeySchema': [{'AttributeName': 'date', 'KeyType': 'HASH'},
+                      {'AttributeName': 'time', 'KeyType': 'RANGE'}],
+        'Projection': {'ProjectionType': 'KEYS_ONLY'},
+    },
+}
+
+def _index_definition(name, capacity):
+    index = {'IndexName': name, **APPOINTMENT_INDEXES[name]}
+    if capacity.provisioned:
+        index['ProvisionedThroughput'] = capacity.throughput()
+    return index
+
+def _index_matches(existing, name):
+    wanted = APPOINTMENT_INDEXES[name]
+    projection = existing.get('Projection', {})
+    return (existing['KeySchema'] == wanted['KeySchema']
+            and projection.get('ProjectionType') == wanted['Projection']['ProjectionType']
+            and sorted(projection.get('NonKeyAttributes', [])) ==
+                sorted(wanted['Projection'].get('NonKeyAttributes', [])))
+
+def _wait_until_active(client, table_name, poll_interval=5, timeout=1800):
+    """Wait for the table and every index to finish creating or updating."""
+    deadline = time.monotonic() + timeout
+    while True:
+        table = client.describe_table(TableName=table_name)['Table']
+        pending = [gsi['IndexName'] for gsi in table.get('GlobalSecondaryIndexes', [])
+                   if gsi['IndexStatus'] != 'ACTIVE']
+        if table['TableStatus'] == 'ACTIVE' and not pending:
+            return table
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Table {table_name} still updating: {', '.join(pending) or table['TableStatus']}")
+        time.sleep(poll_interval)
 
-def put_appointment(appointment_id, appointment_data):
+def _migrate_appointments_table(client, table, capacity):
+    """Bring an existing table's billing mode and indexes in line with the spec.
+
+    DynamoDB allows one index creation or deletion per UpdateTable call, so
+    each change is applied and waited for in turn.
+    """
+    table_name = table['TableName']
+    indexes = {gsi['IndexName']: gsi for gsi in table.get('GlobalSecondaryIndexes', [])}
+    billing_mode = table.get('BillingModeSummary', {}).get('BillingMode', 'PROVISIONED')
+
+    if billing_mode != capacity.billing_mode:
+        params = {'BillingMode': capacity.billing_mode}
+        if capacity.provisioned:
+            params['ProvisionedThroughput'] = capacity.throughput()
+            params['GlobalSecondaryIndexUpdates'] = [
+                {'Update': {'IndexName': name, 'ProvisionedThroughput': capacity.throughput()}}
+                for name in indexes
+            ]
+        logger.info(f"Switching table {table_name} from {billing_mode} to {capacity.billing_mode}.")
+        client.update_table(TableName=table_name, **params)
+        table = _wait_until_active(client, table_name)
+    elif capacity.provisioned and not capacity.autoscaling_max:
+        current = table.get('ProvisionedThroughput', {})
+        if (current.get('ReadCapacityUnits'), current.get('WriteCapacityUnits')) != (
+                capacity.read_capacity, capacity.write_capacity):
+            logger.info(f"Updating provisioned throughput of table {table_name}.")
+            client.update_table(TableName=table_name, ProvisionedThroughput=capacity.throughput())
+            table = _wait_until_active(client, table_name)
+
+    for name in APPOINTMENT_INDEXES:
+        existing = indexes.get(name)
+        if existing is not None and _index_matches(existing, name):
+            continue
+        if existing is not None:
+            # Key schema and projection cannot be changed in place
+            logger.warning(f"Index {name} on {table_name} does not match its definition; rebuilding it.")
+            client.update_table(TableName=table_name,
+                                GlobalSecondaryIndexUpdates=[{'Delete': {'IndexName': name}}])
+            _wait_until_active(client, table_name)
+        logger.info(f"Creating index {name} on table {table_name}.")
+        client.update_table(
+            TableName=table_name,
+            AttributeDefinitions=ATTRIBUTE_DEFINITIONS,
+            GlobalSecondaryIndexUpdates=[{'Create': _index_definition(name, capacity)}]
+        )
+        _wait_until_active(client, table_name)
+
+def configure_autoscaling(table_name, capacity, region=None):
+    """Register target-tracking autoscaling for the table and every index."""
+    client = get_client('application-autoscaling', region)
+    resources = [(f'table/{table_name}', 'table')] + [
+        (f'table/{table_name}/index/{name}', 'index') for name in APPOINTMENT_INDEXES
+    ]
+    for resource_id, kind in resources:
+        for unit, minimum, metric in (
+            ('Read', capacity.read_capacity, 'DynamoDBReadCapacityUtilization'),
+            ('Write', capacity.write_capacity, 'DynamoDBWriteCapacityUtilization'),
+        ):
+            dimension = f'dynamodb:{kind}:{unit}CapacityUnits'
+            client.register_scalable_target(
+                ServiceNamespace='dynamodb', ResourceId=resource_id,
+                ScalableDimension=dimension,
+                MinCapacity=minimum, MaxCapacity=capacity.autoscaling_max
+            )
+            client.put_scaling_policy(
+                PolicyName=f"{resource_id.replace('/', '-')}-{unit.lower()}",
+                ServiceNamespace='dynamodb', ResourceId=resource_id,
+                ScalableDimension=dimension, PolicyType='TargetTrackingScaling',
+                TargetTrackingScalingPolicyConfiguration={
+                    'TargetValue': capacity.autoscaling_target,
+                    'PredefinedMetricSpecification': {'PredefinedMetricType': metric},
+                }
+            )
+    logger.info(f"Autoscaling {table_name} up to {capacity.autoscaling_max} units "
+                f"at {capacity.autoscaling_target:.0f}% utilization.")
+
+def create_appointments_table(table_name='Appointments', capacity=DEFAULT_CAPACITY,
+                              region=None):
+    """Create the appointments table, or update an existing one to match.
+
+    One DescribeTable call decides between creating the table with its
+    indexes and diffing the live table against APPOINTMENT_INDEXES and
+    capacity. Returns the boto3 Table resource.
+    """
+    client = get_client('dynamodb', region)
+    try:
+        table = client.describe_table(TableName=table_name)['Table']
+    except client.exceptions.ResourceNotFoundException:
+        params = {
+            'TableName': table_name,
+            'KeySchema': [{'AttributeName': 'appointment_id', 'KeyType': 'HASH'}],  # Partition key
+            'AttributeDefinitions': ATTRIBUTE_DEFINITIONS,
+            'BillingMode': capacity.billing_mode,
+            'GlobalSecondaryIndexes': [
+                _index_definition(name, capacity) for name in APPOINTMENT_INDEXES
+            ],
+        }
+        if capacity.provisioned:
+            params['ProvisionedThroughput'] = capacity.throughput()
+        client.create_table(**params)
+        _wait_until_active(client, table_name)
+        logger.info("Table created successfully.")
+    else:
+        _migrate_appointments_table(client, table, capacity)
+        logger.info("Table already exists.")
+
+    if capacity.autoscaling_max:
+        if capacity.provisioned:
+            configure_autoscaling(table_name, capacity, region)
+        else:
+            logger.warning("Autoscaling only applies to PROVISIONED tables; ignoring it.")
+    return get_resource('dynamodb', region).Table(table_name)
+
+def verify_appointments_table(table_name='Appointments', region=None):
+    """Check that the table exists; never changes it.
+
+    Meant for the app's own bootstrap: one DescribeTable call, with a
+    warning for missing or outdated indexes. Creating and migrating the
+    table is left to python -m aws.provision. Returns the boto3 Table resource.
+    """
+    client = get_client('dynamodb', region)
     try:
-        # Ensure appointment_id is in the data
-        appointment_data['appointment_id'] = appointment_id
-        
-        table = dynamodb.Table('Appointments')
-        table.put_item(Item=appointment_data)
-        print(f"Appointment {appointment_id} added successfully.")
+        table = client.describe_table(TableName=table_name)['Table']
+    except client.exceptions.ResourceNotFoundException:
+        raise RuntimeError(f"Table {table_name} does not exist; run python -m aws.provision")
+
+    indexes = {gsi['IndexName']: gsi for gsi in table.get('GlobalSecondaryIndexes', [])}
+    outdated = [name for name in APPOINTMENT_INDEXES
+                if name not in indexes or not _index_matches(indexes[name], name)]
+    if outdated:
+        logger.warning(f"Table {table_name} is missing or has outdated indexes "
+                       f"({', '.join(outdated)}); run python -m aws.provision")
+    return get_resource('dynamodb', region).Table(table_name)
+
+def put_appointment(appointment, table_name='Appointments'):
+    try:
+        get_client('dynamodb').put_item(TableName=table_name, Item=appointment.to_item())
+        logger.info(f"Appointment {appointment.appointment_id} added successfully.")
     except Exception as e:
-        print(f"Error putting appointment in DynamoDB: {str(e)}")
+        logger.error(f"Error putting appointment in DynamoDB: {str(e)}")
         raise e
+
+class SlotUnavailableError(Exception):
+    """Raised when every bay for a date and time is already locked."""
+
+
+def slot_lock_id(date, time, bay):
+    return f"slot#{date}#{time}#{bay}"
+
+def booking_transaction(appointment, bay, table_name='Appointments'):
+    """TransactItems that store an Appointment and lock its slot for a bay."""
+    appointment.bay = bay
+    lock_item = {
+        'appointment_id': slot_lock_id(appointment.date, appointment.time, bay),
+        'lockedBy': appointment.appointment_id,
+        'createdAt': appointment.created_at or '',
+    }
+    return [
+        {'Put': {
+            'TableName': table_name,
+            'Item': encode_item(lock_item),
+            'ConditionExpression': 'attribute_not_exists(appointment_id)',
+        }},
+        {'Put': {
+            'TableName': table_name,
+            'Item': appointment.to_item(),
+            'ConditionExpression': 'attribute_not_exists(appointment_id)',
+        }},
+    ]
+
+def is_slot_conflict(error):
+    """True when a cancelled booking transaction failed on the slot lock."""
+    reasons = error.response.get('CancellationReasons', [])
+    return bool(reasons) and reasons[0].get('Code') == 'ConditionalCheckFailed'
+
+def is_transaction_conflict(error):
+    """True when a cancelled transaction raced another one still in flight.
+
+    The other booking may yet fail, so the bay is worth another attempt.
+    """
+    reasons = error.response.get('CancellationReasons', [])
+    return any(reason.get('Code') == 'TransactionConflict' for reason in reasons)
+
+def conflict_backoff(attempt):
+    return random.uniform(0, 0.05 * 2 ** attempt)
+
+def booking_attempts(appointment, capacity=1, table_name='Appointments'):
+    """The bay-by-bay retry plan of book_appointment, without the I/O.
+
+    Yields (delay, transact_items): wait delay seconds, then send the
+    transaction. A cancelled transaction is sent back with send(error);
+    after a successful write the generator is simply dropped. Raises
+    SlotUnavailableError once every bay is taken, and re-raises
+    cancellations that were not caused by a slot lock.
+    """
+    for bay in range(capacity):
+        delay = 0
+        for attempt in range(SLOT_CONFLICT_ATTEMPTS):
+            error = yield delay, booking_transaction(appointment, bay, table_name)
+            if is_slot_conflict(error):
+                break
+            if not is_transaction_conflict(error):
+                raise error
+            delay = conflict_backoff(attempt)
+
+    appointment.bay = None
+    raise SlotUnavailableError(
+        f"No bay available on {appointment.date} at {appointment.time}"
+    )
+
+def book_appointment(appointment, capacity=1, table_name='Appointments'):
+    """Atomically claim a slot and store the appointment.
+
+    The appointment and a slot-lock item (keyed by date, time and bay) are
+    written in one TransactWriteItems call, both guarded by
+    attribute_not_exists, so concurrent bookings for the same bay cannot both
+    succeed. Bays are tried in order; returns the bay that was claimed or
+    raises SlotUnavailableError when all are taken. A bay whose lock is
+    contended by a transaction in flight is retried SLOT_CONFLICT_ATTEMPTS
+    times before it counts as taken.
+
+    Lock items have no userEmail, date or time attributes, so they stay out
+    of UserEmailIndex and DateTimeIndex.
+    """
+    client = get_client('dynamodb')
+    attempts = booking_attempts(appointment, capacity, table_name)
+    delay, transact_items = next(attempts)
+    while True:
+        if delay:
+            time.sleep(delay)
+        try:
+            client.transact_write_items(TransactItems=transact_items)
+        except client.exceptions.TransactionCanceledException as e:
+            delay, transact_items = attempts.send(e)
+            continue
+        logger.info(f"Appointment {appointment.appointment_id} booked in bay {appointment.bay}.")
+        return appointment.bay
+
+def encode_cursor(last_evaluated_key):
+    """Turn a LastEvaluatedKey into an opaque, URL-safe cursor."""
+    if not last_evaluated_key:
+        return None
+    raw = json.dumps(last_evaluated_key, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor. Raises ValueError for a malformed cursor."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(key, dict) or not all(isinstance(k, str) for k in key):
+        raise ValueError('Invalid cursor')
+    return key
+
+def user_appointments_query(user_email, fields=None, status=None, date_from=None,
+                            date_to=None, table_name='Appointments'):
+    """Low-level Query parameters for a user's appointments on UserEmailIndex.
+
+    The date range is part of the key condition (``date`` is the index sort
+    key) and status is a filter.
+    """
+    key_condition = Key('userEmail').eq(user_email)
+    if date_from and date_to:
+        key_condition = key_condition & Key('date').between(date_from, date_to)
+    elif date_from:
+        key_condition = key_condition & Key('date').gte(date_from)
+    elif date_to:
+        key_condition = key_condition & Key('date').lte(date_to)
+    filter_condition = Attr('status').eq(status) if status else None
+
+    builder = ConditionExpressionBuilder()
+    names = {}
+    values = {}
+
+    key_expression = builder.build_expression(key_condition, is_key_condition=True)
+    names.update(key_expression.attribute_name_placeholders)
+    values.update(key_expression.attribute_value_placeholders)
+    params = {
+        'TableName': table_name,
+        'IndexName': 'UserEmailIndex',
+        'KeyConditionExpression': key_expression.condition_expression,
+    }
+    if filter_condition is not None:
+        filter_expression = builder.build_expression(filter_condition)
+        names.update(filter_expression.attribute_name_placeholders)
+        values.update(filter_expression.attribute_value_placeholders)
+        params['FilterExpression'] = filter_expression.condition_expression
+    if fields:
+        projected = {f"#f{i}": field for i, field in enumerate(fields)}
+        names.update(projected)
+        params['ProjectionExpression'] = ', '.join(projected)
+
+    params['ExpressionAttributeNames'] = names
+    params['ExpressionAttributeValues'] = encode_item(values)
+    return params
+
+def iter_user_appointment_pages(user_email, limit, start_key=None, fields=None,
+                                status=None, date_from=None, date_to=None,
+                                table_name='Appointments'):
+    """Query UserEmailIndex and yield (appointments, last_evaluated_key) per call.
+
+    Items are decoded straight into Appointment records on the low-level
+    client. Because the status filter can drop evaluated items, the query
+    is repeated with the remaining budget until ``limit`` items have been
+    returned or the index is exhausted. Keys are plain dicts, as used by
+    encode_cursor.
+    """
+    params = user_appointments_query(
+        user_email, fields, status, date_from, date_to, table_name
+    )
+    client = get_client('dynamodb')
+    remaining = limit
+    while True:
+        params['Limit'] = remaining
+        if start_key:
+            params['ExclusiveStartKey'] = encode_item(start_key)
+        response = client.query(**params)
+
+        appointments = [Appointment.from_item(item) for item in response['Items']]
+        last_key = response.get('LastEvaluatedKey')
+        start_key = decode_item(last_key) if last_key else None
+        remaining -= len(appointments)
+        yield appointments, start_key
+
+        if not start_key or remaining <= 0:
+            return
@@ -0,0 +1,139 @@
+import importlib.util
+import io
+import logging
+import multiprocessing
+import os
+import posixpath
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from aws.clients import get_client
+
+logger = logging.getLogger(__name__)
+
+# Derivative widths in pixels; images are never upscaled
+SIZES = (('thumb', 320), ('medium', 1024))
+# File extension, Pillow format, content type, encoder options
+FORMATS = (
+    ('webp', 'WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    ('jpg', 'JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+IMAGE_EXTENSIONS = frozenset(['.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp'])
+DERIVATIVE_PREFIX = 'derivatives/'
+
+# Pillow is only imported inside the worker processes; without it
+# derivatives are skipped
+PILLOW_AVAILABLE = importlib.util.find_spec('PIL') is not None
+
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', str(min(os.cpu_count() or 1, 4))))
+
+
+def is_image_key(key):
+    return posixpath.splitext(key)[1].lower() in IMAGE_EXTENSIONS
+
+
+def derivative_keys(key):
+    """Map 'thumb_webp', 'medium_jpg', ... to the S3 key of each derivative."""
+    stem = posixpath.splitext(posixpath.basename(key))[0]
+    return {
+        f"{size}_{ext}": f"{DERIVATIVE_PREFIX}{stem}-{size}.{ext}"
+        for size, _ in SIZES
+        for ext, _, _, _ in FORMATS
+    }
+
+
+def render_derivatives(data):
+    """Resize and re-encode one image. Runs in a worker process.
+
+    Returns {name: (bytes, content_type)} keyed like derivative_keys.
+    """
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as original:
+        original.load()
+        image = original.convert('RGB')
+
+    results = {}
+    for size, width in SIZES:
+        resized = image.copy()
+        resized.thumbnail((width, width * 4))
+        for ext, image_format, content_type, options in FORMATS:
+            buffer = io.BytesIO()
+            resized.save(buffer, image_format, **options)
+            results[f"{size}_{ext}"] = (buffer.getvalue(), content_type)
+    return results
+
+
+class DerivativePipeline:
+    """Generates image derivatives off the request thread.
+
+    S3 downloads and uploads run on a small thread pool; decoding and
+    encoding run in a spawn-based process pool so CPU work neither holds the
+    GIL nor inherits the server's threads through fork. Pools are created
+    on first use.
+    """
+
+    def __init__(self, workers=IMAGE_WORKERS, region=None):
+        self.workers = workers
+        self.region = region
+        self._lock = threading.Lock()
+        self._processes = None
+        self._threads = None
+
+    @property
+    def enabled(self):
+        return PILLOW_AVAILABLE
+
+    def _pools(self):
+        with self._lock:
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                self._threads = ThreadPoolExecutor(
+                    max_workers=self.workers * 2, thread_name_prefix='derivatives'
+                )
+            return self._processes, self._threads
+
+    def submit(self, bucket_name, key):
+        """Queue derivative generation for an uploaded object."""
+        processes, threads = self._pools()
+        return threads.submit(self._process, processes, bucket_name, key)
+
+    def _process(self, processes, bucket_name, key, attempts=3):
+        s3_client = get_client('s3', self.region)
+        try:
+            # The browser may still be finishing the upload
+            for attempt in range(attempts):
+                try:
+                    data = s3_client.get_object(Bucket=bucket_name, Key=key)['Body'].read()
+                    break
+                except s3_client.exceptions.NoSuchKey:
+                    if attempt == attempts - 1:
+                        raise
+                    time.sleep(2 ** attempt)
+
+            rendered = processes.submit(render_derivatives, data).result()
+            keys = derivative_keys(key)
+            for name, (body, content_type) in rendered.items():
+                s3_client.put_object(
+                    Bucket=bucket_name,
+                    Key=keys[name],
+                    Body=body,
+                    ContentType=content_type,
+                    CacheControl='public, max-age=31536000, immutable'
+                )
+            logger.info(f"Stored {len(rendered)} derivatives for '{key}'.")
+            return keys
+        except Exception as e:
+            logger.error(f"Error generating derivatives for '{key}': {str(e)}")
+            return None
+
+    def shutdown(self):
+        with self._lock:
+            if self._processes is not None:
+                self._threads.shutdown(wait=True)
+                self._processes.shutdown(wait=True)
+                self._processes = self._threads = None
@@ -1,11 +1,11 @@
-import boto3
 import json
+from aws.clients import get_client
 
 def create_lambda_function(function_name, role_arn, handler, zip_file_path, runtime="python3.9"):
     """
     Create a Lambda function programmatically.
     """
-    client = boto3.client('lambda')
+    client = get_client('lambda')
 
     with open(zip_file_path, 'rb') as zip_file:
         zipped_code = zip_file.read()
@@ -16,7 +16,7 @@ def create_lambda_function(function_name, role_arn, handler, zip_file_path, runt
             Runtime=runtime,
             Role=role_arn,
             Handler=handler,
-            Code={'./validate_appointment.zip': './validate_appointment.py'},
+            Code={'ZipFile': zipped_code},
             Description="Validates appointment data",
             Timeout=10,  # seconds
             MemorySize=128,
@@ -26,11 +26,15 @@ def create_lambda_function(function_name, role_arn, handler, zip_file_path, runt
     except Exception as e:
         return {"Error": str(e)}
 
-def invoke_lambda_function(function_name, payload):
+class LambdaFunctionError(Exception):
+    """Raised when the invoked function itself failed (unhandled error or timeout)."""
+
+
+def invoke_lambda_function(function_name, payload, region=None):
     """
     Invoke a Lambda function programmatically.
     """
-    client = boto3.client('lambda')
+    client = get_client('lambda', region)
 
     response = client.invoke(
         FunctionName=function_name,
@@ -38,4 +42,8 @@ def invoke_lambda_function(function_name, payload):
         Payload=json.dumps(payload),
     )
     response_payload = json.loads(response['Payload'].read())
+    if 'FunctionError' in response:
+        raise LambdaFunctionError(
+            f"{function_name} failed: {response_payload.get('errorMessage', response['FunctionError'])}"
+        )
     return response_payload
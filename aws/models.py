@@ -0,0 +1,134 @@
+import json
+from dataclasses import dataclass
+from decimal import Decimal
+
+try:
+    import orjson
+except ImportError:  # the standard library encoder is used instead
+    orjson = None
+
+
+def encode_value(value):
+    """Python value -> DynamoDB attribute value, without boto3's TypeSerializer."""
+    if isinstance(value, str):
+        return {'S': value}
+    if isinstance(value, bool):
+        return {'BOOL': value}
+    if isinstance(value, (int, float, Decimal)):
+        return {'N': str(value)}
+    if isinstance(value, dict):
+        return {'M': {k: encode_value(v) for k, v in value.items()}}
+    if isinstance(value, (list, tuple)):
+        return {'L': [encode_value(v) for v in value]}
+    if value is None:
+        return {'NULL': True}
+    raise TypeError(f"Unsupported DynamoDB value type: {type(value).__name__}")
+
+
+def decode_value(value):
+    """DynamoDB attribute value -> Python value. Numbers become int or float."""
+    (tag, raw), = value.items()
+    if tag == 'S':
+        return raw
+    if tag == 'N':
+        try:
+            return int(raw)
+        except ValueError:
+            return float(raw)
+    if tag == 'M':
+        return {k: decode_value(v) for k, v in raw.items()}
+    if tag == 'L':
+        return [decode_value(v) for v in raw]
+    if tag == 'BOOL':
+        return raw
+    if tag == 'NULL':
+        return None
+    raise TypeError(f"Unsupported DynamoDB type: {tag}")
+
+
+def encode_item(item):
+    return {k: encode_value(v) for k, v in item.items()}
+
+
+def decode_item(item):
+    return {k: decode_value(v) for k, v in item.items()}
+
+
+def dumps(value):
+    """Compact JSON text, through orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(value).decode()
+    return json.dumps(value, separators=(',', ':'))
+
+
+# Field name -> DynamoDB attribute name, in the order records are written
+ATTRIBUTES = (
+    ('appointment_id', 'appointment_id'),
+    ('user_email', 'userEmail'),
+    ('car_make', 'carMake'),
+    ('car_model', 'carModel'),
+    ('car_year', 'carYear'),
+    ('service_type', 'serviceType'),
+    ('date', 'date'),
+    ('time', 'time'),
+    ('description', 'description'),
+    ('image_url', 'imageUrl'),
+    ('status', 'status'),
+    ('created_at', 'createdAt'),
+    ('bay', 'bay'),
+    ('image_derivatives', 'imageDerivatives'),
+)
+FIELD_NAMES = {attribute: field for field, attribute in ATTRIBUTES}
+
+
+@dataclass(slots=True)
+class Appointment:
+    """One appointment row.
+
+    Every field is optional so projected query results (?fields=...) fit the
+    same type; unset (None) fields are left out of items and JSON.
+    """
+    appointment_id: str = None
+    user_email: str = None
+    car_make: str = None
+    car_model: str = None
+    car_year: str = None
+    service_type: str = None
+    date: str = None
+    time: str = None
+    description: str = None
+    image_url: str = None
+    status: str = None
+    created_at: str = None
+    bay: int = None
+    image_derivatives: dict = None
+
+    @classmethod
+    def from_item(cls, item):
+        """Build from a low-level DynamoDB item; unknown attributes are ignored."""
+        fields = {}
+        for name, value in item.items():
+            field = FIELD_NAMES.get(name)
+            if field is not None:
+                # Nearly every attribute is a string; skip the generic decoder
+                text = value.get('S')
+                fields[field] = text if text is not None else decode_value(value)
+        return cls(**fields)
+
+    def to_item(self):
+        """Low-level DynamoDB item for put_item and transactions."""
+        item = {}
+        for field, attribute in ATTRIBUTES:
+            value = getattr(self, field)
+            if value is not None:
+                item[attribute] = encode_value(value)
+        return item
+
+    def to_dict(self):
+        """JSON-ready dict keyed by the attribute names the API exposes."""
+        data = {}
+        for field, attribute in ATTRIBUTES:
+            value = getattr(self, field)
+            if value is not None:
+                data[attribute] = value
+        return data
@@ -0,0 +1,45 @@
+import argparse
+import os
+import sys
+import zipfile
+
+AWS_DIR = os.path.dirname(os.path.abspath(__file__))
+# The handler imports rules.py from the bundle root when aws.rules is absent
+FILES = ('validate_appointment.py', 'rules.py')
+DEFAULT_OUTPUT = os.path.join(AWS_DIR, 'validate_appointment.zip')
+
+
+def build(output=DEFAULT_OUTPUT):
+    """Zip the validation Lambda handler with the booking rules it imports.
+
+    Entries get a fixed timestamp and mode, so rebuilding unchanged sources
+    produces a byte-identical bundle.
+    """
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as bundle:
+        for name in FILES:
+            with open(os.path.join(AWS_DIR, name), 'rb') as f:
+                source = f.read()
+            info = zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0))
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            bundle.writestr(info, source)
+    return output
+
+
+def main(argv=None):
+    """Rebuild the validation Lambda bundle.
+
+    Usage: python -m aws.package_validator [--output aws/validate_appointment.zip]
+    Run after changing validate_appointment.py or rules.py, then deploy the zip.
+    """
+    parser = argparse.ArgumentParser(
+        description='Build the validation Lambda zip from validate_appointment.py and rules.py.'
+    )
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    args = parser.parse_args(argv)
+    print(f"Wrote {build(args.output)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,57 @@
+import argparse
+import sys
+
+from aws.bootstrap import resolve_config
+from aws.dynamodb_utils import DEFAULT_CAPACITY, TableCapacity
+from aws.s3_utils import get_s3_client, upload_car_image
+
+
+def main(argv=None):
+    """Create or verify the app's AWS resources.
+
+    Usage: python -m aws.provision [--upload-sample test_images/banner.jpeg]
+    """
+    parser = argparse.ArgumentParser(
+        description='Create or verify the S3 bucket, Cognito user pool and '
+                    'app client, and DynamoDB table used by the app.'
+    )
+    parser.add_argument('--region', default='us-east-1')
+    parser.add_argument('--bucket', default='autocare-images1')
+    parser.add_argument('--user-pool', default='AutoCareUserPool')
+    parser.add_argument('--table', default='Appointments')
+    parser.add_argument('--billing-mode', choices=('PAY_PER_REQUEST', 'PROVISIONED'),
+                        default=DEFAULT_CAPACITY.billing_mode)
+    parser.add_argument('--read-capacity', type=int, default=DEFAULT_CAPACITY.read_capacity,
+                        help='provisioned (or minimum autoscaled) read units')
+    parser.add_argument('--write-capacity', type=int, default=DEFAULT_CAPACITY.write_capacity,
+                        help='provisioned (or minimum autoscaled) write units')
+    parser.add_argument('--autoscale-max', type=int, default=DEFAULT_CAPACITY.autoscaling_max,
+                        help='enable autoscaling of PROVISIONED capacity up to this many units')
+    parser.add_argument('--autoscale-target', type=float,
+                        default=DEFAULT_CAPACITY.autoscaling_target,
+                        help='target utilization percentage for autoscaling')
+    parser.add_argument('--upload-sample', metavar='PATH',
+                        help='upload an image to the bucket as car.jpg')
+    args = parser.parse_args(argv)
+
+    capacity = TableCapacity(args.billing_mode, args.read_capacity, args.write_capacity,
+                             args.autoscale_max, args.autoscale_target)
+    config = resolve_config(args.region, args.bucket, args.user_pool, args.table, capacity)
+    if config is None:
+        print("Provisioning failed")
+        return 1
+
+    print(f"Bucket: {config.bucket_name}")
+    print(f"User Pool ID: {config.user_pool_id}")
+    print(f"App Client ID: {config.client_id}")
+    print(f"Table: {config.appointments_table}")
+
+    if args.upload_sample:
+        s3_client = get_s3_client(args.region)
+        if not upload_car_image(s3_client, config.bucket_name, 'car.jpg', args.upload_sample):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
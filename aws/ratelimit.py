@@ -0,0 +1,190 @@
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+
+from aws.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# '0' turns rate limiting off, e.g. for load tests from a single address
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', '1') != '0'
+# redis://host:port/db to share buckets between workers
+RATE_LIMIT_URL = os.getenv('RATE_LIMIT_URL')
+# Buckets kept by the in-process backend; idle ones are evicted first
+RATE_LIMIT_SIZE = int(os.getenv('RATE_LIMIT_SIZE', '100000'))
+# Reverse proxies in front of the app whose X-Forwarded-For can be trusted
+RATE_LIMIT_PROXIES = int(os.getenv('RATE_LIMIT_PROXIES', '0'))
+# Worker processes serving the app (exported by gunicorn.conf.py); without
+# RATE_LIMIT_URL each one holds its own buckets
+RATE_LIMIT_WORKERS = int(os.getenv('WEB_CONCURRENCY', '1'))
+
+ADMITTED = REGISTRY.counter(
+    'ratelimit_admitted', 'Requests admitted by the rate limiter', labels=('route',)
+)
+REJECTED = REGISTRY.counter(
+    'ratelimit_rejected', 'Requests rejected by the rate limiter, by the limit that was hit',
+    labels=('route', 'scope')
+)
+
+
+@dataclass(frozen=True)
+class Limit:
+    """A token bucket: burst requests at once, refilled at rate per second."""
+    scope: str
+    burst: int
+    rate: float
+
+
+# Checked in order, so a client over its own ip/email limit is turned away
+# before it can spend tokens of the route-wide bucket legitimate users share.
+# Route limits are for the whole deployment and stay under Cognito's default
+# quotas for sign-up (50 rps) and authentication (120 rps) calls; without a
+# shared backend they are split between workers (see make_limiter), while
+# ip and email limits then apply per worker.
+LIMITS = {
+    'signup': (Limit('ip', 5, 1 / 60), Limit('email', 3, 1 / 60), Limit('route', 40, 20)),
+    'login': (Limit('ip', 20, 1), Limit('email', 5, 5 / 60), Limit('route', 100, 50)),
+    'refresh': (Limit('ip', 30, 0.5), Limit('route', 100, 50)),
+}
+
+
+class MemoryBuckets:
+    """Token buckets held in this process, least recently used evicted."""
+    blocking = False
+
+    def __init__(self, maxsize=RATE_LIMIT_SIZE):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+
+    def take(self, key, burst, rate):
+        """Take one token; returns 0 if admitted, else seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                wait = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                wait = (1 - tokens) / rate
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+# Refill and take in one atomic step; the key expires once the bucket
+# would be full again, so idle clients cost nothing
+_TAKE_SCRIPT = """
+local burst = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil((burst - tokens) / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBuckets:
+    """Token buckets shared by every worker through a Redis-compatible client.
+
+    Only eval is used, so any client or fake that runs Lua scripts can
+    stand in; MemoryBuckets is the local equivalent.
+    """
+    blocking = True
+
+    def __init__(self, client, prefix='ratelimit:'):
+        self.client = client
+        self.prefix = prefix
+
+    def take(self, key, burst, rate):
+        wait = self.client.eval(_TAKE_SCRIPT, 1, self.prefix + key, burst, rate, time.time())
+        return float(wait)
+
+
+class RateLimiter:
+    """Applies the LIMITS of a route to a request's IP address and email."""
+
+    def __init__(self, backend, limits=LIMITS):
+        self.backend = backend
+        self.limits = limits
+
+    @property
+    def blocking(self):
+        return self.backend.blocking
+
+    def check(self, route, ip=None, email=None):
+        """Take a token from each bucket of route.
+
+        Returns 0 when the request is admitted, otherwise the whole number
+        of seconds to send as Retry-After. Limits whose key is unknown
+        (no email in the body) are skipped. If the backend fails the request
+        is admitted rather than locking every user out.
+        """
+        keys = {'ip': ip, 'email': email.strip().lower() if email else None, 'route': route}
+        for limit in self.limits.get(route, ()):
+            if not keys[limit.scope]:
+                continue
+            try:
+                wait = self.backend.take(f'{route}:{limit.scope}:{keys[limit.scope]}',
+                                         limit.burst, limit.rate)
+            except Exception as e:
+                logger.warning(f"Rate limiter unavailable, admitting request: {str(e)}")
+                break
+            if wait > 0:
+                REJECTED.inc(route=route, scope=limit.scope)
+                return max(1, math.ceil(wait))
+        ADMITTED.inc(route=route)
+        return 0
+
+
+def client_ip(remote_addr, forwarded_for=None, proxies=RATE_LIMIT_PROXIES):
+    """The client address, taken from X-Forwarded-For behind trusted proxies."""
+    if proxies and forwarded_for:
+        hops = [hop.strip() for hop in forwarded_for.split(',') if hop.strip()]
+        if len(hops) >= proxies:
+            return hops[-proxies]
+    return remote_addr
+
+
+def split_route_limits(limits, workers):
+    """Give each of workers processes an equal share of every route-wide limit."""
+    if workers <= 1:
+        return limits
+    return {
+        route: tuple(
+            replace(limit, burst=max(1, limit.burst // workers), rate=limit.rate / workers)
+            if limit.scope == 'route' else limit
+            for limit in route_limits
+        )
+        for route, route_limits in limits.items()
+    }
+
+
+def make_limiter(url=RATE_LIMIT_URL, enabled=RATE_LIMIT_ENABLED, workers=RATE_LIMIT_WORKERS):
+    """Return a limiter over Redis when url is set (requires redis-py), else in memory.
+
+    In-memory buckets only see this process's requests, so route-wide
+    limits are divided by the number of workers to keep the total in bounds.
+    """
+    limits = LIMITS if enabled else {}
+    if url:
+        import redis
+        return RateLimiter(RedisBuckets(redis.Redis.from_url(url)), limits)
+    return RateLimiter(MemoryBuckets(), split_route_limits(limits, workers))
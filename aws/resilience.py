@@ -0,0 +1,177 @@
+import os
+import threading
+import time
+
+from botocore.exceptions import ClientError, ConnectionError, HTTPClientError, ReadTimeoutError
+
+from aws.metrics import REGISTRY
+
+# Consecutive failed calls that open a dependency's circuit
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5'))
+# Seconds an open circuit fails fast before letting one probe call through
+CIRCUIT_RESET_TIMEOUT = float(os.getenv('CIRCUIT_RESET_TIMEOUT', '30'))
+# Retry-After for throttling and transport errors
+DEFAULT_RETRY_AFTER = 2
+
+# Error codes AWS services use for throttling
+THROTTLING_CODES = frozenset([
+    'ProvisionedThroughputExceededException', 'ThrottlingException', 'Throttling',
+    'ThrottledException', 'RequestThrottled', 'RequestThrottledException',
+    'TooManyRequestsException', 'RequestLimitExceeded', 'LimitExceededException',
+    'SlowDown',
+])
+
+CIRCUIT_STATE = REGISTRY.gauge(
+    'circuit_state', 'Circuit breaker state per AWS dependency (0 closed, 1 open, 2 half-open)',
+    labels=('dependency',)
+)
+CIRCUIT_OPENED = REGISTRY.counter(
+    'circuit_opened', 'Times a dependency circuit opened', labels=('dependency',)
+)
+CIRCUIT_REJECTED = REGISTRY.counter(
+    'circuit_rejected', 'Calls failed fast because the circuit was open', labels=('dependency',)
+)
+AWS_THROTTLED = REGISTRY.counter(
+    'aws_throttled', 'AWS calls that still failed with a throttling error after retries',
+    labels=('service', 'operation')
+)
+DEGRADED_RESPONSES = REGISTRY.counter(
+    'degraded_responses', 'Responses served from stale data while a dependency was down',
+    labels=('route',)
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open."""
+
+    def __init__(self, dependency, retry_after):
+        super().__init__(f"{dependency} is unavailable; retry in {retry_after:.0f}s")
+        self.dependency = dependency
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one AWS dependency.
+
+    Closed: calls pass. After failure_threshold failures in a row the
+    circuit opens and calls fail fast with CircuitOpenError. Once
+    reset_timeout has passed a single probe call is let through (half-open);
+    its outcome closes or re-opens the circuit.
+    """
+    CLOSED, OPEN, HALF_OPEN = 0, 1, 2
+
+    def __init__(self, name, failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout=CIRCUIT_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def _set_state(self, state):
+        self.state = state
+        CIRCUIT_STATE.set(state, dependency=self.name)
+
+    def retry_after(self):
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.retry_after() <= 0:
+                # Let one probe through; if it never reports back another
+                # probe is allowed after reset_timeout
+                self.opened_at = time.monotonic()
+                self._set_state(self.HALF_OPEN)
+                return
+        CIRCUIT_REJECTED.inc(dependency=self.name)
+        raise CircuitOpenError(self.name, self.retry_after() or self.reset_timeout)
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            if self.state != self.CLOSED:
+                self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (
+                self.state == self.CLOSED and self.failures >= self.failure_threshold
+            ):
+                self.opened_at = time.monotonic()
+                self._set_state(self.OPEN)
+                CIRCUIT_OPENED.inc(dependency=self.name)
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(dependency):
+    breaker = _breakers.get(dependency)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(dependency, CircuitBreaker(dependency))
+    return breaker
+
+
+def is_unavailable(error):
+    """True when an error means the dependency is down or throttling us,
+    as opposed to a problem with the request itself."""
+    # ConnectionError covers unreachable endpoints and connect timeouts,
+    # HTTPClientError dropped connections and read timeouts
+    if isinstance(error, (CircuitOpenError, ConnectionError, HTTPClientError, ReadTimeoutError)):
+        return True
+    if isinstance(error, ClientError):
+        code = error.response.get('Error', {}).get('Code')
+        status = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode', 0)
+        return code in THROTTLING_CODES or status >= 500
+    return False
+
+
+def retry_after(error):
+    """Seconds a client should wait before retrying after error."""
+    if isinstance(error, CircuitOpenError):
+        return max(1, round(error.retry_after))
+    return DEFAULT_RETRY_AFTER
+
+
+# botocore event hooks; botocore's own retries (adaptive mode) run between
+# before-call and after-call, so the breaker only sees final outcomes
+def _before_call(model, context, **kwargs):
+    breaker = get_breaker(model.service_model.service_id.hyphenize())
+    breaker.before_call()
+    context['circuit_breaker'] = breaker
+
+
+def _after_call(http_response, parsed, model, context, **kwargs):
+    breaker = context.get('circuit_breaker')
+    if breaker is None:
+        return
+    code = parsed.get('Error', {}).get('Code') if http_response.status_code >= 300 else None
+    if code in THROTTLING_CODES:
+        AWS_THROTTLED.inc(service=breaker.name, operation=model.name)
+        breaker.record_failure()
+    elif http_response.status_code >= 500:
+        breaker.record_failure()
+    else:
+        # 4xx such as ConditionalCheckFailed means the service is healthy
+        breaker.record_success()
+
+
+def _after_call_error(exception, context, **kwargs):
+    breaker = context.get('circuit_breaker')
+    if breaker is not None:
+        breaker.record_failure()
+
+
+def install(events):
+    """Register circuit breakers on a botocore session or event emitter."""
+    events.register('before-call', _before_call)
+    events.register('after-call', _after_call)
+    events.register('after-call-error', _after_call_error)
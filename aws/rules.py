@@ -0,0 +1,210 @@
+# Appointment booking rules shared by the API and the validation Lambda.
+# Kept free of boto3 imports so it can be shipped inside the Lambda bundle.
+import re
+from datetime import date, datetime
+
+# Bookable start times and how long each service takes, in minutes
+SLOTS = ('09:00', '10:00', '11:00', '13:00', '14:00', '15:00', '16:00')
+SERVICE_DURATIONS = {
+    'oil-change': 60,
+    'tire-rotation': 45,
+    'brake-service': 120,
+    'general-inspection': 60,
+    'repair': 180,
+}
+CLOSING_TIME = '17:00'
+
+SERVICES = tuple(SERVICE_DURATIONS)
+VALID_SLOTS = frozenset(SLOTS)
+VALID_SERVICES = frozenset(SERVICE_DURATIONS)
+
+
+def _minutes(value):
+    hours, minutes = value.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+SLOT_MINUTES = {slot: _minutes(slot) for slot in SLOTS}
+CLOSING_MINUTES = _minutes(CLOSING_TIME)
+
+# (slot, service) pairs that finish by closing time
+FITS_BEFORE_CLOSING = frozenset(
+    (slot, service)
+    for slot in SLOTS
+    for service, duration in SERVICE_DURATIONS.items()
+    if SLOT_MINUTES[slot] + duration <= CLOSING_MINUTES
+)
+
+# Per service, a bitmask with bit i set when SLOTS[i] finishes by closing time
+SERVICE_SLOT_MASKS = {
+    service: sum(1 << index for index, slot in enumerate(SLOTS)
+                 if (slot, service) in FITS_BEFORE_CLOSING)
+    for service in SERVICES
+}
+
+# Result codes, in the order the rules are checked
+OK = 'ok'
+INVALID_DATE = 'invalid_date'
+INVALID_TIME = 'invalid_time'
+INVALID_SERVICE = 'invalid_service'
+PAST_DATE = 'past_date'
+WEEKEND = 'weekend'
+EXCEEDS_HOURS = 'exceeds_business_hours'
+CODES = (OK, INVALID_DATE, INVALID_TIME, INVALID_SERVICE, PAST_DATE, WEEKEND, EXCEEDS_HOURS)
+
+MESSAGES = {
+    OK: 'Appointment validation successful',
+    INVALID_DATE: 'Invalid appointment date',
+    INVALID_TIME: 'Invalid appointment time',
+    INVALID_SERVICE: 'Invalid service type',
+    PAST_DATE: 'Appointment date cannot be in the past',
+    WEEKEND: 'Appointments cannot be scheduled on weekends',
+    EXCEEDS_HOURS: 'Service duration exceeds business hours',
+}
+
+
+# The date string is stored as-is and keys slot locks and the availability
+# index, so only the exact YYYY-MM-DD form is accepted: ISO week or ordinal
+# dates naming the same day would otherwise book the same slot twice.
+# Year 0000 parses in NumPy but not as a date, so it is excluded up front.
+_DATE_FORMAT = re.compile(r'(?!0000)[0-9]{4}-[0-9]{2}-[0-9]{2}')
+
+
+def _parse_date(value):
+    if not isinstance(value, str) or not _DATE_FORMAT.fullmatch(value):
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def check_appointment(appointment_date, appointment_time, service_type, now=None):
+    """Return the first rule code an appointment violates, or OK."""
+    day = _parse_date(appointment_date)
+    if day is None:
+        return INVALID_DATE
+    if type(appointment_time) is not str or appointment_time not in VALID_SLOTS:
+        return INVALID_TIME
+    if type(service_type) is not str or service_type not in VALID_SERVICES:
+        return INVALID_SERVICE
+
+    now = now or datetime.now()
+    today = now.date()
+    if day < today or (day == today and SLOT_MINUTES[appointment_time] < now.hour * 60 + now.minute):
+        return PAST_DATE
+    if day.weekday() >= 5:
+        return WEEKEND
+    if (appointment_time, service_type) not in FITS_BEFORE_CLOSING:
+        return EXCEEDS_HOURS
+    return OK
+
+
+def validate_appointment(appointment, now=None):
+    """Validate one appointment dict in the {'isValid', 'message'} format."""
+    code = check_appointment(
+        appointment.get('date'), appointment.get('time'),
+        appointment.get('serviceType'), now
+    )
+    return {'isValid': code == OK, 'code': code, 'message': MESSAGES[code]}
+
+
+_numpy = None
+
+
+def _load_numpy():
+    """Import NumPy on first use; only batch validation needs it."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:  # validate_batch parses dates one by one instead
+            _numpy = False
+    return _numpy or None
+
+
+# Internal day code for "today", where the slot time decides whether it is
+# past before the weekday is looked at, as in check_appointment
+_TODAY = 'today'
+
+
+def _day_codes(day_strings, now):
+    """Map each distinct date string to OK, _TODAY, PAST_DATE, WEEKEND or INVALID_DATE."""
+    today = now.date()
+    candidates = [d for d in day_strings if _DATE_FORMAT.fullmatch(d)]
+    codes = dict.fromkeys(day_strings, INVALID_DATE)
+
+    np = _load_numpy()
+    if np is None:
+        for value in candidates:
+            day = _parse_date(value)
+            if day is None:
+                continue
+            if day == today:
+                codes[value] = _TODAY
+            elif day < today:
+                codes[value] = PAST_DATE
+            elif day.weekday() >= 5:
+                codes[value] = WEEKEND
+            else:
+                codes[value] = OK
+        return codes
+
+    days = np.full(len(candidates), np.datetime64('NaT'), dtype='datetime64[D]')
+    try:
+        days[:] = np.array(candidates, dtype='datetime64[D]')
+    except ValueError:
+        # At least one malformed date; parse one by one to find which
+        for index, value in enumerate(candidates):
+            try:
+                days[index] = np.datetime64(value, 'D')
+            except ValueError:
+                pass
+
+    today64 = np.datetime64(today, 'D')
+    # 1970-01-01 was a Thursday, so shift by 3 to get Monday == 0
+    weekdays = (days.astype(np.int64) + 3) % 7
+    day_codes = np.select(
+        [np.isnat(days), days == today64, days < today64, weekdays >= 5],
+        [INVALID_DATE, _TODAY, PAST_DATE, WEEKEND],
+        default=OK,
+    )
+    codes.update(zip(candidates, day_codes.tolist()))
+    return codes
+
+
+def validate_batch(appointments, now=None):
+    """Return one rule code per appointment dict, in input order.
+
+    Bulk imports repeat a small set of dates, so the date, past and weekday
+    rules are evaluated once per distinct date (as a datetime64 array when
+    NumPy is installed) and each row then only costs a few set and dict
+    lookups. Produces the same codes as check_appointment.
+    """
+    now = now or datetime.now()
+    now_minutes = now.hour * 60 + now.minute
+    today_is_weekend = now.date().weekday() >= 5
+    rows = [(a.get('date'), a.get('time'), a.get('serviceType')) for a in appointments]
+    day_codes = _day_codes({d for d, _, _ in rows if type(d) is str}, now)
+
+    codes = []
+    for appointment_date, appointment_time, service_type in rows:
+        day_code = day_codes[appointment_date] if type(appointment_date) is str else INVALID_DATE
+        if day_code == INVALID_DATE:
+            codes.append(INVALID_DATE)
+        elif type(appointment_time) is not str or appointment_time not in VALID_SLOTS:
+            codes.append(INVALID_TIME)
+        elif type(service_type) is not str or service_type not in VALID_SERVICES:
+            codes.append(INVALID_SERVICE)
+        elif day_code == PAST_DATE or (
+            day_code == _TODAY and SLOT_MINUTES[appointment_time] < now_minutes
+        ):
+            codes.append(PAST_DATE)
+        elif day_code == WEEKEND or (day_code == _TODAY and today_is_weekend):
+            codes.append(WEEKEND)
+        elif (appointment_time, service_type) not in FITS_BEFORE_CLOSING:
+            codes.append(EXCEEDS_HOURS)
+        else:
+            codes.append(OK)
+    return codes
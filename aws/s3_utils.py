@@ -1,46 +1,66 @@
-import boto3
+import logging
+import math
+import os
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError
+from aws.clients import get_client
 
-def get_s3_client(region=None):
-    """Initialize S3 client with optional region."""
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+# S3 requires every part except the last to be at least 5 MB, and allows
+# at most 10,000 parts per upload
+MIN_PART_SIZE = 5 * MB
+MAX_PARTS = 10000
+MULTIPART_PART_SIZE = int(os.getenv('S3_MULTIPART_PART_SIZE', str(8 * MB)))
+
+# Settings for server-side uploads through upload_file
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=int(os.getenv('S3_MULTIPART_THRESHOLD', str(8 * MB))),
+    multipart_chunksize=MULTIPART_PART_SIZE,
+    max_concurrency=int(os.getenv('S3_MAX_CONCURRENCY', '10')),
+    use_threads=True,
+)
+
+def get_s3_client(region=None, verify_credentials=False):
+    """Return the shared S3 client, optionally checking credentials first."""
     try:
-        if region is None:
-            s3_client = boto3.client('s3')
-        else:
-            s3_client = boto3.client('s3', region_name=region)
+        s3_client = get_client('s3', region)
         
-        # Test credentials by making a simple API call
-        s3_client.list_buckets()
+        if verify_credentials:
+            # Test credentials by making a simple API call
+            s3_client.list_buckets()
         return s3_client
     except ClientError as e:
         error_code = e.response.get('Error', {}).get('Code')
         if error_code == 'InvalidAccessKeyId':
-            print("Error: Invalid AWS access key. Please check your AWS credentials.")
+            logger.error("Invalid AWS access key. Please check your AWS credentials.")
         elif error_code == 'SignatureDoesNotMatch':
-            print("Error: Invalid AWS secret key. Please check your AWS credentials.")
+            logger.error("Invalid AWS secret key. Please check your AWS credentials.")
         elif error_code == 'AccessDenied':
-            print("Error: Access denied. Please check your IAM permissions.")
+            logger.error("Access denied. Please check your IAM permissions.")
         else:
-            print(f"AWS Authentication Error: {e.response['Error']['Message']}")
+            logger.error(f"AWS Authentication Error: {e.response['Error']['Message']}")
         return None
     except Exception as e:
-        print(f"Error initializing S3 client: {str(e)}")
-        print("Please ensure AWS credentials are properly configured:")
-        print("1. Check ~/.aws/credentials file")
-        print("2. Check AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY environment variables")
-        print("3. Verify IAM user has appropriate S3 permissions")
+        logger.error(
+            f"Error initializing S3 client: {str(e)}. Please ensure AWS credentials are "
+            "configured in ~/.aws/credentials or AWS_ACCESS_KEY_ID/AWS_SECRET_ACCESS_KEY "
+            "and that the IAM user has S3 permissions."
+        )
         return None
 
 def create_bucket(s3_client, bucket_name, region=None):
     """Create an S3 bucket if it doesn't exist."""
     if s3_client is None:
-        print("Error: S3 client not initialized. Please check AWS credentials and permissions.")
+        logger.error("S3 client not initialized. Please check AWS credentials and permissions.")
         return None
 
     try:
         # Check if the bucket already exists
         s3_client.head_bucket(Bucket=bucket_name)
-        print(f"Bucket '{bucket_name}' already exists.")
+        logger.info(f"Bucket '{bucket_name}' already exists.")
         return bucket_name
     except ClientError as e:
         error_code = e.response.get('Error', {}).get('Code')
@@ -56,77 +76,137 @@ def create_bucket(s3_client, bucket_name, region=None):
                         Bucket=bucket_name,
                         CreateBucketConfiguration=location
                     )
-                print(f"Bucket '{bucket_name}' created successfully.")
+                logger.info(f"Bucket '{bucket_name}' created successfully.")
                 return bucket_name
             except ClientError as create_error:
                 error = create_error.response.get('Error', {})
                 if error.get('Code') == 'AccessDenied':
-                    print("Error: Access denied. Please check your IAM permissions:")
-                    print("- s3:CreateBucket")
-                    print("- s3:PutBucketPolicy")
-                    print("- s3:ListAllMyBuckets")
+                    logger.error("Access denied. Required IAM permissions: "
+                                 "s3:CreateBucket, s3:PutBucketPolicy, s3:ListAllMyBuckets")
                 elif error.get('Code') == 'InvalidBucketName':
-                    print("Error: Invalid bucket name. Bucket names must:")
-                    print("- Be between 3 and 63 characters long")
-                    print("- Contain only lowercase letters, numbers, dots, and hyphens")
-                    print("- Begin and end with a letter or number")
+                    logger.error("Invalid bucket name. Bucket names must be 3-63 characters "
+                                 "of lowercase letters, numbers, dots and hyphens, and begin "
+                                 "and end with a letter or number")
                 elif error.get('Code') == 'BucketAlreadyExists':
-                    print("Error: Bucket name already exists. Choose a different name.")
+                    logger.error("Bucket name already exists. Choose a different name.")
                 else:
-                    print(f"Error creating bucket: {error.get('Message', 'Unknown error')}")
+                    logger.error(f"Error creating bucket: {error.get('Message', 'Unknown error')}")
                 return None
         elif error_code == '403':  # Forbidden
-            print("Error: Access forbidden. Please check:")
-            print("1. AWS credentials are correct")
-            print("2. IAM user has the following permissions:")
-            print("   - s3:HeadBucket")
-            print("   - s3:CreateBucket")
-            print("   - s3:ListAllMyBuckets")
-            print(f"Error details: {error_message}")
+            logger.error(
+                "Access forbidden. Check the AWS credentials and that the IAM user has "
+                f"s3:HeadBucket, s3:CreateBucket and s3:ListAllMyBuckets: {error_message}"
+            )
             return None
         else:
-            print(f"Error checking bucket: {error_message}")
+            logger.error(f"Error checking bucket: {error_message}")
             return None
 
-def upload_car_image(s3_client, bucket_name, image_name, file_path):
-    """Upload a car image to the S3 bucket."""
+def upload_car_image(s3_client, bucket_name, image_name, file_path, transfer_config=None):
+    """Upload a car image to the S3 bucket.
+
+    Large files are sent as parallel multipart uploads according to
+    transfer_config (TRANSFER_CONFIG by default).
+    """
     if s3_client is None:
-        print("Error: S3 client not initialized. Please check AWS credentials and permissions.")
+        logger.error("S3 client not initialized. Please check AWS credentials and permissions.")
         return False
 
     try:
         # Remove any extra quotes from file path
         clean_path = file_path.strip('"\'')
-        s3_client.upload_file(clean_path, bucket_name, image_name)
-        print(f"File '{image_name}' uploaded to bucket '{bucket_name}' successfully.")
+        s3_client.upload_file(clean_path, bucket_name, image_name,
+                              Config=transfer_config or TRANSFER_CONFIG)
+        logger.info(f"File '{image_name}' uploaded to bucket '{bucket_name}' successfully.")
         return True
     except ClientError as e:
         error = e.response.get('Error', {})
         if error.get('Code') == 'AccessDenied':
-            print("Error: Access denied. Please check your IAM permissions:")
-            print("- s3:PutObject")
-            print("- s3:PutObjectAcl")
+            logger.error("Access denied. Required IAM permissions: s3:PutObject, s3:PutObjectAcl")
         else:
-            print(f"Error uploading file: {error.get('Message', 'Unknown error')}")
+            logger.error(f"Error uploading file: {error.get('Message', 'Unknown error')}")
         return False
     except FileNotFoundError:
-        print(f"Error: File not found at path: {clean_path}")
-        print("Please verify the file path is correct and the file exists.")
+        logger.error(f"File not found at path: {clean_path}")
         return False
 
-# Example usage with proper error handling
+def object_url(bucket_name, region, key):
+    """Public URL of an object in a virtual-hosted-style bucket."""
+    return f"https://{bucket_name}.s3.{region}.amazonaws.com/{key}"
+
+def presign_uploads(s3_client, bucket_name, region, files, expires_in=3600):
+    """Presign a put_object URL for each {'key', 'contentType'} in files.
+
+    Signing happens locally with the client's cached credentials, so this
+    makes no network calls however many files are requested.
+    """
+    uploads = []
+    for file in files:
+        url = s3_client.generate_presigned_url(
+            'put_object',
+            Params={
+                'Bucket': bucket_name,
+                'Key': file['key'],
+                'ContentType': file['contentType']
+            },
+            ExpiresIn=expires_in
+        )
+        uploads.append({
+            'uploadUrl': url,
+            'imageUrl': object_url(bucket_name, region, file['key'])
+        })
+    return uploads
+
+def plan_parts(file_size, part_size=None):
+    """Return (part_size, part_count) for a multipart upload of file_size bytes.
+
+    The part size is raised when needed to stay within MAX_PARTS.
+    """
+    part_size = max(part_size or MULTIPART_PART_SIZE, MIN_PART_SIZE)
+    part_size = max(part_size, math.ceil(file_size / MAX_PARTS))
+    return part_size, max(math.ceil(file_size / part_size), 1)
+
+def create_multipart_upload(s3_client, bucket_name, key, content_type):
+    """Start a multipart upload and return its UploadId."""
+    response = s3_client.create_multipart_upload(
+        Bucket=bucket_name,
+        Key=key,
+        ContentType=content_type
+    )
+    return response['UploadId']
 
-# Initialize with specific region
-region = 'us-east-1'  # Change this to your desired region
-s3_client = get_s3_client(region)
+def presign_upload_parts(s3_client, bucket_name, key, upload_id, part_numbers, expires_in=3600):
+    """Presign an upload_part URL for each part number, locally."""
+    return [
+        {
+            'partNumber': part_number,
+            'url': s3_client.generate_presigned_url(
+                'upload_part',
+                Params={
+                    'Bucket': bucket_name,
+                    'Key': key,
+                    'UploadId': upload_id,
+                    'PartNumber': part_number
+                },
+                ExpiresIn=expires_in
+            )
+        }
+        for part_number in part_numbers
+    ]
 
-if s3_client:  # Only proceed if client initialization was successful
-    # Create bucket
-    bucket_name = 'autocare-images1'
-    bucket = create_bucket(s3_client, bucket_name, region)
+def complete_multipart_upload(s3_client, bucket_name, key, upload_id, parts):
+    """Assemble uploaded parts, given as [{'partNumber', 'etag'}]."""
+    s3_client.complete_multipart_upload(
+        Bucket=bucket_name,
+        Key=key,
+        UploadId=upload_id,
+        MultipartUpload={
+            'Parts': [
+                {'PartNumber': part['partNumber'], 'ETag': part['etag']}
+                for part in sorted(parts, key=lambda part: part['partNumber'])
+            ]
+        }
+    )
 
-    # Upload file if bucket exists
-    if bucket:
-        image_name = 'car.jpg'
-        file_path = 'test_images/banner.jpeg'  # Use actual file path
-        upload_car_image(s3_client, bucket_name, image_name, file_path)
+def abort_multipart_upload(s3_client, bucket_name, key, upload_id):
+    s3_client.abort_multipart_upload(Bucket=bucket_name, Key=key, UploadId=upload_id)
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from aws.metrics import REGISTRY
+
+# redis://host:port/db to share sessions between workers
+SESSION_CACHE_URL = os.getenv('SESSION_CACHE_URL')
+# Sessions kept per process; the least recently refreshed are evicted. Logout
+# only clears the worker that served it, so without a shared cache this
+# defaults to 0 (no caching); set it for single-worker deployments
+SESSION_CACHE_SIZE = int(os.getenv('SESSION_CACHE_SIZE',
+                                   '10000' if SESSION_CACHE_URL else '0'))
+# A cached access token is only handed out with at least this many seconds left
+SESSION_REFRESH_MARGIN = int(os.getenv('SESSION_REFRESH_MARGIN', '300'))
+
+SESSION_LOOKUPS = REGISTRY.counter(
+    'session_cache_lookups', 'Token refreshes by whether the session cache answered them',
+    labels=('result',)
+)
+
+
+def _session_key(refresh_token):
+    # Refresh tokens are long-lived credentials; only their hash is kept
+    return hashlib.blake2b(refresh_token.encode(), digest_size=16).hexdigest()
+
+
+class SessionCache:
+    """Bounded LRU of the current access token per refresh token.
+
+    A refresh served while the cached access token still has margin
+    seconds to live needs no Cognito call, so tabs and retries that refresh
+    together cost one REFRESH_TOKEN_AUTH. Sessions are dropped on logout,
+    but only in this process; see RedisSessionCache for several workers.
+    """
+
+    def __init__(self, maxsize=SESSION_CACHE_SIZE, margin=SESSION_REFRESH_MARGIN):
+        self.maxsize = maxsize
+        self.margin = margin
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()
+
+    def get(self, refresh_token):
+        """Return the cached session dict, or None when a refresh is due."""
+        key = _session_key(refresh_token)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None and session['expires_at'] - self.margin > time.time():
+                self._sessions.move_to_end(key)
+                SESSION_LOOKUPS.inc(result='hit')
+                return session
+        SESSION_LOOKUPS.inc(result='miss')
+        return None
+
+    def put(self, refresh_token, username, access_token, expires_in):
+        session = {'username': username, 'access_token': access_token,
+                   'expires_at': time.time() + expires_in}
+        if self.maxsize <= 0:
+            return session
+        key = _session_key(refresh_token)
+        with self._lock:
+            self._sessions[key] = session
+            self._sessions.move_to_end(key)
+            while len(self._sessions) > self.maxsize:
+                self._sessions.popitem(last=False)
+        return session
+
+    def invalidate(self, refresh_token):
+        with self._lock:
+            self._sessions.pop(_session_key(refresh_token), None)
+
+    def invalidate_user(self, username):
+        """Drop every session of a user, e.g. after a global sign-out."""
+        with self._lock:
+            for key in [key for key, session in self._sessions.items()
+                        if session['username'] == username]:
+                del self._sessions[key]
+
+
+class RedisSessionCache:
+    """The same interface backed by a Redis-compatible client.
+
+    Each session is a key expiring with its access token, and a set per
+    user lists the user's session keys so logout clears them for every
+    worker. Only get, set, delete, sadd, smembers and expire are used.
+    """
+
+    def __init__(self, client, margin=SESSION_REFRESH_MARGIN, prefix='sessions:'):
+        self.client = client
+        self.margin = margin
+        self.prefix = prefix
+
+    def get(self, refresh_token):
+        raw = self.client.get(self.prefix + _session_key(refresh_token))
+        session = json.loads(raw) if raw is not None else None
+        if session is not None and session['expires_at'] - self.margin > time.time():
+            SESSION_LOOKUPS.inc(result='hit')
+            return session
+        SESSION_LOOKUPS.inc(result='miss')
+        return None
+
+    def put(self, refresh_token, username, access_token, expires_in):
+        session = {'username': username, 'access_token': access_token,
+                   'expires_at': time.time() + expires_in}
+        ttl = max(1, int(expires_in))
+        key = self.prefix + _session_key(refresh_token)
+        user_key = self.prefix + 'user:' + str(username)
+        self.client.set(key, json.dumps(session), ex=ttl)
+        self.client.sadd(user_key, key)
+        self.client.expire(user_key, ttl)
+        return session
+
+    def invalidate(self, refresh_token):
+        self.client.delete(self.prefix + _session_key(refresh_token))
+
+    def invalidate_user(self, username):
+        user_key = self.prefix + 'user:' + str(username)
+        keys = [key.decode() if isinstance(key, bytes) else key
+                for key in self.client.smembers(user_key)]
+        self.client.delete(user_key, *keys)
+
+
+def make_sessions(url=SESSION_CACHE_URL):
+    """Return a RedisSessionCache when url is set (requires redis-py), else a SessionCache."""
+    if url:
+        import redis
+        return RedisSessionCache(redis.Redis.from_url(url))
+    return SessionCache()
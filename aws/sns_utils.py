@@ -1,7 +1,62 @@
-import boto3
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from aws.clients import get_client
+from aws.metrics import REGISTRY
+from aws.models import dumps
+from aws.resilience import is_unavailable
+
+logger = logging.getLogger(__name__)
+
+# Notifications waiting to be published; enqueue() drops beyond this
+NOTIFICATION_QUEUE_SIZE = int(os.getenv('NOTIFICATION_QUEUE_SIZE', '10000'))
+# Seconds the worker waits to fill a batch once a notification is queued
+NOTIFICATION_LINGER = float(os.getenv('NOTIFICATION_LINGER', '0.2'))
+# Publish attempts per notification before it is dropped
+NOTIFICATION_MAX_ATTEMPTS = int(os.getenv('NOTIFICATION_MAX_ATTEMPTS', '5'))
+# PublishBatch accepts at most 10 entries
+PUBLISH_BATCH_SIZE = 10
+
+# Event types, with the subject each is published under
+BOOKED = 'booked'
+STATUS_CHANGED = 'status_changed'
+REMINDER = 'reminder'
+SUBJECTS = {
+    BOOKED: 'Appointment booked',
+    STATUS_CHANGED: 'Appointment status changed',
+    REMINDER: 'Appointment reminder',
+}
+
+QUEUE_DEPTH = REGISTRY.gauge(
+    'notification_queue_depth', 'Notifications waiting in the outbox'
+)
+ENQUEUED = REGISTRY.counter(
+    'notifications_enqueued', 'Notifications accepted by the outbox', labels=('event',)
+)
+PUBLISHED = REGISTRY.counter(
+    'notifications_published', 'Notifications published to SNS', labels=('event',)
+)
+DROPPED = REGISTRY.counter(
+    'notifications_dropped', 'Notifications that were never published', labels=('reason',)
+)
+COALESCED = REGISTRY.counter(
+    'notifications_coalesced', 'Notifications replaced by a later one with the same key'
+)
+PUBLISH_RETRIES = REGISTRY.counter(
+    'notification_publish_retries', 'Notifications queued again after a failed publish'
+)
+BATCH_SIZE = REGISTRY.histogram(
+    'notification_batch_size', 'Entries per PublishBatch call',
+    buckets=tuple(range(1, PUBLISH_BATCH_SIZE + 1))
+)
+
 
 def send_notification(topic_arn, message, subject):
-    client = boto3.client('sns')
+    client = get_client('sns')
 
     response = client.publish(
         TopicArn=topic_arn,
@@ -9,3 +64,181 @@ def send_notification(topic_arn, message, subject):
         Subject=subject
     )
     return response
+
+
+def publish_batch(topic_arn, entries, region=None):
+    """Publish up to PUBLISH_BATCH_SIZE entries in one call.
+
+    Returns the 'Failed' list of the response; its Ids refer to entries.
+    """
+    client = get_client('sns', region)
+    response = client.publish_batch(TopicArn=topic_arn, PublishBatchRequestEntries=entries)
+    return response.get('Failed', [])
+
+
+class _Notification:
+    __slots__ = ('event', 'key', 'subject', 'message', 'attempts', 'retry_at')
+
+    def __init__(self, event, key, subject, message):
+        self.event = event
+        self.key = key
+        self.subject = subject
+        self.message = message
+        self.attempts = 0
+        self.retry_at = 0.0
+
+
+class NotificationOutbox:
+    """Publishes notifications from a background thread in SNS batches.
+
+    enqueue() never blocks the request: it puts the notification on a
+    bounded queue, or drops it and counts the drop when the queue is full.
+    A daemon thread, started on first use, waits up to linger seconds to
+    fill a batch, keeps only the latest notification per key, and sends
+    them with PublishBatch. Failed entries are queued again with backoff
+    until max_attempts. Disabled when no topic is configured.
+    """
+
+    def __init__(self, topic_arn, region=None, maxsize=NOTIFICATION_QUEUE_SIZE,
+                 linger=NOTIFICATION_LINGER, max_attempts=NOTIFICATION_MAX_ATTEMPTS):
+        self.topic_arn = topic_arn
+        self.region = region
+        self.linger = linger
+        self.max_attempts = max_attempts
+        self._queue = queue.Queue(maxsize)
+        self._retries = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def enabled(self):
+        return bool(self.topic_arn)
+
+    def enqueue(self, event, payload, key=None):
+        """Queue a notification; returns False if it was not accepted.
+
+        payload is published as JSON along with the event type. Waiting
+        notifications that share a key are coalesced into the latest one,
+        e.g. several status changes of one appointment.
+        """
+        if not self.enabled:
+            return False
+        notification = _Notification(event, key, SUBJECTS[event], dumps({'event': event, **payload}))
+        try:
+            self._queue.put_nowait(notification)
+        except queue.Full:
+            DROPPED.inc(reason='queue_full')
+            return False
+        ENQUEUED.inc(event=event)
+        QUEUE_DEPTH.set(self._queue.qsize())
+        self._ensure_worker()
+        return True
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='notification-outbox',
+                                                daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _next_batch(self):
+        """Wait for notifications and return up to one batch, coalesced by key."""
+        now = time.monotonic()
+        batch = {}
+        waiting = []
+        for notification in self._retries:
+            if notification.retry_at <= now and len(batch) < PUBLISH_BATCH_SIZE:
+                batch[notification.key or id(notification)] = notification
+            else:
+                waiting.append(notification)
+        self._retries = waiting
+
+        # Due retries go out with whatever is already queued; otherwise block
+        # for the first notification, then linger to fill the batch
+        deadline = now if batch else None
+        idle = 0.1 if self._retries or self._stop.is_set() else 1.0
+        while len(batch) < PUBLISH_BATCH_SIZE:
+            try:
+                if deadline is None:
+                    notification = self._queue.get(timeout=idle)
+                    deadline = time.monotonic() + self.linger
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining > 0:
+                        notification = self._queue.get(timeout=remaining)
+                    else:
+                        notification = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            key = notification.key or id(notification)
+            if batch.pop(key, None) is not None:
+                COALESCED.inc()
+            batch[key] = notification
+        QUEUE_DEPTH.set(self._queue.qsize())
+        return list(batch.values())
+
+    def _publish(self, batch):
+        entries = [
+            {'Id': str(index), 'Subject': notification.subject, 'Message': notification.message,
+             'MessageAttributes': {'event': {'DataType': 'String',
+                                             'StringValue': notification.event}}}
+            for index, notification in enumerate(batch)
+        ]
+        BATCH_SIZE.observe(len(entries))
+        try:
+            failed = publish_batch(self.topic_arn, entries, self.region)
+        except Exception as e:
+            # Throttling and outages are retried; a missing topic or a
+            # permission error would fail again
+            if not is_unavailable(e):
+                logger.error(f"Dropping {len(batch)} notifications: {str(e)}")
+                DROPPED.inc(len(batch), reason='rejected')
+                return
+            logger.warning(f"Error publishing {len(batch)} notifications: {str(e)}")
+            failed = [{'Id': entry['Id'], 'SenderFault': False} for entry in entries]
+
+        failed_ids = {failure['Id']: failure for failure in failed}
+        for index, notification in enumerate(batch):
+            failure = failed_ids.get(str(index))
+            if failure is None:
+                PUBLISHED.inc(event=notification.event)
+            elif failure.get('SenderFault'):
+                logger.error(f"SNS rejected notification: {failure.get('Message')}")
+                DROPPED.inc(reason='rejected')
+            else:
+                self._retry(notification)
+
+    def _retry(self, notification):
+        notification.attempts += 1
+        if notification.attempts >= self.max_attempts:
+            DROPPED.inc(reason='retries_exhausted')
+            return
+        PUBLISH_RETRIES.inc()
+        notification.retry_at = time.monotonic() + min(0.5 * 2 ** notification.attempts, 30)
+        self._retries.append(notification)
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch:
+                self._publish(batch)
+            elif self._stop.is_set() and self._queue.empty():
+                return
+
+    def close(self, timeout=5):
+        """Publish what is queued, waiting at most timeout seconds."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join(timeout)
+        if not thread.is_alive():
+            self._thread = None
+        pending = self._queue.qsize() + len(self._retries)
+        if pending:
+            logger.warning(f"{pending} notifications were not published before shutdown.")
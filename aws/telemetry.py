@@ -0,0 +1,185 @@
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+from aws.metrics import REGISTRY
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+# 'json' for one JSON object per line, 'text' for plain messages
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+
+REQUEST_DURATION = REGISTRY.histogram(
+    'http_request_duration_seconds', 'HTTP request latency by route',
+    labels=('method', 'route', 'status')
+)
+AWS_CALL_DURATION = REGISTRY.histogram(
+    'aws_call_duration_seconds', 'AWS API call latency including retries',
+    labels=('service', 'operation')
+)
+AWS_CALL_RETRIES = REGISTRY.counter(
+    'aws_call_retries', 'Retries made by botocore for AWS API calls',
+    labels=('service', 'operation')
+)
+AWS_CALL_ERRORS = REGISTRY.counter(
+    'aws_call_errors', 'AWS API calls that failed, by error code',
+    labels=('service', 'operation', 'code')
+)
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RESERVED = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_current_trace = contextvars.ContextVar('trace', default=None)
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including `extra` fields
+    and the id of the request being served."""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        trace = _current_trace.get()
+        if trace is not None:
+            entry['request_id'] = trace.request_id
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level=LOG_LEVEL, log_format=LOG_FORMAT):
+    """Send app and aws.* logs to stderr; safe to call more than once."""
+    root = logging.getLogger()
+    if any(getattr(handler, '_telemetry', False) for handler in root.handlers):
+        return
+    handler = logging.StreamHandler(sys.stderr)
+    handler._telemetry = True
+    if log_format == 'json':
+        handler.setFormatter(JsonFormatter())
+    root.addHandler(handler)
+    root.setLevel(level)
+
+
+class Trace:
+    """Timing spans collected while serving one request."""
+
+    def __init__(self, request_id=None):
+        self.request_id = request_id or uuid.uuid4().hex
+        self.start = time.perf_counter()
+        self.spans = []
+
+    def add(self, name, duration, **attributes):
+        self.spans.append({'name': name, 'duration_ms': round(duration * 1000, 2), **attributes})
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def server_timing(self):
+        """Server-Timing header value, summing spans that share a name."""
+        totals = {}
+        for span in self.spans:
+            totals[span['name']] = totals.get(span['name'], 0) + span['duration_ms']
+        totals['total'] = round(self.elapsed() * 1000, 2)
+        return ', '.join(f'{name.replace(".", "-")};dur={duration:.2f}'
+                         for name, duration in totals.items())
+
+
+def start_trace(request_id=None):
+    """Begin a trace for the current request; returns (trace, token)."""
+    trace = Trace(request_id)
+    return trace, _current_trace.set(trace)
+
+
+def end_trace(token):
+    _current_trace.reset(token)
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+@contextlib.contextmanager
+def span(name, **attributes):
+    """Time a block of our own code as part of the current request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(name, time.perf_counter() - start, **attributes)
+
+
+def observe_request(trace, method, route, status):
+    """Record a finished request in the route histogram and the log."""
+    duration = trace.elapsed()
+    REQUEST_DURATION.observe(duration, method=method, route=route, status=status)
+    logging.getLogger('app.requests').info(
+        f"{method} {route} {status}",
+        extra={'method': method, 'route': route, 'status': status,
+               'duration_ms': round(duration * 1000, 2), 'spans': trace.spans}
+    )
+
+
+# botocore event hooks. The per-call context dict is shared by before-call
+# and after-call, so it carries the start time across retries.
+def _before_call(model, context, **kwargs):
+    context['telemetry_model'] = model
+    context['telemetry_start'] = time.perf_counter()
+
+
+def _finish_call(model, context, error_code=None, retries=0):
+    start = context.get('telemetry_start')
+    if start is None:
+        return
+    duration = time.perf_counter() - start
+    service = model.service_model.service_id.hyphenize()
+    operation = model.name
+
+    AWS_CALL_DURATION.observe(duration, service=service, operation=operation)
+    if retries:
+        AWS_CALL_RETRIES.inc(retries, service=service, operation=operation)
+    if error_code:
+        AWS_CALL_ERRORS.inc(service=service, operation=operation, code=error_code)
+
+    trace = _current_trace.get()
+    if trace is not None:
+        attributes = {'operation': operation}
+        if retries:
+            attributes['retries'] = retries
+        if error_code:
+            attributes['error'] = error_code
+        trace.add(f'aws.{service}', duration, **attributes)
+
+
+def _after_call(http_response, parsed, model, context, **kwargs):
+    retries = parsed.get('ResponseMetadata', {}).get('RetryAttempts', 0)
+    error_code = parsed.get('Error', {}).get('Code') if http_response.status_code >= 300 else None
+    _finish_call(model, context, error_code, retries)
+
+
+def _after_call_error(exception, context, **kwargs):
+    # Raised before a response was parsed (timeouts, connection errors)
+    model = context.get('telemetry_model')
+    if model is not None:
+        _finish_call(model, context, type(exception).__name__)
+
+
+def instrument(events):
+    """Register the hooks on a botocore session or event emitter so every
+    client created from it reports latency, retries and errors."""
+    events.register('before-call', _before_call)
+    events.register('after-call', _after_call)
+    events.register('after-call-error', _after_call_error)
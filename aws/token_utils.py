@@ -0,0 +1,220 @@
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+
+# DER prefix of the DigestInfo for SHA-256 (RFC 8017, section 9.2)
+_SHA256_DIGEST_INFO = bytes.fromhex('3031300d060960864801650304020105000420')
+
+# Minimum seconds between JWKS downloads triggered by unknown key ids
+JWKS_REFRESH_INTERVAL = 60
+
+# Longest access token validity Cognito allows; sign-outs are remembered
+# this long, after which every token issued before them has expired
+MAX_TOKEN_LIFETIME = 24 * 3600
+
+
+class InvalidTokenError(Exception):
+    """Raised when an access token fails local verification."""
+
+
+def _b64decode(segment):
+    if isinstance(segment, str):
+        segment = segment.encode('ascii')
+    return base64.urlsafe_b64decode(segment + b'=' * (-len(segment) % 4))
+
+
+def _b64_to_int(segment):
+    return int.from_bytes(_b64decode(segment), 'big')
+
+
+def verify_rs256(signing_input, signature, modulus, exponent):
+    """Check an RSASSA-PKCS1-v1_5 SHA-256 signature."""
+    size = (modulus.bit_length() + 7) // 8
+    if len(signature) != size:
+        return False
+
+    decrypted = pow(int.from_bytes(signature, 'big'), exponent, modulus)
+    encoded = decrypted.to_bytes(size, 'big')
+
+    digest_info = _SHA256_DIGEST_INFO + hashlib.sha256(signing_input).digest()
+    padding = size - len(digest_info) - 3
+    if padding < 8:
+        return False
+    expected = b'\x00\x01' + b'\xff' * padding + b'\x00' + digest_info
+    return hmac.compare_digest(encoded, expected)
+
+
+def unverified_claims(token):
+    """Decode a JWT's claims without checking it.
+
+    Only for tokens just received from Cognito itself, never for tokens
+    sent by clients.
+    """
+    try:
+        return json.loads(_b64decode(token.split('.')[1]))
+    except (IndexError, ValueError):
+        raise InvalidTokenError('Malformed token')
+
+
+def jwks_url(region, user_pool_id):
+    return (f"https://cognito-idp.{region}.amazonaws.com/"
+            f"{user_pool_id}/.well-known/jwks.json")
+
+
+class JwksCache:
+    """In-memory RSA key set for a Cognito user pool.
+
+    Keys come from a local JWKS file when one is given, otherwise from the
+    pool's public endpoint. An unknown ``kid`` triggers a refresh, at most once
+    per JWKS_REFRESH_INTERVAL so forged key ids cannot cause a fetch storm.
+    """
+
+    def __init__(self, url=None, path=None):
+        self.url = url
+        self.path = path
+        self._keys = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _fetch(self):
+        if self.path:
+            with open(self.path) as f:
+                return json.load(f)
+        with urllib.request.urlopen(self.url, timeout=5) as response:
+            return json.loads(response.read())
+
+    def refresh(self):
+        jwks = self._fetch()
+        keys = {}
+        for key in jwks.get('keys', []):
+            if key.get('kty') != 'RSA':
+                continue
+            keys[key['kid']] = (_b64_to_int(key['n']), _b64_to_int(key['e']))
+        self._keys = keys
+        self._loaded_at = time.time()
+
+    def get_key(self, kid):
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+
+        with self._lock:
+            key = self._keys.get(kid)
+            if key is None and (
+                not self._keys
+                or time.time() - self._loaded_at >= JWKS_REFRESH_INTERVAL
+            ):
+                self.refresh()
+                key = self._keys.get(kid)
+        return key
+
+
+class VerifiedTokenCache:
+    """Small LRU of token -> claims, never outliving the token's exp."""
+
+    def __init__(self, max_size=1024, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        with self._lock:
+            entry = self._items.get(token)
+            if entry is None:
+                return None
+            expires_at, claims = entry
+            if expires_at <= time.time():
+                del self._items[token]
+                return None
+            self._items.move_to_end(token)
+            return claims
+
+    def put(self, token, claims):
+        expires_at = min(claims['exp'], time.time() + self.ttl)
+        with self._lock:
+            self._items[token] = (expires_at, claims)
+            self._items.move_to_end(token)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def invalidate_user(self, username):
+        with self._lock:
+            for token in [token for token, (_, claims) in self._items.items()
+                          if claims.get('username') == username]:
+                del self._items[token]
+
+
+class CognitoTokenVerifier:
+    """Validate Cognito access tokens without calling the Cognito API."""
+
+    def __init__(self, region, user_pool_id, client_id, jwks_path=None,
+                 cache_size=1024, cache_ttl=300):
+        self.issuer = f"https://cognito-idp.{region}.amazonaws.com/{user_pool_id}"
+        self.client_id = client_id
+        self.jwks = JwksCache(url=jwks_url(region, user_pool_id), path=jwks_path)
+        self.cache = VerifiedTokenCache(max_size=cache_size, ttl=cache_ttl)
+        self._signed_out = OrderedDict()
+        self._lock = threading.Lock()
+
+    def verify(self, token):
+        """Return the token's claims or raise InvalidTokenError."""
+        claims = self.cache.get(token)
+        if claims is None:
+            claims = self._verify(token)
+            self.cache.put(token, claims)
+        # Checked on cache hits too, in case a verification raced a sign-out
+        signed_out_at = self._signed_out.get(claims.get('username'))
+        if signed_out_at is not None and claims.get('iat', 0) <= signed_out_at:
+            raise InvalidTokenError('Token has been revoked')
+        return claims
+
+    def sign_out(self, username):
+        """Reject the user's tokens issued so far, as a global sign-out does.
+
+        The signature of a revoked token stays valid, so this is remembered
+        for MAX_TOKEN_LIFETIME. It only applies to this process.
+        """
+        now = time.time()
+        with self._lock:
+            self._signed_out[username] = int(now)
+            self._signed_out.move_to_end(username)
+            while next(iter(self._signed_out.values())) < now - MAX_TOKEN_LIFETIME:
+                self._signed_out.popitem(last=False)
+        self.cache.invalidate_user(username)
+
+    def _verify(self, token):
+        try:
+            header_b64, payload_b64, signature_b64 = token.split('.')
+            header = json.loads(_b64decode(header_b64))
+            claims = json.loads(_b64decode(payload_b64))
+            signature = _b64decode(signature_b64)
+        except (ValueError, TypeError):
+            raise InvalidTokenError('Malformed token')
+
+        if header.get('alg') != 'RS256':
+            raise InvalidTokenError('Unsupported token algorithm')
+
+        key = self.jwks.get_key(header.get('kid'))
+        if key is None:
+            raise InvalidTokenError('Unknown signing key')
+
+        signing_input = f"{header_b64}.{payload_b64}".encode('ascii')
+        if not verify_rs256(signing_input, signature, *key):
+            raise InvalidTokenError('Invalid token signature')
+
+        if claims.get('exp', 0) <= time.time():
+            raise InvalidTokenError('Token has expired')
+        if claims.get('iss') != self.issuer:
+            raise InvalidTokenError('Invalid token issuer')
+        if claims.get('token_use') != 'access':
+            raise InvalidTokenError('Not an access token')
+        if claims.get('client_id') != self.client_id:
+            raise InvalidTokenError('Token was issued for another client')
+
+        return claims
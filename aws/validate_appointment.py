@@ -1,87 +1,96 @@
-import json
-from datetime import datetime, timedelta
+import os
+
 import boto3
 
+try:
+    from aws.rules import MESSAGES, OK, check_appointment
+except ImportError:  # Lambda bundle ships rules.py next to this file
+    from rules import MESSAGES, OK, check_appointment
+
+TABLE_NAME = os.getenv('APPOINTMENTS_TABLE', 'Appointments')
+# Appointments that can share a slot, as SERVICE_BAYS in the app
+SERVICE_BAYS = int(os.getenv('SERVICE_BAYS', '1'))
+
+SLOT_UNAVAILABLE = 'slot_unavailable'
+VALIDATION_ERROR = 'validation_error'
+
+# Created once per container (or per process when run in-process) and
+# reused by every invocation; low-level clients are thread-safe
+_client = None
+
+
+def get_client():
+    global _client
+    if _client is None:
+        _client = boto3.client('dynamodb')
+    return _client
+
+
+def use_client(client):
+    """Query through the given DynamoDB client instead of creating one."""
+    global _client
+    _client = client
+
+
+def booked_count(date, time):
+    response = get_client().query(
+        TableName=TABLE_NAME,
+        IndexName='DateTimeIndex',
+        KeyConditionExpression='#date = :date AND #time = :time',
+        ExpressionAttributeNames={
+            '#date': 'date',
+            '#time': 'time'
+        },
+        ExpressionAttributeValues={
+            ':date': {'S': date},
+            ':time': {'S': time}
+        },
+        Select='COUNT'
+    )
+    return response['Count']
+
+
+def validate(appointments):
+    """Validate appointment dicts, querying each distinct slot once."""
+    results = [None] * len(appointments)
+    slots = {}
+    for index, appointment in enumerate(appointments):
+        # Date, slot, service, weekday and closing-time rules
+        code = check_appointment(appointment.get('date'), appointment.get('time'),
+                                 appointment.get('serviceType'))
+        if code != OK:
+            results[index] = {'isValid': False, 'code': code, 'message': MESSAGES[code]}
+        else:
+            slots.setdefault((appointment['date'], appointment['time']), []).append(index)
+
+    # Check for existing appointments at the same time
+    for (date, time), indexes in slots.items():
+        if booked_count(date, time) >= SERVICE_BAYS:
+            result = {'isValid': False, 'code': SLOT_UNAVAILABLE,
+                      'message': 'This time slot is already booked'}
+        else:
+            result = {'isValid': True, 'code': OK, 'message': MESSAGES[OK]}
+        for index in indexes:
+            results[index] = result
+    return results
+
+
 def lambda_handler(event, context):
+    """Validate {'appointment': {...}}, or {'appointments': [...]} in one call.
+
+    A batch event returns {'results': [...]} in input order.
+    """
+    batch = 'appointments' in event
     try:
-        appointment = event['appointment']
-        date = appointment['date']
-        time = appointment['time']
-        service_type = appointment['serviceType']
-        
-        # Convert appointment time to datetime
-        appointment_datetime = datetime.strptime(f"{date} {time}", "%Y-%m-%d %H:%M")
-        
-        # Validate business hours (9 AM to 5 PM)
-        hour = appointment_datetime.hour
-        if hour < 9 or hour >= 17:
-            return {
-                'isValid': False,
-                'message': 'Appointments must be scheduled between 9 AM and 5 PM'
-            }
-        
-        # Validate weekday
-        if appointment_datetime.weekday() >= 5:  # Saturday = 5, Sunday = 6
-            return {
-                'isValid': False,
-                'message': 'Appointments cannot be scheduled on weekends'
-            }
-        
-        # Validate future date
-        if appointment_datetime < datetime.now():
-            return {
-                'isValid': False,
-                'message': 'Appointments must be scheduled for future dates'
-            }
-        
-        # Check for existing appointments at the same time
-        dynamodb = boto3.resource('dynamodb')
-        table = dynamodb.Table('Appointments')
-        
-        response = table.query(
-            IndexName='DateTimeIndex',
-            KeyConditionExpression='#date = :date AND #time = :time',
-            ExpressionAttributeNames={
-                '#date': 'date',
-                '#time': 'time'
-            },
-            ExpressionAttributeValues={
-                ':date': date,
-                ':time': time
-            }
-        )
-        
-        if response['Count'] > 0:
-            return {
-                'isValid': False,
-                'message': 'This time slot is already booked'
-            }
-        
-        # Validate service duration
-        service_durations = {
-            'oil-change': 60,  # minutes
-            'tire-rotation': 45,
-            'brake-service': 120,
-            'general-inspection': 60,
-            'repair': 180
-        }
-        
-        duration = service_durations.get(service_type, 60)
-        end_time = appointment_datetime + timedelta(minutes=duration)
-        
-        if end_time.hour >= 17:
-            return {
-                'isValid': False,
-                'message': f'Service duration of {duration} minutes exceeds business hours'
-            }
-        
-        return {
-            'isValid': True,
-            'message': 'Appointment validation successful'
-        }
-        
+        if batch:
+            return {'results': validate(event['appointments'])}
+        return validate([event['appointment']])[0]
     except Exception as e:
-        return {
+        error = {
             'isValid': False,
+            'code': VALIDATION_ERROR,
             'message': f'Validation error: {str(e)}'
         }
+        if batch:
+            return {'results': [error] * len(event.get('appointments') or ())}
+        return error
@@ -0,0 +1,136 @@
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from aws.clients import get_client
+from aws.lambda_utils import LambdaFunctionError, invoke_lambda_function
+from aws.rules import MESSAGES, OK, validate_batch
+from aws.validate_appointment import SLOT_UNAVAILABLE
+
+# 'rules' checks the booking rules only, 'inprocess' runs the validation
+# Lambda's handler in this process, 'lambda' invokes the deployed function
+VALIDATOR_BACKEND = os.getenv('VALIDATOR_BACKEND', 'rules')
+VALIDATOR_FUNCTION = os.getenv('VALIDATOR_FUNCTION', 'validate-appointment')
+# Appointments per invocation of the remote validator
+VALIDATOR_BATCH_SIZE = int(os.getenv('VALIDATOR_BATCH_SIZE', '50'))
+# Seconds a remote validation waits for concurrent requests to join its batch
+VALIDATOR_LINGER = float(os.getenv('VALIDATOR_LINGER', '0.005'))
+
+
+class RulesValidator:
+    """Date, slot, service, weekday and closing-time rules, in memory.
+
+    Slot occupancy is left to the availability index and the booking
+    transaction.
+    """
+    blocking = False
+
+    def validate(self, appointment):
+        return self.validate_many([appointment])[0]
+
+    def validate_many(self, appointments):
+        return [{'isValid': code == OK, 'code': code, 'message': MESSAGES[code]}
+                for code in validate_batch(appointments)]
+
+
+class InProcessValidator:
+    """Runs the validation Lambda's code in this process.
+
+    Gives the Lambda's results, including its DateTimeIndex occupancy check,
+    without an invocation round trip; queries go through the shared pooled
+    DynamoDB client.
+    """
+    blocking = True
+
+    def __init__(self, region=None):
+        self.region = region
+        self._handler = None
+
+    def _get_handler(self):
+        if self._handler is None:
+            from aws import validate_appointment
+            validate_appointment.use_client(get_client('dynamodb', self.region))
+            self._handler = validate_appointment.lambda_handler
+        return self._handler
+
+    def validate(self, appointment):
+        return self._get_handler()({'appointment': appointment}, None)
+
+    def validate_many(self, appointments):
+        return self._get_handler()({'appointments': list(appointments)}, None)['results']
+
+
+class LambdaValidator:
+    """Invokes the deployed validation Lambda with batches of appointments.
+
+    validate_many() sends up to batch_size appointments per invocation.
+    Concurrent validate() calls are coalesced: the first caller waits
+    linger seconds for others to join, then one invocation answers them all.
+    """
+    blocking = True
+
+    def __init__(self, function_name=VALIDATOR_FUNCTION, region=None,
+                 batch_size=VALIDATOR_BATCH_SIZE, linger=VALIDATOR_LINGER):
+        self.function_name = function_name
+        self.region = region
+        self.batch_size = batch_size
+        self.linger = linger
+        self._lock = threading.Lock()
+        self._pending = []
+
+    def _invoke(self, appointments):
+        response = invoke_lambda_function(
+            self.function_name, {'appointments': appointments}, self.region
+        )
+        if 'results' not in response:
+            # A bundle built before batch events were supported
+            raise LambdaFunctionError(
+                f"{self.function_name} does not support batches; redeploy the zip "
+                f"built by python -m aws.package_validator"
+            )
+        return response['results']
+
+    def validate_many(self, appointments):
+        appointments = list(appointments)
+        results = []
+        for start in range(0, len(appointments), self.batch_size):
+            results.extend(self._invoke(appointments[start:start + self.batch_size]))
+        return results
+
+    def validate(self, appointment):
+        future = Future()
+        with self._lock:
+            self._pending.append((appointment, future))
+            pending = len(self._pending)
+        if pending >= self.batch_size:
+            self._flush()
+        elif pending == 1:
+            time.sleep(self.linger)
+            self._flush()
+        return future.result()
+
+    def _flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return
+        try:
+            results = self._invoke([appointment for appointment, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+
+def make_validator(backend=VALIDATOR_BACKEND, region=None):
+    """Build the validator selected for this deployment."""
+    if backend == 'rules':
+        return RulesValidator()
+    if backend == 'inprocess':
+        return InProcessValidator(region)
+    if backend == 'lambda':
+        return LambdaValidator(region=region)
+    raise ValueError(f"Unknown validator backend {backend!r}")
@@ -0,0 +1,70 @@
+import argparse
+import json
+import os
+import sys
+import timeit
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from boto3.dynamodb.types import TypeDeserializer
+
+from aws.models import Appointment, dumps, orjson
+
+
+def sample_item(index):
+    return {
+        'appointment_id': {'S': f'00000000-0000-0000-0000-{index:012d}'},
+        'userEmail': {'S': 'driver@example.com'},
+        'carMake': {'S': 'Toyota'},
+        'carModel': {'S': 'Corolla'},
+        'carYear': {'S': '2019'},
+        'serviceType': {'S': 'oil-change'},
+        'date': {'S': '2030-01-07'},
+        'time': {'S': '09:00'},
+        'description': {'S': 'Strange noise when braking'},
+        'imageUrl': {'S': 'https://autocare-images1.s3.us-east-1.amazonaws.com/car.jpg'},
+        'status': {'S': 'Pending'},
+        'createdAt': {'S': '2030-01-01T08:00:00.000000'},
+        'bay': {'N': '0'},
+    }
+
+
+def json_default(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(type(value).__name__)
+
+
+def resource_layer(items):
+    # What the boto3 Table resource plus jsonify used to do per page
+    deserializer = TypeDeserializer()
+    rows = [{k: deserializer.deserialize(v) for k, v in item.items()} for item in items]
+    return json.dumps({'items': rows}, default=json_default)
+
+
+def record_model(items):
+    return dumps({'items': [Appointment.from_item(item).to_dict() for item in items]})
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare decoding and serializing a page of appointments.'
+    )
+    parser.add_argument('--items', type=int, default=200,
+                        help='appointments per page (default: 200, the max page size)')
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    items = [sample_item(i) for i in range(args.items)]
+    assert json.loads(resource_layer(items)) == json.loads(record_model(items))
+
+    print(f"JSON encoder: {'orjson' if orjson is not None else 'json'}")
+    for name, func in (('TypeDeserializer + json', resource_layer),
+                       ('Appointment records', record_model)):
+        seconds = min(timeit.repeat(lambda: func(items), number=args.repeat, repeat=3))
+        print(f"{name:<24} {seconds / args.repeat * 1000:.2f} ms per {args.items}-item page")
+
+
+if __name__ == '__main__':
+    main()
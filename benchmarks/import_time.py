@@ -0,0 +1,66 @@
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter: any socket connection during import fails the
+# run, then the wall-clock time of `import app` is printed
+PROBE = """
+import socket, time
+
+def refuse(self, address):
+    raise RuntimeError(f"network access during import: {address!r}")
+
+socket.socket.connect = refuse
+socket.socket.connect_ex = refuse
+
+start = time.perf_counter()
+import app
+print(time.perf_counter() - start)
+"""
+
+
+def measure(runs):
+    env = dict(os.environ)
+    # Dummy credentials so botocore never looks for instance metadata
+    env.setdefault('AWS_ACCESS_KEY_ID', 'benchmark')
+    env.setdefault('AWS_SECRET_ACCESS_KEY', 'benchmark')
+    env.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-c', PROBE], cwd=ROOT, env=env,
+            capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            print(result.stderr)
+            raise SystemExit("❌ import app failed (network access or error during import)")
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that `import app` is fast and network-free.')
+    parser.add_argument('--budget', type=float, default=1.0,
+                        help='maximum median import time in seconds (default: 1.0)')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    timings = sorted(measure(args.runs))
+    median = timings[len(timings) // 2]
+    print(f"import app: median {median * 1000:.0f} ms, "
+          f"min {timings[0] * 1000:.0f} ms, max {timings[-1] * 1000:.0f} ms "
+          f"over {args.runs} runs (budget {args.budget * 1000:.0f} ms)")
+
+    if median > args.budget:
+        print("❌ Import time is over budget!")
+        return 1
+    print("✓ Import time is within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,354 @@
+import argparse
+import http.client
+import json
+import os
+import random
+import shlex
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aws.rules import SLOTS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = 'L0ad-test!'
+
+# Commands that serve the app on {port}; the process inherits an
+# environment that points every AWS client at the moto server
+SERVERS = {
+    'flask': '{python} -m flask --app app run --host 127.0.0.1 --port {port} --with-threads',
+    'gunicorn': '{python} -m gunicorn -c gunicorn.conf.py --bind 127.0.0.1:{port} app:app',
+    'uvicorn': '{python} -m uvicorn asgi:application --host 127.0.0.1 --port {port} --no-access-log',
+}
+
+# Relative weight of each operation in the traffic mix
+DEFAULT_MIX = 'list=55,create=15,upload-url=15,login=10,signup=5'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(host, port, path, timeout, process=None):
+    """Poll until GET path answers 200, or raise after timeout."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"server exited with status {process.returncode}")
+        try:
+            connection = http.client.HTTPConnection(host, port, timeout=5)
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+            connection.close()
+            if response.status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"http://{host}:{port}{path} not ready after {timeout}s")
+
+
+def start_process(command, env, log):
+    return subprocess.Popen(command, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def stop_process(process):
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def print_log_tail(log, lines=30):
+    log.flush()
+    log.seek(0)
+    tail = log.read().decode(errors='replace').splitlines()[-lines:]
+    print('\n'.join(tail), file=sys.stderr)
+
+
+class Client:
+    """One keep-alive HTTP connection and the user it is logged in as."""
+
+    def __init__(self, host, port, email):
+        self.host = host
+        self.port = port
+        self.email = email
+        self.token = None
+        self.connection = http.client.HTTPConnection(host, port, timeout=30)
+
+    def request(self, method, path, body=None, auth=False):
+        headers = {}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        if auth:
+            headers['Authorization'] = self.token
+        try:
+            self.connection.request(method, path, payload, headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            # Reconnect on the next request
+            self.connection.close()
+            raise
+        return response.status, data
+
+    def signup(self, email=None):
+        return self.request('POST', '/api/auth/signup',
+                            {'email': email or self.email, 'password': PASSWORD})
+
+    def login(self):
+        status, data = self.request('POST', '/api/auth/login',
+                                    {'email': self.email, 'password': PASSWORD})
+        if status == 200:
+            self.token = json.loads(data)['token']
+        return status, data
+
+
+def future_weekday(rng):
+    # Spread bookings over two years of weekdays so slot conflicts are rare
+    day = date.today() + timedelta(days=rng.randint(7, 730))
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day.isoformat()
+
+
+def appointment(rng):
+    return {
+        'carMake': 'Toyota', 'carModel': 'Corolla', 'carYear': '2019',
+        'serviceType': 'oil-change', 'date': future_weekday(rng),
+        'time': rng.choice(SLOTS), 'description': 'Load test booking',
+    }
+
+
+OPERATIONS = {
+    'list': lambda client, rng: client.request('GET', '/api/appointments?limit=20', auth=True),
+    'create': lambda client, rng: client.request('POST', '/api/appointments', appointment(rng), auth=True),
+    'upload-url': lambda client, rng: client.request(
+        'POST', '/api/upload-url', {'fileName': 'car.jpg', 'fileType': 'image/jpeg'}, auth=True),
+    'login': lambda client, rng: client.login(),
+    'signup': lambda client, rng: client.signup(f'load-{uuid.uuid4().hex[:12]}@example.com'),
+}
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation {name!r}; "
+                                             f"choose from {', '.join(OPERATIONS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def run_worker(client, mix, seed, stop_at, warmup_until, results):
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    while time.monotonic() < stop_at:
+        name = rng.choices(names, weights)[0]
+        start = time.perf_counter()
+        try:
+            status, _ = OPERATIONS[name](client, rng)
+        except (OSError, http.client.HTTPException):
+            status = 0
+        elapsed = time.perf_counter() - start
+        if time.monotonic() >= warmup_until:
+            results.append((name, status, elapsed))
+
+
+def percentile(sorted_values, fraction):
+    # Nearest-rank percentile
+    index = max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def summarize(results, duration):
+    by_route = {}
+    for name, status, elapsed in results:
+        by_route.setdefault(name, []).append((status, elapsed))
+    by_route['all'] = [(status, elapsed) for _, status, elapsed in results]
+
+    summary = {}
+    for name, samples in by_route.items():
+        latencies = sorted(elapsed for _, elapsed in samples)
+        if not latencies:
+            continue
+        summary[name] = {
+            'requests': len(samples),
+            'rps': len(samples) / duration,
+            # 0 is a transport failure; 409 slot conflicts are expected under load
+            'errors': sum(1 for status, _ in samples if status == 0 or status >= 500),
+            'rejected': sum(1 for status, _ in samples if 400 <= status < 500),
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p95_ms': percentile(latencies, 0.95) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'max_ms': latencies[-1] * 1000,
+        }
+    return summary
+
+
+def print_summary(summary):
+    print(f"{'route':<12} {'requests':>8} {'rps':>8} {'errors':>6} {'4xx':>5} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, row in summary.items():
+        print(f"{name:<12} {row['requests']:>8} {row['rps']:>8.1f} {row['errors']:>6} "
+              f"{row['rejected']:>5} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+              f"{row['p99_ms']:>8.1f} {row['max_ms']:>8.1f}")
+
+
+def compare(summary, baseline, tolerance):
+    """Return the routes whose p95 latency or throughput regressed."""
+    regressions = []
+    for name, row in summary.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if row['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']:.1f} -> {row['p95_ms']:.1f} ms")
+        if row['rps'] < before['rps'] * (1 - tolerance):
+            regressions.append(f"{name}: {before['rps']:.1f} -> {row['rps']:.1f} req/s")
+    return regressions
+
+
+def prepare_clients(host, port, count):
+    clients = []
+    run_id = uuid.uuid4().hex[:8]
+    for index in range(count):
+        client = Client(host, port, f'load-{run_id}-{index}@example.com')
+        status, data = client.signup()
+        if status != 201:
+            raise RuntimeError(f"signup failed with {status}: {data[:200]!r}")
+        status, data = client.login()
+        if status != 200:
+            raise RuntimeError(f"login failed with {status}: {data[:200]!r}")
+        clients.append(client)
+    return clients
+
+
+def seed_appointments(clients, per_user, seed):
+    # Give every user a history so listing returns a realistic page
+    rng = random.Random(seed)
+    for client in clients:
+        for _ in range(per_user):
+            client.request('POST', '/api/appointments', appointment(rng), auth=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Drive a mix of API traffic at the app, backed by moto '
+                    'stand-ins for S3, DynamoDB and Cognito, and report '
+                    'latency percentiles and throughput per route.'
+    )
+    parser.add_argument('--server', choices=sorted(SERVERS), default='flask',
+                        help='how to serve the app (default: flask)')
+    parser.add_argument('--url', help='benchmark an already running server instead, '
+                                      'e.g. http://127.0.0.1:5555')
+    parser.add_argument('--concurrency', type=int, default=8, help='concurrent clients')
+    parser.add_argument('--duration', type=float, default=20, help='seconds of measured load')
+    parser.add_argument('--warmup', type=float, default=3, help='seconds of unmeasured load first')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f'operation weights (default: {DEFAULT_MIX})')
+    parser.add_argument('--seed-appointments', type=int, default=20,
+                        help='appointments booked per user before the run')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--save', metavar='PATH', help='write the results as JSON')
+    parser.add_argument('--baseline', metavar='PATH',
+                        help='compare with results saved by --save and fail on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed p95/throughput change against the baseline (default: 0.2)')
+    args = parser.parse_args()
+
+    processes = []
+    log = tempfile.TemporaryFile()
+    try:
+        if args.url:
+            target = urlsplit(args.url)
+            host, port = target.hostname, target.port or 80
+        else:
+            moto_port, port, host = free_port(), free_port(), '127.0.0.1'
+            env = dict(os.environ)
+            env.update({
+                'AWS_ACCESS_KEY_ID': 'benchmark', 'AWS_SECRET_ACCESS_KEY': 'benchmark',
+                'AWS_DEFAULT_REGION': 'us-east-1',
+                'AWS_ENDPOINT_URL': f'http://127.0.0.1:{moto_port}',
+                'LOG_LEVEL': env.get('LOG_LEVEL', 'WARNING'),
+                # Every simulated user shares one address
+                'RATE_LIMIT_ENABLED': env.get('RATE_LIMIT_ENABLED', '0'),
+            })
+            processes.append(start_process(
+                [sys.executable, '-m', 'moto.server', '-p', str(moto_port)], env, log))
+            wait_for('127.0.0.1', moto_port, '/moto-api/data.json', 30, processes[-1])
+            # The app only verifies the table, so create it the way a deploy does
+            if start_process([sys.executable, '-m', 'aws.provision'], env, log).wait() != 0:
+                raise RuntimeError('python -m aws.provision failed')
+            command = SERVERS[args.server].format(python=shlex.quote(sys.executable), port=port)
+            processes.append(start_process(shlex.split(command), env, log))
+            wait_for(host, port, '/api/health', 30, processes[-1])
+
+        # Resolves the bucket, user pool and table on first call
+        wait_for(host, port, '/api/health/warm', 60)
+        clients = prepare_clients(host, port, args.concurrency)
+        seed_appointments(clients, args.seed_appointments, args.seed)
+
+        print(f"Running {args.concurrency} clients for {args.duration:.0f}s "
+              f"(+{args.warmup:.0f}s warmup) against "
+              f"{args.url or f'{args.server} on port {port}'}")
+        results = []
+        warmup_until = time.monotonic() + args.warmup
+        stop_at = warmup_until + args.duration
+        threads = [
+            threading.Thread(target=run_worker,
+                             args=(client, args.mix, args.seed + index, stop_at,
+                                   warmup_until, results))
+            for index, client in enumerate(clients)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    except RuntimeError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        print_log_tail(log)
+        return 1
+    finally:
+        for process in reversed(processes):
+            stop_process(process)
+        log.close()
+
+    summary = summarize(results, args.duration)
+    print_summary(summary)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+    if summary.get('all', {}).get('errors'):
+        print(f"❌ {summary['all']['errors']} requests failed")
+        return 1
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(summary, json.load(f), args.tolerance)
+        if regressions:
+            print("❌ Performance regressed:\n  " + "\n  ".join(regressions))
+            return 1
+        print("✓ Within tolerance of the baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
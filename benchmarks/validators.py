@@ -0,0 +1,113 @@
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aws.rules import SERVICES, SLOTS
+from aws.validators import InProcessValidator, LambdaValidator, RulesValidator
+
+
+def sample_appointments(count, seed=1):
+    rng = random.Random(seed)
+    start = date.today() + timedelta(days=7)
+    return [
+        {'date': (start + timedelta(days=rng.randint(0, 60))).isoformat(),
+         'time': rng.choice(SLOTS), 'serviceType': rng.choice(SERVICES)}
+        for _ in range(count)
+    ]
+
+
+def create_table():
+    # Same key schema and DateTimeIndex as create_appointments_table
+    from aws.dynamodb_utils import create_appointments_table
+    create_appointments_table()
+
+
+def time_single(validator, appointments):
+    start = time.perf_counter()
+    for appointment in appointments:
+        validator.validate(appointment)
+    return (time.perf_counter() - start) / len(appointments)
+
+
+def time_batch(validator, appointments):
+    start = time.perf_counter()
+    validator.validate_many(appointments)
+    return (time.perf_counter() - start) / len(appointments)
+
+
+def time_concurrent(validator, appointments, concurrency):
+    """Validate one appointment per call from several threads at once."""
+    chunks = [appointments[index::concurrency] for index in range(concurrency)]
+    threads = [threading.Thread(target=lambda chunk=chunk: [validator.validate(a) for a in chunk])
+               for chunk in chunks]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return (time.perf_counter() - start) / len(appointments)
+
+
+class CountingLambdaValidator(LambdaValidator):
+    invocations = 0
+
+    def _invoke(self, appointments):
+        self.invocations += 1
+        return super()._invoke(appointments)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare validator backends: the in-memory rules, the '
+                    'validation Lambda run in-process, and the deployed Lambda.'
+    )
+    parser.add_argument('--appointments', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16,
+                        help='threads for the concurrent single-call run')
+    parser.add_argument('--function', metavar='NAME',
+                        help='also benchmark this deployed validation Lambda; runs '
+                             'against your AWS account instead of moto')
+    parser.add_argument('--region', default='us-east-1')
+    args = parser.parse_args()
+
+    appointments = sample_appointments(args.appointments)
+    if args.function:
+        context = nullcontext()
+    else:
+        os.environ.setdefault('AWS_ACCESS_KEY_ID', 'benchmark')
+        os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'benchmark')
+        os.environ.setdefault('AWS_DEFAULT_REGION', args.region)
+        from moto import mock_aws
+        context = mock_aws()
+
+    with context:
+        if not args.function:
+            create_table()
+        backends = [('rules', RulesValidator()), ('inprocess', InProcessValidator(args.region))]
+        if args.function:
+            backends.append(('lambda', CountingLambdaValidator(args.function, args.region)))
+
+        print(f"{'backend':<10} {'single ms':>10} {'batch ms':>10} {'concurrent ms':>14}"
+              f"   (per appointment, {args.appointments} appointments)")
+        for name, validator in backends:
+            # Warm up clients and imports
+            validator.validate_many(appointments[:5])
+            single = time_single(validator, appointments)
+            batch = time_batch(validator, appointments)
+            validator.invocations = 0
+            concurrent = time_concurrent(validator, appointments, args.concurrency)
+            print(f"{name:<10} {single * 1000:>10.3f} {batch * 1000:>10.3f} {concurrent * 1000:>14.3f}")
+            if isinstance(validator, CountingLambdaValidator):
+                print(f"{'':<10} concurrent run: {validator.invocations} invocations "
+                      f"for {args.appointments} validations")
+
+
+if __name__ == '__main__':
+    main()
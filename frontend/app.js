@@ -12,6 +12,67 @@ const signupForm = document.getElementById('signup-form');
 const appointmentForm = document.getElementById('appointment-form');
 const appointmentsList = document.getElementById('appointments-list');
 const userEmailSpan = document.getElementById('user-email');
+const serviceSelect = document.getElementById('service-type');
+const dateInput = document.getElementById('date');
+const timeSelect = document.getElementById('time');
+
+// Bookable slots per day and service from /api/availability
+let availability = null;
+
+// Renew the access token this long before it expires
+const REFRESH_MARGIN_MS = 60 * 1000;
+let pendingRefresh = null;
+
+function storeSession(data) {
+    localStorage.setItem('token', data.token);
+    localStorage.setItem('tokenExpiresAt', String(Date.now() + data.expiresIn * 1000));
+    if (data.refreshToken) localStorage.setItem('refreshToken', data.refreshToken);
+}
+
+function clearSession() {
+    ['token', 'tokenExpiresAt', 'refreshToken'].forEach(key => localStorage.removeItem(key));
+}
+
+// Concurrent callers share one refresh request
+function refreshSession() {
+    if (!pendingRefresh) {
+        pendingRefresh = (async () => {
+            const refreshToken = localStorage.getItem('refreshToken');
+            if (!refreshToken) return false;
+            const response = await fetch(`${API_ENDPOINT}/auth/refresh`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ refreshToken })
+            });
+            if (response.status === 401) {
+                clearSession();
+                return false;
+            }
+            if (!response.ok) return false;
+            storeSession(await response.json());
+            return true;
+        })().catch(() => false).finally(() => { pendingRefresh = null; });
+    }
+    return pendingRefresh;
+}
+
+// fetch with the access token, renewed shortly before it expires and
+// once more if the API still rejects it
+async function authFetch(url, options = {}) {
+    const expiresAt = Number(localStorage.getItem('tokenExpiresAt') || 0);
+    if (expiresAt && Date.now() > expiresAt - REFRESH_MARGIN_MS) {
+        await refreshSession();
+    }
+    const send = () => fetch(url, {
+        ...options,
+        headers: { ...options.headers, 'Authorization': localStorage.getItem('token') }
+    });
+    const response = await send();
+    if (response.status === 401 && await refreshSession()) {
+        return send();
+    }
+    return response;
+}
 
 // Auth Form Handlers
 document.getElementById('login-btn').addEventListener('click', () => {
@@ -28,7 +89,8 @@ document.getElementById('signup-btn').addEventListener('click', () => {
 
 document.getElementById('logout-btn').addEventListener('click', async () => {
     try {
-        await fetch(`${API_ENDPOINT}/auth/logout`, { method: 'POST' });
+        await authFetch(`${API_ENDPOINT}/auth/logout`, { method: 'POST' });
+        clearSession();
         currentUser = null;
         updateAuthUI();
     } catch (error) {
@@ -55,8 +117,8 @@ loginForm.addEventListener('submit', async (e) => {
             throw new Error(data.error || 'Login failed');
         }
         
-        // Store the token in localStorage
-        localStorage.setItem('token', data.token);
+        // Store the tokens in localStorage
+        storeSession(data);
         currentUser = data.user;
         updateAuthUI();
         loadUserAppointments();
@@ -137,79 +199,207 @@ appointmentForm.addEventListener('submit', async (e) => {
             throw new Error('Please login to book an appointment');
         }
 
-        const response = await fetch('/api/appointments', {
+        const response = await authFetch('/api/appointments', {
             method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-                'Authorization': token
-            },
+            headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify(appointmentData)
         });
 
         if (!response.ok) {
             const errorData = await response.json();
+            if (response.status === 409) {
+                loadAvailability();
+            }
             throw new Error(errorData.error || 'Failed to book appointment');
         }
 
         showSuccess('Appointment booked successfully!');
         appointmentForm.reset();
         loadUserAppointments();
+        loadAvailability();
     } catch (error) {
         showError(error.message);
     }
 });
 
+// Availability: one request covers the whole booking window, then the
+// time options are filtered locally as the service and date change
+async function loadAvailability() {
+    try {
+        const response = await fetch(`${API_ENDPOINT}/availability`, { cache: 'no-cache' });
+        if (!response.ok) {
+            return;
+        }
+        availability = await response.json();
+        dateInput.min = availability.from;
+        updateTimeOptions();
+    } catch (error) {
+        console.error('Error loading availability:', error);
+    }
+}
+
+function isBookable(day, service, time) {
+    const masks = availability.open[day];
+    const serviceIndex = availability.services.indexOf(service);
+    const slotIndex = availability.slots.indexOf(time);
+    return Boolean(masks) && serviceIndex >= 0 && slotIndex >= 0
+        && ((masks[serviceIndex] >> slotIndex) & 1) === 1;
+}
+
+function updateTimeOptions() {
+    if (!availability) {
+        return;
+    }
+    const service = serviceSelect.value;
+    const day = dateInput.value;
+    // Until both are chosen every time stays selectable
+    const filter = Boolean(service && day) && day >= availability.from && day <= availability.to;
+    let anyOpen = false;
+    for (const option of timeSelect.options) {
+        if (!option.value) {
+            continue;
+        }
+        option.disabled = filter && !isBookable(day, service, option.value);
+        anyOpen = anyOpen || !option.disabled;
+    }
+    if (timeSelect.selectedOptions[0] && timeSelect.selectedOptions[0].disabled) {
+        timeSelect.value = '';
+    }
+    dateInput.setCustomValidity(filter && !anyOpen ? 'No openings for this service on this day' : '');
+}
+
+serviceSelect.addEventListener('change', updateTimeOptions);
+dateInput.addEventListener('change', updateTimeOptions);
+
 // Image Upload Handler
-async function uploadImage(file) {
+async function uploadImages(files) {
     try {
-        const token = localStorage.getItem('token');
-        // Get presigned URL
-        const response = await fetch(`${API_ENDPOINT}/upload-url`, {
+        // Get all presigned URLs in one request
+        const response = await authFetch(`${API_ENDPOINT}/upload-urls`, {
             method: 'POST',
-            headers: { 
-                'Content-Type': 'application/json',
-                'Authorization': token
-            },
-            body: JSON.stringify({ fileName: file.name, fileType: file.type })
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                files: files.map(file => ({ fileName: file.name, fileType: file.type }))
+            })
         });
 
-        if (!response.ok) throw new Error('Failed to get upload URL');
+        if (!response.ok) throw new Error('Failed to get upload URLs');
         
-        const { uploadUrl, imageUrl } = await response.json();
+        const { uploads } = await response.json();
 
-        // Upload to S3
-        await fetch(uploadUrl, {
+        // Upload to S3 in parallel
+        await Promise.all(uploads.map(({ uploadUrl }, i) => fetch(uploadUrl, {
             method: 'PUT',
-            body: file,
-            headers: { 'Content-Type': file.type }
-        });
+            body: files[i],
+            headers: { 'Content-Type': files[i].type }
+        })));
+
+        return uploads.map(({ imageUrl }) => imageUrl);
+    } catch (error) {
+        throw new Error('Image upload failed');
+    }
+}
+
+// Files above this size go through the multipart flow
+const MULTIPART_THRESHOLD = 8 * 1024 * 1024;
+const PART_CONCURRENCY = 4;
+const PART_RETRIES = 3;
+
+async function postJSON(path, body) {
+    const response = await authFetch(`${API_ENDPOINT}${path}`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(body)
+    });
+    const data = await response.json();
+    if (!response.ok) throw new Error(data.error || 'Request failed');
+    return data;
+}
+
+// Upload one part, retrying so a dropped connection only resends that part.
+// The bucket's CORS configuration must expose the ETag header.
+async function uploadPart(url, blob) {
+    let lastError;
+    for (let attempt = 0; attempt < PART_RETRIES; attempt++) {
+        try {
+            const response = await fetch(url, { method: 'PUT', body: blob });
+            if (!response.ok) throw new Error(`Part upload failed: ${response.status}`);
+            return response.headers.get('ETag');
+        } catch (error) {
+            lastError = error;
+        }
+    }
+    throw lastError;
+}
 
+async function uploadLargeImage(file) {
+    const upload = await postJSON('/uploads', {
+        fileName: file.name,
+        fileType: file.type,
+        fileSize: file.size
+    });
+    const { key, uploadId, partSize } = upload;
+
+    try {
+        const queue = [...upload.parts];
+        const completed = [];
+        const worker = async () => {
+            while (queue.length) {
+                const { partNumber, url } = queue.shift();
+                const start = (partNumber - 1) * partSize;
+                const etag = await uploadPart(url, file.slice(start, start + partSize));
+                completed.push({ partNumber, etag });
+            }
+        };
+        await Promise.all(Array.from({ length: PART_CONCURRENCY }, worker));
+
+        const { imageUrl } = await postJSON('/uploads/complete', { key, uploadId, parts: completed });
         return imageUrl;
     } catch (error) {
+        await postJSON('/uploads/abort', { key, uploadId }).catch(() => {});
         throw new Error('Image upload failed');
     }
 }
 
+async function uploadImage(file) {
+    if (file.size > MULTIPART_THRESHOLD) {
+        return uploadLargeImage(file);
+    }
+    const [imageUrl] = await uploadImages([file]);
+    return imageUrl;
+}
+
 
 // Load User Appointments
-async function loadUserAppointments() {
+let nextAppointmentsCursor = null;
+
+async function loadUserAppointments(cursor = null) {
     if (!currentUser) return;
 
     try {
-        const response = await fetch(`${API_ENDPOINT}/appointments`);
+        const params = new URLSearchParams();
+        if (cursor) params.set('cursor', cursor);
+
+        // Always revalidate: an unchanged list comes back as a bodiless 304
+        // and is served from the browser cache
+        const response = await authFetch(`${API_ENDPOINT}/appointments?${params}`, {
+            cache: 'no-cache'
+        });
         if (!response.ok) throw new Error('Failed to load appointments');
 
-        const appointments = await response.json();
-        displayAppointments(appointments);
+        const page = await response.json();
+        nextAppointmentsCursor = page.nextCursor;
+        displayAppointments(page.items, Boolean(cursor));
     } catch (error) {
         showError('Failed to load appointments');
     }
 }
 
 // Display Appointments
-function displayAppointments(appointments) {
+function displayAppointments(appointments, append = false) {
     const container = document.getElementById('appointments-container');
-    container.innerHTML = '';
+    if (!append) container.innerHTML = '';
+    document.getElementById('load-more-btn')?.remove();
 
     appointments.forEach(appointment => {
         const card = document.createElement('div');
@@ -220,12 +410,48 @@ function displayAppointments(appointments) {
             <p><strong>Date:</strong> ${formatDate(appointment.date)}</p>
             <p><strong>Time:</strong> ${appointment.time}</p>
             <p><strong>Status:</strong> <span class="status-${appointment.status.toLowerCase()}">${appointment.status}</span></p>
-            ${appointment.imageUrl ? `<img src="${appointment.imageUrl}" alt="Car Image" style="max-width: 100%; margin-top: 1rem;">` : ''}
         `;
+        if (appointment.imageUrl) card.appendChild(renderAppointmentImage(appointment));
         container.appendChild(card);
     });
 
-    appointmentsList.style.display = appointments.length ? 'block' : 'none';
+    if (nextAppointmentsCursor) {
+        const loadMore = document.createElement('button');
+        loadMore.id = 'load-more-btn';
+        loadMore.textContent = 'Load more';
+        loadMore.addEventListener('click', () => loadUserAppointments(nextAppointmentsCursor));
+        container.after(loadMore);
+    }
+
+    appointmentsList.style.display = container.children.length ? 'block' : 'none';
+}
+
+// Prefer the small derivatives; fall back to the original while they are
+// still being generated. Built with DOM APIs because the URLs come from
+// user input and must never be parsed as markup.
+function renderAppointmentImage(appointment) {
+    const derivatives = appointment.imageDerivatives;
+    const img = document.createElement('img');
+    img.alt = 'Car Image';
+    img.style.maxWidth = '100%';
+    img.style.marginTop = '1rem';
+    if (!derivatives) {
+        img.src = appointment.imageUrl;
+        return img;
+    }
+
+    const picture = document.createElement('picture');
+    const source = document.createElement('source');
+    source.srcset = derivatives.thumb_webp;
+    source.type = 'image/webp';
+    img.loading = 'lazy';
+    img.addEventListener('error', () => {
+        source.remove();
+        img.src = appointment.imageUrl;
+    }, { once: true });
+    img.src = derivatives.thumb_jpg;
+    picture.append(source, img);
+    return picture;
 }
 
 // UI Helpers
@@ -270,4 +496,5 @@ function formatDate(dateString) {
 
 // Initialize
 updateAuthUI();
+loadAvailability();
 
@@ -0,0 +1,19 @@
+import os
+
+from aws.clients import reset_clients
+
+# Gunicorn settings for serving app:app
+bind = '0.0.0.0:5555'
+workers = int(os.getenv('WEB_CONCURRENCY', '4'))
+# Per-process limits (aws.ratelimit) split their budget between workers
+os.environ['WEB_CONCURRENCY'] = str(workers)
+threads = 8
+preload_app = True
+
+
+def post_fork(server, worker):
+    # Workers must not share the master's AWS connection pools
+    reset_clients()
+    # Threads started in the master would not survive the fork
+    import app
+    app.start_background_tasks()
@@ -0,0 +1,48 @@
+import os
+import sys
+import uuid
+
+import pytest
+
+# The app is run from the repository root rather than installed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def aws_mock():
+    """moto stand-ins for every AWS service, provisioned like a deployment."""
+    moto = pytest.importorskip('moto')
+    os.environ.update(AWS_ACCESS_KEY_ID='testing', AWS_SECRET_ACCESS_KEY='testing',
+                      AWS_DEFAULT_REGION='us-east-1')
+    os.environ.pop('AWS_ENDPOINT_URL', None)
+    with moto.mock_aws():
+        from aws.provision import main as provision
+        assert provision([]) == 0
+        yield
+
+
+@pytest.fixture(scope='session')
+def app_module(aws_mock):
+    import app
+    from aws.ratelimit import make_limiter
+    # Every test user signs up from the same address
+    app.rate_limiter = make_limiter(url=None, enabled=False)
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+def sign_in(client):
+    email = f'{uuid.uuid4().hex[:12]}@example.com'
+    client.post('/api/auth/signup', json={'email': email, 'password': 'Passw0rd!'})
+    response = client.post('/api/auth/login', json={'email': email, 'password': 'Passw0rd!'})
+    return {'Authorization': response.json['token']}
+
+
+@pytest.fixture
+def auth(client):
+    """Authorization header of a freshly signed-up user."""
+    return sign_in(client)
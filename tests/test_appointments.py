@@ -0,0 +1,106 @@
+import itertools
+from datetime import date, timedelta
+
+import pytest
+
+from aws.dynamodb_utils import book_appointment
+
+# The table is shared by the whole session, so every test books its own day
+_days = itertools.count(7)
+
+
+@pytest.fixture
+def day():
+    while True:
+        current = date.today() + timedelta(days=next(_days))
+        if current.weekday() < 5:
+            return current.isoformat()
+
+
+def appointment(day, time='10:00', **overrides):
+    data = {'carMake': 'Toyota', 'carModel': 'Corolla', 'carYear': '2019',
+            'serviceType': 'oil-change', 'date': day, 'time': time}
+    data.update(overrides)
+    return data
+
+
+def test_batch_item_that_fails_to_build_keeps_its_slot_free(client, auth, day, app_module):
+    response = client.post('/api/appointments/batch', headers=auth, json={'appointments': [
+        appointment(day, imageUrl=5),
+        appointment(day),
+    ]})
+    assert response.status_code == 207
+    failed, created = response.json['results']
+    assert failed['status'] == 'failed'
+    assert created['status'] == 'created'
+    assert app_module.get_availability_index().remaining(day, '10:00') == 0
+
+
+def test_slot_taken_by_another_worker_is_a_conflict(client, auth, day, app_module):
+    # Booked behind this worker's availability index, as another worker would
+    other = app_module.build_appointment('other-worker', 'someone@example.com', appointment(day))
+    book_appointment(other, app_module.SERVICE_BAYS, app_module.APPOINTMENTS_TABLE)
+
+    response = client.post('/api/appointments', headers=auth, json=appointment(day))
+    assert response.status_code == 409
+    assert client.post('/api/appointments', headers=auth,
+                       json=appointment(day, time='11:00')).status_code == 201
+
+
+def test_pages_follow_the_cursor(client, auth, day):
+    times = ('09:00', '10:00', '11:00')
+    for time in times:
+        assert client.post('/api/appointments', headers=auth,
+                           json=appointment(day, time=time)).status_code == 201
+
+    seen = []
+    cursor = None
+    for _ in range(len(times)):
+        query = {'limit': 2, **({'cursor': cursor} if cursor else {})}
+        page = client.get('/api/appointments', headers=auth, query_string=query).json
+        assert len(page['items']) <= 2
+        seen.extend(item['appointment_id'] for item in page['items'])
+        cursor = page['nextCursor']
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen)) == len(times)
+
+
+def test_bad_cursor_is_rejected(client, auth):
+    response = client.get('/api/appointments', headers=auth, query_string={'cursor': '!!!'})
+    assert response.status_code == 400
+
+
+def test_batch_reports_each_item(client, auth, day):
+    response = client.post('/api/appointments/batch', headers=auth, json={'appointments': [
+        appointment(day, time='09:00'),
+        appointment(day, time='09:00'),
+        appointment(day, time='10:00', serviceType='paint-job'),
+        {'carMake': 'Toyota'},
+        'not an appointment',
+    ]})
+    assert response.status_code == 207
+    assert response.json['created'] == 1
+    assert [result['status'] for result in response.json['results']] == [
+        'created', 'conflict', 'invalid', 'invalid', 'invalid',
+    ]
+
+
+def test_batch_of_valid_appointments(client, auth, day):
+    response = client.post('/api/appointments/batch', headers=auth, json={'appointments': [
+        appointment(day, time=time) for time in ('13:00', '14:00', '15:00')
+    ]})
+    assert response.status_code == 201
+    results = response.json['results']
+    assert all(result['status'] == 'created' and result['bay'] == 0 for result in results)
+
+    listed = client.get('/api/appointments', headers=auth, query_string={'from': day, 'to': day})
+    assert {item['appointment_id'] for item in listed.json['items']} >= {
+        result['appointment_id'] for result in results
+    }
+
+
+@pytest.mark.parametrize('body', [{}, {'appointments': []}, {'appointments': {}},
+                                  {'appointments': [{}] * 101}])
+def test_batch_rejects_bad_requests(client, auth, body):
+    assert client.post('/api/appointments/batch', headers=auth, json=body).status_code == 400
@@ -0,0 +1,60 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip('asgiref')
+
+
+@pytest.fixture(scope='module')
+def asgi(app_module):
+    import asgi
+    return asgi
+
+
+def make_request(asgi, method='GET', path='/', headers=(), body=b''):
+    scope = {'method': method, 'path': path, 'client': ('127.0.0.1', 50000),
+             'headers': [(name.encode(), value.encode()) for name, value in headers]}
+    return asgi.Request(scope, body)
+
+
+@pytest.mark.parametrize('if_none_match, status', [
+    (None, 200),
+    ('"{etag}"', 304),
+    ('"other", "{etag}"', 304),
+    ('W/"{etag}"', 304),
+    ('*', 304),
+    ('"{etag}-suffix"', 200),
+    ('"prefix-{etag}"', 200),
+])
+def test_appointment_list_etag(asgi, app_module, if_none_match, status):
+    body = '{"items":[],"nextCursor":null}'
+    etag = app_module.appointment_list_etag(body)
+    headers = [('If-None-Match', if_none_match.format(etag=etag))] if if_none_match else []
+    response = asgi.cached_appointment_response(make_request(asgi, headers=headers), body)
+    assert response.status == status
+    assert ('ETag', f'"{etag}"') in response.headers
+
+
+@pytest.mark.parametrize('payload, message', [
+    ([1, 2], 'JSON object'),
+    ('text', 'JSON object'),
+    ({'email': 'a@example.com', 'password': 12345678}, 'Password is required'),
+    ({'email': ['a@example.com'], 'password': 'Passw0rd!'}, 'Email is required'),
+])
+def test_signup_rejects_bad_bodies(asgi, client, payload, message):
+    request = make_request(asgi, 'POST', '/api/auth/signup', body=json.dumps(payload).encode())
+    response = asyncio.run(asgi.signup(request))
+    assert response.status == 400
+    assert message in json.loads(response.body)['error']
+
+    response = client.post('/api/auth/signup', json=payload)
+    assert response.status_code == 400
+    assert message in response.json['error']
+
+
+@pytest.mark.parametrize('payload', [['email', 'password'], 'email password'])
+def test_login_rejects_bodies_that_are_not_objects(asgi, client, payload):
+    request = make_request(asgi, 'POST', '/api/auth/login', body=json.dumps(payload).encode())
+    assert asyncio.run(asgi.login(request)).status == 400
+    assert client.post('/api/auth/login', json=payload).status_code == 400
@@ -0,0 +1,80 @@
+import gzip
+
+import pytest
+
+from aws.assets import IMMUTABLE, REVALIDATE, AssetBundle, parse_accept_encoding
+
+SCRIPT = b'console.log("booking form");\n' * 50
+
+
+@pytest.fixture
+def bundle(tmp_path):
+    (tmp_path / 'js').mkdir()
+    (tmp_path / 'js' / 'app.js').write_bytes(SCRIPT)
+    (tmp_path / 'logo.png').write_bytes(b'\x89PNG' + bytes(200))
+    (tmp_path / 'index.html').write_text(
+        '<script src="js/app.js?v=1"></script><img src="/logo.png">'
+        '<a href="https://example.com/js/app.js">x</a><a href="#top">top</a>'
+    )
+    return AssetBundle(str(tmp_path))
+
+
+def test_assets_are_served_under_both_names(bundle):
+    hashed = bundle.hashed_names['js/app.js']
+    assert hashed.startswith('js/app.') and hashed.endswith('.js') and hashed != 'js/app.js'
+    assert bundle.get('js/app.js').cache_control == REVALIDATE
+    assert bundle.get(hashed).cache_control == IMMUTABLE
+    assert bundle.get(hashed).digest == bundle.get('js/app.js').digest
+
+
+def test_pages_reference_hashed_names(bundle):
+    page = bundle.get('index.html').variants[None][0].decode()
+    assert f'src="{bundle.hashed_names["js/app.js"]}?v=1"' in page
+    assert f'src="/{bundle.hashed_names["logo.png"]}"' in page
+    assert 'href="https://example.com/js/app.js"' in page
+    assert 'href="#top"' in page
+    assert bundle.get('index.html').cache_control == REVALIDATE
+
+
+def test_text_is_precompressed_and_images_are_not(bundle):
+    script = bundle.get('js/app.js')
+    body, etag = script.variants['gzip']
+    assert gzip.decompress(body) == SCRIPT
+    assert etag != script.variants[None][1]
+    assert list(bundle.get('logo.png').variants) == [None]
+
+
+@pytest.mark.parametrize('header, expected', [
+    (None, None),
+    ('gzip', 'gzip'),
+    ('gzip;q=0, deflate', None),
+    ('*', 'gzip'),
+    ('*, gzip;q=0', None),
+])
+def test_negotiate_without_brotli(bundle, header, expected):
+    script = bundle.get('js/app.js')
+    script.variants.pop('br', None)
+    assert script.negotiate(header) == expected
+
+
+def test_brotli_is_preferred_when_available(tmp_path):
+    pytest.importorskip('brotli')
+    (tmp_path / 'app.js').write_bytes(SCRIPT)
+    assert AssetBundle(str(tmp_path)).get('app.js').negotiate('gzip, br') == 'br'
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding('gzip;q=0.5, BR , identity;q=bad') == {
+        'gzip': 0.5, 'br': 1.0, 'identity': 0.0,
+    }
+
+
+def test_served_with_etag_revalidation(client, app_module):
+    name = next(iter(app_module.static_assets.hashed_names.values()))
+    response = client.get(f'/{name}', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == IMMUTABLE
+    etag = response.headers['ETag']
+    again = client.get(f'/{name}', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert again.status_code == 304
+    assert client.get('/missing.js').status_code == 404
@@ -0,0 +1,63 @@
+from datetime import date, datetime
+
+import pytest
+
+from aws.availability import AvailabilityIndex
+from aws.rules import OK, SERVICES, SLOTS, check_appointment
+
+DAY = '2030-06-03'  # a Monday
+
+
+def test_reserve_until_full_and_release():
+    index = AvailabilityIndex(capacity=2)
+    assert index.reserve(DAY, '10:00')
+    assert index.reserve(DAY, '10:00')
+    assert not index.reserve(DAY, '10:00')
+    assert index.remaining(DAY, '10:00') == 0
+    index.release(DAY, '10:00')
+    assert index.remaining(DAY, '10:00') == 1
+
+
+def test_unknown_slot_is_never_reserved():
+    index = AvailabilityIndex()
+    assert not index.reserve(DAY, '12:00')
+    assert index.remaining(DAY, '12:00') == 0
+
+
+def test_load_counts_bookings():
+    index = AvailabilityIndex(capacity=3)
+    index.load([{'date': DAY, 'time': '09:00'}] * 2 + [{'date': DAY, 'time': 'bogus'}])
+    assert index.query(date(2030, 6, 3), date(2030, 6, 4)) == {
+        DAY: [1] + [3] * (len(SLOTS) - 1),
+        '2030-06-04': [3] * len(SLOTS),
+    }
+
+
+@pytest.mark.parametrize('capacity', [1, 255, 256, 1000])
+def test_counts_reach_any_capacity(capacity):
+    index = AvailabilityIndex(capacity=capacity)
+    index.load([{'date': DAY, 'time': '09:00'}] * (capacity + 5))
+    assert index.remaining(DAY, '09:00') == 0
+    index.release(DAY, '09:00')
+    assert index.reserve(DAY, '09:00')
+    assert not index.reserve(DAY, '09:00')
+
+
+def test_calendar_skips_full_slots_and_weekends():
+    index = AvailabilityIndex()
+    index.reserve(DAY, '09:00')
+    days = index.calendar(date(2030, 6, 3), date(2030, 6, 9), now=datetime(2030, 6, 1, 12))
+    assert sorted(days) == ['2030-06-03', '2030-06-04', '2030-06-05', '2030-06-06', '2030-06-07']
+    assert not any(mask & 1 for mask in days[DAY])
+    assert all(mask & 1 for mask in days['2030-06-04'][:2])
+
+
+def test_calendar_only_lists_slots_the_rules_accept():
+    now = datetime(2030, 6, 5, 10, 30)
+    days = AvailabilityIndex().calendar(date(2030, 6, 1), date(2030, 6, 10), now=now)
+    for day in (date(2030, 6, d) for d in range(1, 11)):
+        masks = days.get(day.isoformat(), [0] * len(SERVICES))
+        for service, mask in zip(SERVICES, masks):
+            for bit, slot in enumerate(SLOTS):
+                accepted = check_appointment(day.isoformat(), slot, service, now=now) == OK
+                assert bool(mask >> bit & 1) == accepted, (day, slot, service)
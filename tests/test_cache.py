@@ -0,0 +1,168 @@
+import pytest
+
+from aws import cache as cache_module
+from aws.cache import MemoryCache, RedisCache
+
+
+class FakeRedis:
+    """Just the commands RedisCache uses, with EXPIRE recorded."""
+
+    def __init__(self):
+        self.hashes = {}
+        self.values = {}
+        self.expiry = {}
+
+    def hget(self, key, field):
+        value = self.hashes.get(key, {}).get(field)
+        return value.encode() if value is not None else None
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value
+
+    def hlen(self, key):
+        return len(self.hashes.get(key, {}))
+
+    def get(self, key):
+        value = self.values.get(key)
+        return str(value).encode() if value is not None else None
+
+    def incr(self, key):
+        self.values[key] = self.values.get(key, 0) + 1
+        return self.values[key]
+
+    def expire(self, key, seconds):
+        self.expiry[key] = seconds
+
+    def delete(self, key):
+        self.hashes.pop(key, None)
+        self.expiry.pop(key, None)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+    monotonic = time
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module, 'time', clock)
+    return clock
+
+
+def test_redis_cache_round_trip():
+    client = FakeRedis()
+    cache = RedisCache(client, ttl=60, stale_ttl=600)
+    cache.set('a@b.com', 'page-1', '{"items":[]}')
+    assert cache.get('a@b.com', 'page-1') == '{"items":[]}'
+    assert cache.get('a@b.com', 'page-2') is None
+    assert client.expiry['appointments:a@b.com'] == 660
+
+
+def test_redis_cache_invalidate_drops_every_variant():
+    cache = RedisCache(FakeRedis(), ttl=60, stale_ttl=600)
+    cache.set('a@b.com', 'page-1', 'one')
+    cache.set('a@b.com', 'page-2', 'two')
+    cache.set('c@d.com', 'page-1', 'other')
+    cache.invalidate('a@b.com')
+    assert cache.get('a@b.com', 'page-1') is None
+    assert cache.get('a@b.com', 'page-2') is None
+    assert cache.get('c@d.com', 'page-1') == 'other'
+
+
+def test_redis_cache_expiry_and_stale(clock):
+    cache = RedisCache(FakeRedis(), ttl=60, stale_ttl=600)
+    cache.set('a@b.com', 'page-1', 'body')
+    clock.now += 61
+    assert cache.get('a@b.com', 'page-1') is None
+    assert cache.get_stale('a@b.com', 'page-1') == 'body'
+    clock.now += 600
+    assert cache.get_stale('a@b.com', 'page-1') is None
+
+
+def test_redis_cache_disabled():
+    client = FakeRedis()
+    cache = RedisCache(client, ttl=0, stale_ttl=600)
+    cache.set('a@b.com', 'page-1', 'body')
+    assert client.hashes == {}
+
+
+def test_memory_cache_expiry_and_stale(clock):
+    cache = MemoryCache(ttl=60, stale_ttl=600)
+    cache.set('a@b.com', 'page-1', 'body')
+    assert cache.get('a@b.com', 'page-1') == 'body'
+    clock.now += 61
+    assert cache.get('a@b.com', 'page-1') is None
+    assert cache.get_stale('a@b.com', 'page-1') == 'body'
+
+
+def test_memory_cache_without_ttl_only_keeps_stale_copies():
+    cache = MemoryCache(ttl=0, stale_ttl=600)
+    cache.set('a@b.com', 'page-1', 'body')
+    assert cache.get('a@b.com', 'page-1') is None
+    assert cache.get_stale('a@b.com', 'page-1') == 'body'
+
+
+def test_memory_cache_evicts_least_recently_used_owner():
+    cache = MemoryCache(maxsize=2, ttl=60, stale_ttl=0)
+    cache.set('a', 'v', 1)
+    cache.set('b', 'v', 2)
+    cache.get('a', 'v')
+    cache.set('c', 'v', 3)
+    assert cache.get('b', 'v') is None
+    assert cache.get('a', 'v') == 1
+    assert cache.get('c', 'v') == 3
+
+
+@pytest.fixture(params=['memory', 'redis'])
+def cache(request):
+    if request.param == 'memory':
+        return MemoryCache(ttl=60, stale_ttl=600, max_variants=3)
+    return RedisCache(FakeRedis(), ttl=60, stale_ttl=600, max_variants=3)
+
+
+def test_variants_per_owner_are_capped(cache):
+    for n in range(10):
+        cache.set('a@b.com', f'page-{n}', n)
+    assert cache.get('a@b.com', 'page-9') == 9
+    assert sum(cache.get('a@b.com', f'page-{n}') is not None for n in range(10)) <= 3
+
+
+def test_memory_cache_keeps_most_recent_variants():
+    cache = MemoryCache(ttl=60, stale_ttl=0, max_variants=2)
+    for n in range(3):
+        cache.set('a@b.com', f'page-{n}', n)
+    assert cache.get('a@b.com', 'page-0') is None
+    assert cache.get('a@b.com', 'page-1') == 1
+
+
+def test_write_after_invalidation_is_dropped(cache):
+    generation = cache.generation('a@b.com')
+    cache.invalidate('a@b.com')
+    cache.set('a@b.com', 'page-1', 'stale', generation)
+    assert cache.get('a@b.com', 'page-1') is None
+
+    cache.set('a@b.com', 'page-1', 'fresh', cache.generation('a@b.com'))
+    assert cache.get('a@b.com', 'page-1') == 'fresh'
+
+
+def test_invalidating_another_owner_keeps_the_write(cache):
+    generation = cache.generation('a@b.com')
+    cache.invalidate('c@d.com')
+    cache.set('a@b.com', 'page-1', 'body', generation)
+    assert cache.get('a@b.com', 'page-1') == 'body'
+
+
+def test_memory_cache_generation_survives_eviction():
+    cache = MemoryCache(maxsize=1, ttl=60, stale_ttl=0)
+    generation = cache.generation('a@b.com')
+    cache.invalidate('a@b.com')
+    cache.invalidate('c@d.com')
+    cache.set('a@b.com', 'page-1', 'stale', generation)
+    assert cache.get('a@b.com', 'page-1') is None
+
@@ -0,0 +1,38 @@
+import threading
+
+from aws import clients
+
+
+def test_resources_are_per_thread_and_created_under_the_lock(aws_mock, monkeypatch):
+    clients.reset_clients()
+    session = clients._get_session()
+    created_while_locked = []
+    original = session.resource
+
+    def resource(*args, **kwargs):
+        created_while_locked.append(clients._lock.locked())
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(session, 'resource', resource)
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(clients.get_resource('dynamodb')))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert created_while_locked == [True] * 4
+    assert len({id(resource) for resource in seen}) == 4
+    assert clients.get_resource('dynamodb') is clients.get_resource('dynamodb')
+
+
+def test_clients_are_shared_between_threads(aws_mock):
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(clients.get_client('s3')))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(client) for client in seen}) == 1
@@ -0,0 +1,151 @@
+import itertools
+import uuid
+from datetime import date, timedelta
+
+import pytest
+
+from aws import dynamodb_utils
+from aws.dynamodb_utils import (
+    SlotUnavailableError, book_appointment, booking_attempts, decode_cursor, encode_cursor,
+)
+from aws.models import Appointment
+
+
+class Cancelled(Exception):
+    def __init__(self, *codes):
+        self.response = {'CancellationReasons': [{'Code': code} for code in codes]}
+
+
+SLOT_TAKEN = Cancelled('ConditionalCheckFailed', 'None')
+IN_FLIGHT = Cancelled('TransactionConflict', 'None')
+
+
+def make_appointment(date='2030-06-03', appointment_id='a-1'):
+    return Appointment(appointment_id=appointment_id, user_email='a@example.com',
+                       car_make='Toyota', car_model='Corolla', car_year='2019',
+                       service_type='oil-change', date=date, time='10:00',
+                       created_at='2030-01-01T00:00:00')
+
+
+def lock_of(transact_items):
+    return transact_items[0]['Put']['Item']['appointment_id']['S']
+
+
+def run(attempts, errors):
+    """Answer each attempt with the next error; None means the write succeeded."""
+    plan = []
+    delay, items = next(attempts)
+    for error in errors:
+        plan.append((delay, lock_of(items)))
+        if error is None:
+            return plan
+        delay, items = attempts.send(error)
+    raise AssertionError('more attempts than expected')
+
+
+def test_first_bay_free():
+    appointment = make_appointment()
+    assert run(booking_attempts(appointment, capacity=2), [None]) == [(0, 'slot#2030-06-03#10:00#0')]
+    assert appointment.bay == 0
+
+
+def test_taken_bay_moves_on_without_waiting():
+    appointment = make_appointment()
+    plan = run(booking_attempts(appointment, capacity=2), [SLOT_TAKEN, None])
+    assert plan == [(0, 'slot#2030-06-03#10:00#0'), (0, 'slot#2030-06-03#10:00#1')]
+    assert appointment.bay == 1
+
+
+def test_contended_bay_is_retried_after_a_backoff(monkeypatch):
+    monkeypatch.setattr(dynamodb_utils, 'conflict_backoff', lambda attempt: 0.1 * (attempt + 1))
+    plan = run(booking_attempts(make_appointment(), capacity=1), [IN_FLIGHT, IN_FLIGHT, None])
+    assert plan == [(0, 'slot#2030-06-03#10:00#0'), (0.1, 'slot#2030-06-03#10:00#0'),
+                    (0.2, 'slot#2030-06-03#10:00#0')]
+
+
+def test_every_bay_taken():
+    appointment = make_appointment()
+    attempts = booking_attempts(appointment, capacity=2)
+    next(attempts)
+    attempts.send(SLOT_TAKEN)
+    with pytest.raises(SlotUnavailableError):
+        attempts.send(SLOT_TAKEN)
+    assert appointment.bay is None
+
+
+def test_contention_that_never_clears_counts_as_taken(monkeypatch):
+    monkeypatch.setattr(dynamodb_utils, 'conflict_backoff', lambda attempt: 0)
+    attempts = booking_attempts(make_appointment(), capacity=1)
+    next(attempts)
+    with pytest.raises(SlotUnavailableError):
+        for _ in range(dynamodb_utils.SLOT_CONFLICT_ATTEMPTS):
+            attempts.send(IN_FLIGHT)
+
+
+def test_other_cancellations_are_raised():
+    error = Cancelled('None', 'ValidationError')
+    attempts = booking_attempts(make_appointment())
+    next(attempts)
+    with pytest.raises(Cancelled) as raised:
+        attempts.send(error)
+    assert raised.value is error
+
+
+# Each test locks slots on a day of its own in the shared table
+_days = itertools.count()
+
+
+@pytest.fixture
+def booked_day(aws_mock):
+    return (date(2031, 1, 1) + timedelta(days=next(_days))).isoformat()
+
+
+def test_second_booking_of_a_full_slot_is_refused(booked_day):
+    first, second = (make_appointment(booked_day, str(uuid.uuid4())) for _ in range(2))
+    assert book_appointment(first, capacity=1) == 0
+    with pytest.raises(SlotUnavailableError):
+        book_appointment(second, capacity=1)
+    assert second.bay is None
+
+
+def test_bookings_fill_bays_in_order(booked_day):
+    bays = [book_appointment(make_appointment(booked_day, str(uuid.uuid4())), capacity=3)
+            for _ in range(3)]
+    assert bays == [0, 1, 2]
+    with pytest.raises(SlotUnavailableError):
+        book_appointment(make_appointment(booked_day, str(uuid.uuid4())), capacity=3)
+
+
+def test_refused_booking_writes_nothing(booked_day):
+    book_appointment(make_appointment(booked_day, str(uuid.uuid4())))
+    refused = make_appointment(booked_day, str(uuid.uuid4()))
+    with pytest.raises(SlotUnavailableError):
+        book_appointment(refused)
+    table = dynamodb_utils.get_resource('dynamodb').Table('Appointments')
+    assert 'Item' not in table.get_item(Key={'appointment_id': refused.appointment_id})
+
+
+@pytest.mark.parametrize('key', [
+    {'appointment_id': 'a-1'},
+    {'appointment_id': 'a-1', 'userEmail': 'ünïcode@example.com', 'date': '2030-06-03'},
+    {'appointment_id': 'a-1', 'bay': 3},
+])
+def test_cursor_round_trip(key):
+    cursor = encode_cursor(key)
+    assert '=' not in cursor and '/' not in cursor and '+' not in cursor
+    assert decode_cursor(cursor) == key
+
+
+@pytest.mark.parametrize('key', [None, {}])
+def test_no_cursor_without_a_key(key):
+    assert encode_cursor(key) is None
+    assert decode_cursor(None) is None
+    assert decode_cursor('') is None
+
+
+@pytest.mark.parametrize('cursor', ['!!!', 'bm90IGpzb24', encode_cursor({'a': 1})[:-3],
+                                    'WzEsMiwzXQ', 'MTIz'])
+def test_malformed_cursor(cursor):
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        decode_cursor(cursor)
+
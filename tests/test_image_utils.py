@@ -0,0 +1,79 @@
+import io
+
+import pytest
+
+from aws.image_utils import (
+    DERIVATIVE_PREFIX, DerivativePipeline, derivative_keys, is_image_key, render_derivatives,
+)
+
+BUCKET = 'autocare-derivatives-test'
+
+
+def make_image(width, height, image_format='PNG'):
+    Image = pytest.importorskip('PIL.Image')
+    mode = 'RGBA' if image_format == 'PNG' else 'RGB'
+    buffer = io.BytesIO()
+    Image.new(mode, (width, height), 'red').save(buffer, image_format)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize('key, expected', [
+    ('uploads/car.JPG', True), ('car.webp', True), ('car.gif', True),
+    ('car.pdf', False), ('car', False), ('car.jpg.exe', False),
+])
+def test_is_image_key(key, expected):
+    assert is_image_key(key) is expected
+
+
+def test_derivative_keys():
+    keys = derivative_keys('1234-abcd-car.photo.png')
+    assert keys == {
+        'thumb_webp': f'{DERIVATIVE_PREFIX}1234-abcd-car.photo-thumb.webp',
+        'thumb_jpg': f'{DERIVATIVE_PREFIX}1234-abcd-car.photo-thumb.jpg',
+        'medium_webp': f'{DERIVATIVE_PREFIX}1234-abcd-car.photo-medium.webp',
+        'medium_jpg': f'{DERIVATIVE_PREFIX}1234-abcd-car.photo-medium.jpg',
+    }
+
+
+def test_render_shrinks_but_never_upscales():
+    Image = pytest.importorskip('PIL.Image')
+    rendered = render_derivatives(make_image(2000, 1000))
+    assert set(rendered) == set(derivative_keys('car.png'))
+    sizes = {name: Image.open(io.BytesIO(body)).size for name, (body, _) in rendered.items()}
+    assert sizes['thumb_jpg'] == (320, 160)
+    assert sizes['medium_webp'] == (1024, 512)
+    assert rendered['thumb_webp'][1] == 'image/webp'
+
+    small = render_derivatives(make_image(100, 50, 'JPEG'))
+    assert Image.open(io.BytesIO(small['medium_jpg'][0])).size == (100, 50)
+
+
+@pytest.fixture
+def pipeline():
+    pipeline = DerivativePipeline(workers=1, region='us-east-1')
+    yield pipeline
+    pipeline.shutdown()
+
+
+@pytest.fixture
+def bucket(aws_mock):
+    import boto3
+    s3 = boto3.client('s3', region_name='us-east-1')
+    s3.create_bucket(Bucket=BUCKET)
+    return s3
+
+
+def test_pipeline_stores_derivatives(pipeline, bucket):
+    bucket.put_object(Bucket=BUCKET, Key='car.png', Body=make_image(800, 600))
+    keys = pipeline.submit(BUCKET, 'car.png').result(timeout=60)
+    assert keys == derivative_keys('car.png')
+    stored = bucket.head_object(Bucket=BUCKET, Key=keys['thumb_webp'])
+    assert stored['ContentType'] == 'image/webp'
+    assert 'immutable' in stored['CacheControl']
+
+
+def test_pipeline_gives_up_on_missing_or_broken_images(pipeline, bucket):
+    processes, _ = pipeline._pools()
+    assert pipeline._process(processes, BUCKET, 'missing.png', attempts=1) is None
+    bucket.put_object(Bucket=BUCKET, Key='broken.png', Body=b'not an image')
+    assert pipeline._process(processes, BUCKET, 'broken.png', attempts=1) is None
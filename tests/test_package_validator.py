@@ -0,0 +1,49 @@
+import json
+import subprocess
+import sys
+import zipfile
+
+from aws.package_validator import DEFAULT_OUTPUT, FILES, build
+
+# Runs the bundled handler on its own, the way Lambda imports it
+HANDLER_CHECK = """
+import json, sys
+sys.path.insert(0, sys.argv[1])
+import validate_appointment
+event = {'appointments': [
+    {'date': '2026-W44-1', 'time': '09:00', 'serviceType': 'oil-change'},
+    {'date': '2030-01-07', 'time': '08:00', 'serviceType': 'oil-change'},
+]}
+print(json.dumps(validate_appointment.lambda_handler(event, None)))
+"""
+
+
+def test_bundle_contains_handler_and_rules(tmp_path):
+    output = build(str(tmp_path / 'bundle.zip'))
+    with zipfile.ZipFile(output) as bundle:
+        assert sorted(bundle.namelist()) == sorted(FILES)
+
+
+def test_bundle_is_reproducible(tmp_path):
+    first = build(str(tmp_path / 'first.zip'))
+    second = build(str(tmp_path / 'second.zip'))
+    with open(first, 'rb') as a, open(second, 'rb') as b:
+        assert a.read() == b.read()
+
+
+def test_committed_bundle_is_current(tmp_path):
+    # Fails when validate_appointment.py or rules.py changed without a rebuild
+    with open(build(str(tmp_path / 'bundle.zip')), 'rb') as fresh, open(DEFAULT_OUTPUT, 'rb') as committed:
+        assert fresh.read() == committed.read(), 'run python -m aws.package_validator'
+
+
+def test_bundled_handler_answers_batches(tmp_path):
+    bundle_dir = tmp_path / 'bundle'
+    with zipfile.ZipFile(build(str(tmp_path / 'bundle.zip'))) as bundle:
+        bundle.extractall(bundle_dir)
+    output = subprocess.run(
+        [sys.executable, '-c', HANDLER_CHECK, str(bundle_dir)],
+        cwd=tmp_path, capture_output=True, text=True, check=True,
+    ).stdout
+    results = json.loads(output)['results']
+    assert [result['code'] for result in results] == ['invalid_date', 'invalid_time']
@@ -0,0 +1,16 @@
+import boto3
+
+from aws.provision import main
+
+
+def test_region_applies_to_every_service(aws_mock):
+    assert main(['--region', 'eu-west-1', '--bucket', 'autocare-provision-test',
+                 '--user-pool', 'ProvisionTestPool', '--table', 'ProvisionTest']) == 0
+
+    dynamodb = boto3.client('dynamodb', region_name='eu-west-1')
+    assert 'ProvisionTest' in dynamodb.list_tables()['TableNames']
+    assert 'ProvisionTest' not in boto3.client('dynamodb', region_name='us-east-1').list_tables()['TableNames']
+
+    cognito = boto3.client('cognito-idp', region_name='eu-west-1')
+    pools = cognito.list_user_pools(MaxResults=60)['UserPools']
+    assert 'ProvisionTestPool' in [pool['Name'] for pool in pools]
@@ -0,0 +1,165 @@
+import pytest
+
+from aws import ratelimit
+from aws.ratelimit import (
+    Limit, MemoryBuckets, RateLimiter, RedisBuckets, client_ip, make_limiter,
+    split_route_limits,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+    monotonic = time
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit, 'time', clock)
+    return clock
+
+
+class FakeRedis:
+    """Runs the token bucket script in Python against an in-memory hash."""
+
+    def __init__(self):
+        self.hashes = {}
+        self.calls = []
+
+    def eval(self, script, numkeys, key, burst, rate, now):
+        assert script == ratelimit._TAKE_SCRIPT and numkeys == 1
+        self.calls.append(key)
+        state = self.hashes.get(key, {})
+        tokens = float(state.get('tokens', burst))
+        updated = float(state.get('updated', now))
+        tokens = min(burst, tokens + max(0, now - updated) * rate)
+        wait = 0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        self.hashes[key] = {'tokens': str(tokens), 'updated': str(now)}
+        return str(wait).encode()
+
+
+class RecordingBackend:
+    blocking = False
+
+    def __init__(self, waits=None, error=None):
+        self.waits = waits or {}
+        self.error = error
+        self.keys = []
+
+    def take(self, key, burst, rate):
+        if self.error:
+            raise self.error
+        self.keys.append(key)
+        return self.waits.get(key, 0.0)
+
+
+LIMITS = {'login': (Limit('ip', 2, 1), Limit('email', 3, 0.5), Limit('route', 100, 50))}
+
+
+@pytest.mark.parametrize('make_backend', [MemoryBuckets, lambda: RedisBuckets(FakeRedis())])
+def test_bucket_allows_burst_then_refills(clock, make_backend):
+    buckets = make_backend()
+    assert [buckets.take('k', 3, 0.5) for _ in range(3)] == [0, 0, 0]
+    assert buckets.take('k', 3, 0.5) == pytest.approx(2.0)
+    clock.now += 2
+    assert buckets.take('k', 3, 0.5) == 0
+    assert buckets.take('other', 3, 0.5) == 0
+
+
+def test_memory_buckets_evict_least_recently_used(clock):
+    buckets = MemoryBuckets(maxsize=2)
+    buckets.take('a', 1, 0.1)
+    buckets.take('b', 1, 0.1)
+    buckets.take('c', 1, 0.1)
+    # 'a' was evicted, so it starts again with a full bucket
+    assert buckets.take('a', 1, 0.1) == 0
+    assert buckets.take('c', 1, 0.1) > 0
+
+
+def test_limiter_checks_each_scope_with_normalised_email():
+    backend = RecordingBackend()
+    limiter = RateLimiter(backend, LIMITS)
+    assert limiter.check('login', ip='10.0.0.1', email=' User@Example.com ') == 0
+    assert backend.keys == ['login:ip:10.0.0.1', 'login:email:user@example.com',
+                            'login:route:login']
+
+
+def test_limiter_skips_unknown_keys_and_routes():
+    backend = RecordingBackend()
+    limiter = RateLimiter(backend, LIMITS)
+    assert limiter.check('login', ip='10.0.0.1') == 0
+    assert backend.keys == ['login:ip:10.0.0.1', 'login:route:login']
+    assert limiter.check('signup', ip='10.0.0.1') == 0
+    assert len(backend.keys) == 2
+
+
+def test_limiter_rejects_before_spending_shared_buckets():
+    backend = RecordingBackend(waits={'login:ip:10.0.0.1': 1.2})
+    limiter = RateLimiter(backend, LIMITS)
+    assert limiter.check('login', ip='10.0.0.1', email='a@b.com') == 2
+    assert backend.keys == ['login:ip:10.0.0.1']
+
+
+def test_limiter_counts_admitted_and_rejected():
+    backend = RecordingBackend(waits={'login:email:a@b.com': 5})
+    limiter = RateLimiter(backend, LIMITS)
+    admitted = ratelimit.ADMITTED.value(route='login')
+    rejected = ratelimit.REJECTED.value(route='login', scope='email')
+    limiter.check('login', ip='10.0.0.1', email='c@d.com')
+    limiter.check('login', ip='10.0.0.1', email='a@b.com')
+    assert ratelimit.ADMITTED.value(route='login') == admitted + 1
+    assert ratelimit.REJECTED.value(route='login', scope='email') == rejected + 1
+
+
+def test_limiter_fails_open_when_backend_errors():
+    limiter = RateLimiter(RecordingBackend(error=ConnectionError('down')), LIMITS)
+    assert limiter.check('login', ip='10.0.0.1', email='a@b.com') == 0
+
+
+def test_limiter_over_shared_backend(clock):
+    limiter = RateLimiter(RedisBuckets(FakeRedis()), LIMITS)
+    assert [limiter.check('login', ip='10.0.0.1') for _ in range(3)] == [0, 0, 1]
+
+
+def test_disabled_limiter_admits_everything():
+    limiter = make_limiter(url=None, enabled=False)
+    assert all(limiter.check('login', ip='10.0.0.1', email='a@b.com') == 0 for _ in range(50))
+
+
+@pytest.mark.parametrize('forwarded_for, proxies, expected', [
+    (None, 1, '10.0.0.9'),
+    ('1.2.3.4', 0, '10.0.0.9'),
+    ('1.2.3.4', 1, '1.2.3.4'),
+    ('6.6.6.6, 1.2.3.4', 1, '1.2.3.4'),
+    ('6.6.6.6, 1.2.3.4, 10.0.0.2', 2, '1.2.3.4'),
+    ('1.2.3.4', 2, '10.0.0.9'),
+])
+def test_client_ip(forwarded_for, proxies, expected):
+    assert client_ip('10.0.0.9', forwarded_for, proxies) == expected
+
+
+def test_route_limits_are_split_between_workers():
+    split = split_route_limits(ratelimit.LIMITS, 4)
+    for route, limits in ratelimit.LIMITS.items():
+        for original, share in zip(limits, split[route]):
+            if original.scope == 'route':
+                assert share.rate * 4 == pytest.approx(original.rate)
+                assert share.burst * 4 <= original.burst
+            else:
+                assert share == original
+
+
+def test_in_memory_limiter_uses_its_share_of_the_route_limit():
+    limiter = make_limiter(url=None, enabled=True, workers=4)
+    route_limit = next(limit for limit in limiter.limits['login'] if limit.scope == 'route')
+    assert route_limit.rate == 50 / 4
+    assert make_limiter(url=None, enabled=True, workers=1).limits is ratelimit.LIMITS
@@ -0,0 +1,100 @@
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+from aws import resilience
+from aws.resilience import (
+    CIRCUIT_OPENED, CircuitBreaker, CircuitOpenError, get_breaker, is_unavailable, retry_after,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker('test-dependency', failure_threshold=3, reset_timeout=30)
+
+
+def client_error(code, status=400):
+    return ClientError({'Error': {'Code': code},
+                        'ResponseMetadata': {'HTTPStatusCode': status}}, 'Query')
+
+
+def test_opens_after_consecutive_failures(breaker):
+    before = CIRCUIT_OPENED.value(dependency='test-dependency')
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.record_success()
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert CIRCUIT_OPENED.value(dependency='test-dependency') == before + 1
+    with pytest.raises(CircuitOpenError) as raised:
+        breaker.before_call()
+    assert raised.value.retry_after == 30
+
+
+def test_half_open_probe_closes_or_reopens(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 30
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Only the probe goes through
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now += 30
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+
+@pytest.mark.parametrize('error, expected', [
+    (client_error('ProvisionedThroughputExceededException'), True),
+    (client_error('ThrottlingException'), True),
+    (client_error('InternalServerError', 500), True),
+    (client_error('ConditionalCheckFailedException'), False),
+    (client_error('ValidationException'), False),
+    (EndpointConnectionError(endpoint_url='https://dynamodb'), True),
+    (CircuitOpenError('dynamodb', 12.4), True),
+    (ValueError('bad input'), False),
+])
+def test_is_unavailable(error, expected):
+    assert is_unavailable(error) is expected
+
+
+def test_retry_after():
+    assert retry_after(CircuitOpenError('dynamodb', 12.4)) == 12
+    assert retry_after(CircuitOpenError('dynamodb', 0.2)) == 1
+    assert retry_after(client_error('ThrottlingException')) == resilience.DEFAULT_RETRY_AFTER
+
+
+def test_open_circuit_answers_503(client, auth):
+    breaker = get_breaker('dynamodb')
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    try:
+        response = client.get('/api/appointments', headers=auth)
+        assert response.status_code == 503
+        assert int(response.headers['Retry-After']) >= 1
+    finally:
+        breaker.record_success()
+    assert client.get('/api/appointments', headers=auth).status_code == 200
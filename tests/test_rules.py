@@ -0,0 +1,55 @@
+from datetime import datetime
+
+import pytest
+
+from aws import rules
+from aws.rules import (
+    INVALID_DATE, INVALID_TIME, OK, PAST_DATE, WEEKEND, check_appointment, validate_batch,
+)
+
+DATES = [
+    '2026-10-23', '2026-10-24', '2026-10-25', '2026-10-26', '2026-10-22', '2025-01-01',
+    '2028-02-29', '2027-02-29', '2026-13-01', '2026-10-32', '0000-01-01', '0001-01-01',
+    '9999-12-31', '2026-W44-1', '2026-299', '20261026', '2026-10-2', ' 2026-10-26',
+    '2026-10-26T09:00', '', None, 20261026, ['2026-10-26'],
+]
+TIMES = ['09:00', '16:00', '9:00', '12:00', None, ['09:00'], {'t': 1}]
+SERVICES = ['oil-change', 'repair', 'polish', None, ['repair']]
+NOWS = [
+    datetime(2026, 10, 23, 10, 30),  # Friday, mid-morning
+    datetime(2026, 10, 24, 10, 30),  # Saturday
+    datetime(2026, 10, 25, 8, 0),    # Sunday, before opening
+]
+
+
+@pytest.fixture(params=['numpy', 'pure-python'])
+def numpy_mode(request, monkeypatch):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(rules, '_numpy', False)
+    return request.param
+
+
+@pytest.mark.parametrize('now', NOWS)
+def test_batch_matches_scalar_rules(numpy_mode, now):
+    appointments = [{'date': d, 'time': t, 'serviceType': s}
+                    for d in DATES for t in TIMES for s in SERVICES]
+    expected = [check_appointment(a['date'], a['time'], a['serviceType'], now)
+                for a in appointments]
+    assert validate_batch(appointments, now) == expected
+
+
+@pytest.mark.parametrize('appointment_date, appointment_time, code', [
+    ('2026-10-24', '09:00', PAST_DATE),
+    ('2026-10-24', '16:00', WEEKEND),
+    ('2026-10-26', '09:00', OK),
+    ('0000-01-01', '09:00', INVALID_DATE),
+    ('2026-W44-1', '09:00', INVALID_DATE),
+    ('2026-10-26', ['09:00'], INVALID_TIME),
+])
+def test_edge_cases(appointment_date, appointment_time, code):
+    now = NOWS[1]
+    assert check_appointment(appointment_date, appointment_time, 'oil-change', now) == code
+    assert validate_batch([{'date': appointment_date, 'time': appointment_time,
+                            'serviceType': 'oil-change'}], now) == [code]
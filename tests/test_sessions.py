@@ -0,0 +1,111 @@
+import pytest
+
+from aws import sessions as sessions_module
+from aws.sessions import RedisSessionCache, SessionCache
+
+
+class FakeRedis:
+    """Just the string and set commands RedisSessionCache uses."""
+
+    def __init__(self):
+        self.values = {}
+        self.sets = {}
+        self.expiry = {}
+
+    def get(self, key):
+        value = self.values.get(key)
+        return value.encode() if value is not None else None
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+        self.expiry[key] = ex
+
+    def sadd(self, key, member):
+        self.sets.setdefault(key, set()).add(member.encode())
+
+    def smembers(self, key):
+        return set(self.sets.get(key, ()))
+
+    def expire(self, key, seconds):
+        self.expiry[key] = seconds
+
+    def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+            self.sets.pop(key, None)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(sessions_module, 'time', clock)
+    return clock
+
+
+@pytest.fixture(params=['memory', 'redis'])
+def cache(request, clock):
+    if request.param == 'memory':
+        return SessionCache(maxsize=10, margin=300)
+    return RedisSessionCache(FakeRedis(), margin=300)
+
+
+def test_hit_until_margin(cache, clock):
+    cache.put('refresh-1', 'alice', 'access-1', 3600)
+    assert cache.get('refresh-1')['access_token'] == 'access-1'
+    clock.now += 3600 - 300
+    assert cache.get('refresh-1') is None
+
+
+def test_invalidate(cache):
+    cache.put('refresh-1', 'alice', 'access-1', 3600)
+    cache.invalidate('refresh-1')
+    assert cache.get('refresh-1') is None
+
+
+def test_invalidate_user(cache):
+    cache.put('refresh-1', 'alice', 'access-1', 3600)
+    cache.put('refresh-2', 'alice', 'access-2', 3600)
+    cache.put('refresh-3', 'bob', 'access-3', 3600)
+    cache.invalidate_user('alice')
+    assert cache.get('refresh-1') is None
+    assert cache.get('refresh-2') is None
+    assert cache.get('refresh-3')['username'] == 'bob'
+
+
+def test_memory_lru_eviction():
+    cache = SessionCache(maxsize=2)
+    for n in range(3):
+        cache.put(f'refresh-{n}', 'alice', f'access-{n}', 3600)
+    assert cache.get('refresh-0') is None
+    assert cache.get('refresh-2') is not None
+
+
+def test_memory_size_zero_disables_caching():
+    cache = SessionCache(maxsize=0)
+    session = cache.put('refresh-1', 'alice', 'access-1', 3600)
+    assert session['access_token'] == 'access-1'
+    assert cache.get('refresh-1') is None
+
+
+def test_redis_logout_is_seen_by_every_worker(clock):
+    client = FakeRedis()
+    worker_a, worker_b = RedisSessionCache(client), RedisSessionCache(client)
+    worker_a.put('refresh-1', 'alice', 'access-1', 3600)
+    assert worker_b.get('refresh-1') is not None
+    worker_b.invalidate_user('alice')
+    assert worker_a.get('refresh-1') is None
+
+
+def test_redis_keys_expire_with_the_token(clock):
+    client = FakeRedis()
+    RedisSessionCache(client, prefix='s:').put('refresh-1', 'alice', 'access-1', 3600)
+    assert set(client.expiry.values()) == {3600}
+    assert 'refresh-1' not in ''.join(client.values)
@@ -0,0 +1,117 @@
+import json
+
+import pytest
+
+from aws import sns_utils
+from aws.sns_utils import BOOKED, DROPPED, PUBLISHED, STATUS_CHANGED, NotificationOutbox
+
+TOPIC = 'arn:aws:sns:us-east-1:123456789012:appointments'
+
+
+class Publisher:
+    """Stands in for publish_batch; answers each call with the next result."""
+
+    def __init__(self, *results):
+        self.calls = []
+        self.results = list(results)
+
+    def __call__(self, topic_arn, entries, region=None):
+        self.calls.append(entries)
+        result = self.results.pop(0) if self.results else []
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+@pytest.fixture
+def outbox():
+    # Driven by hand instead of by the worker thread
+    outbox = NotificationOutbox(TOPIC, linger=0, max_attempts=2)
+    outbox._ensure_worker = lambda: None
+    return outbox
+
+
+def test_disabled_without_topic():
+    assert not NotificationOutbox(None).enqueue(BOOKED, {})
+
+
+def test_batches_of_ten(outbox):
+    for n in range(12):
+        assert outbox.enqueue(BOOKED, {'n': n})
+    first, second = outbox._next_batch(), outbox._next_batch()
+    assert (len(first), len(second)) == (10, 2)
+    assert json.loads(first[0].message) == {'event': BOOKED, 'n': 0}
+
+
+def test_notifications_with_one_key_are_coalesced(outbox):
+    outbox.enqueue(STATUS_CHANGED, {'status': 'Confirmed'}, key='a-1')
+    outbox.enqueue(STATUS_CHANGED, {'status': 'Done'}, key='a-1')
+    outbox.enqueue(STATUS_CHANGED, {'status': 'Confirmed'}, key='a-2')
+    batch = outbox._next_batch()
+    assert {n.key: json.loads(n.message)['status'] for n in batch} == {'a-1': 'Done', 'a-2': 'Confirmed'}
+    assert len(batch) == 2
+
+
+def test_full_queue_drops():
+    outbox = NotificationOutbox(TOPIC, maxsize=1)
+    outbox._ensure_worker = lambda: None
+    before = DROPPED.value(reason='queue_full')
+    assert outbox.enqueue(BOOKED, {})
+    assert not outbox.enqueue(BOOKED, {})
+    assert DROPPED.value(reason='queue_full') == before + 1
+
+
+def test_failed_entries_are_retried_until_max_attempts(outbox, monkeypatch):
+    publisher = Publisher([{'Id': '1', 'SenderFault': False}],
+                          [{'Id': '0', 'SenderFault': False}])
+    monkeypatch.setattr(sns_utils, 'publish_batch', publisher)
+    before = PUBLISHED.value(event=BOOKED), DROPPED.value(reason='retries_exhausted')
+    outbox.enqueue(BOOKED, {'n': 0})
+    outbox.enqueue(BOOKED, {'n': 1})
+    outbox._publish(outbox._next_batch())
+    assert len(outbox._retries) == 1
+
+    outbox._retries[0].retry_at = 0
+    outbox._publish(outbox._next_batch())
+    assert [len(entries) for entries in publisher.calls] == [2, 1]
+    assert outbox._retries == []
+    assert (PUBLISHED.value(event=BOOKED), DROPPED.value(reason='retries_exhausted')) == (
+        before[0] + 1, before[1] + 1)
+
+
+def test_sender_faults_are_not_retried(outbox, monkeypatch):
+    monkeypatch.setattr(sns_utils, 'publish_batch',
+                        Publisher([{'Id': '0', 'SenderFault': True, 'Message': 'too big'}]))
+    outbox.enqueue(BOOKED, {})
+    outbox._publish(outbox._next_batch())
+    assert outbox._retries == []
+
+
+def test_outage_retries_the_whole_batch(outbox, monkeypatch):
+    monkeypatch.setattr(sns_utils, 'is_unavailable', lambda error: True)
+    monkeypatch.setattr(sns_utils, 'publish_batch', Publisher(ConnectionError('down')))
+    outbox.enqueue(BOOKED, {})
+    outbox.enqueue(BOOKED, {})
+    outbox._publish(outbox._next_batch())
+    assert len(outbox._retries) == 2
+
+
+def test_other_errors_drop_the_batch(outbox, monkeypatch):
+    monkeypatch.setattr(sns_utils, 'is_unavailable', lambda error: False)
+    monkeypatch.setattr(sns_utils, 'publish_batch', Publisher(ValueError('no such topic')))
+    before = DROPPED.value(reason='rejected')
+    outbox.enqueue(BOOKED, {})
+    outbox._publish(outbox._next_batch())
+    assert outbox._retries == []
+    assert DROPPED.value(reason='rejected') == before + 1
+
+
+def test_worker_publishes_to_sns(aws_mock):
+    import boto3
+    topic = boto3.client('sns', region_name='us-east-1').create_topic(Name='outbox-test')['TopicArn']
+    outbox = NotificationOutbox(topic, region='us-east-1', linger=0)
+    before = PUBLISHED.value(event=BOOKED)
+    for n in range(3):
+        outbox.enqueue(BOOKED, {'n': n})
+    outbox.close()
+    assert PUBLISHED.value(event=BOOKED) == before + 3
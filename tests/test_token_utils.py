@@ -0,0 +1,176 @@
+import base64
+import hashlib
+import json
+import random
+import time
+
+import pytest
+
+from aws.token_utils import (
+    _SHA256_DIGEST_INFO, CognitoTokenVerifier, InvalidTokenError, verify_rs256,
+)
+
+REGION = 'us-east-1'
+POOL_ID = 'us-east-1_TestPool'
+CLIENT_ID = 'test-client'
+ISSUER = f'https://cognito-idp.{REGION}.amazonaws.com/{POOL_ID}'
+
+
+def _is_probable_prime(n, rng, rounds=32):
+    if n % 2 == 0:
+        return n == 2
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d, s = d // 2, s + 1
+    for _ in range(rounds):
+        x = pow(rng.randrange(2, n - 1), d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(s - 1):
+            x = pow(x, 2, n)
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def _prime(bits, rng):
+    while True:
+        candidate = rng.getrandbits(bits) | (1 << (bits - 1)) | 1
+        if _is_probable_prime(candidate, rng):
+            return candidate
+
+
+def _generate_key(rng, bits=1024, exponent=65537):
+    while True:
+        p, q = _prime(bits // 2, rng), _prime(bits // 2, rng)
+        phi = (p - 1) * (q - 1)
+        if p != q and phi % exponent:
+            return p * q, exponent, pow(exponent, -1, phi)
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _int_b64(value):
+    return _b64(value.to_bytes((value.bit_length() + 7) // 8, 'big'))
+
+
+class KeyPair:
+    def __init__(self, kid, seed):
+        self.kid = kid
+        self.n, self.e, self.d = _generate_key(random.Random(seed))
+
+    def jwk(self):
+        return {'kty': 'RSA', 'alg': 'RS256', 'use': 'sig', 'kid': self.kid,
+                'n': _int_b64(self.n), 'e': _int_b64(self.e)}
+
+    def sign(self, signing_input):
+        size = (self.n.bit_length() + 7) // 8
+        digest_info = _SHA256_DIGEST_INFO + hashlib.sha256(signing_input).digest()
+        encoded = b'\x00\x01' + b'\xff' * (size - len(digest_info) - 3) + b'\x00' + digest_info
+        return pow(int.from_bytes(encoded, 'big'), self.d, self.n).to_bytes(size, 'big')
+
+
+@pytest.fixture(scope='module')
+def key():
+    return KeyPair('test-key', seed=1)
+
+
+@pytest.fixture(scope='module')
+def other_key():
+    return KeyPair('test-key', seed=2)
+
+
+@pytest.fixture
+def verifier(key, tmp_path):
+    path = tmp_path / 'jwks.json'
+    path.write_text(json.dumps({'keys': [key.jwk()]}))
+    return CognitoTokenVerifier(REGION, POOL_ID, CLIENT_ID, jwks_path=str(path))
+
+
+def make_token(key, kid=None, **overrides):
+    header = {'alg': 'RS256', 'kid': kid or key.kid}
+    claims = {'sub': 'user-sub', 'username': 'user@example.com', 'iss': ISSUER,
+              'client_id': CLIENT_ID, 'token_use': 'access', 'exp': int(time.time()) + 3600}
+    claims.update(overrides)
+    signing_input = f"{_b64(json.dumps(header).encode())}.{_b64(json.dumps(claims).encode())}"
+    return f"{signing_input}.{_b64(key.sign(signing_input.encode('ascii')))}"
+
+
+def test_valid_token(verifier, key):
+    claims = verifier.verify(make_token(key))
+    assert claims['username'] == 'user@example.com'
+
+
+def test_verified_token_is_cached(verifier, key):
+    token = make_token(key)
+    verifier.verify(token)
+    assert verifier.cache.get(token)['sub'] == 'user-sub'
+
+
+def test_tampered_signature(verifier, key):
+    header, payload, signature = make_token(key).split('.')
+    forged = _b64(json.dumps({'username': 'admin@example.com', 'iss': ISSUER, 'client_id': CLIENT_ID,
+                              'token_use': 'access', 'exp': int(time.time()) + 3600}).encode())
+    with pytest.raises(InvalidTokenError, match='signature'):
+        verifier.verify(f'{header}.{forged}.{signature}')
+
+
+def test_signed_by_another_key(verifier, other_key):
+    with pytest.raises(InvalidTokenError, match='signature'):
+        verifier.verify(make_token(other_key))
+
+
+def test_unknown_kid(verifier, key):
+    with pytest.raises(InvalidTokenError, match='Unknown signing key'):
+        verifier.verify(make_token(key, kid='rotated-key'))
+
+
+def test_expired(verifier, key):
+    with pytest.raises(InvalidTokenError, match='expired'):
+        verifier.verify(make_token(key, exp=int(time.time()) - 1))
+
+
+@pytest.mark.parametrize('claim, value, message', [
+    ('client_id', 'another-client', 'another client'),
+    ('token_use', 'id', 'Not an access token'),
+    ('iss', 'https://cognito-idp.us-east-1.amazonaws.com/us-east-1_Other', 'issuer'),
+])
+def test_wrong_claims(verifier, key, claim, value, message):
+    with pytest.raises(InvalidTokenError, match=message):
+        verifier.verify(make_token(key, **{claim: value}))
+
+
+@pytest.mark.parametrize('token', ['', 'not-a-jwt', 'a.b', 'a.b.c', '!!.??.**'])
+def test_malformed(verifier, token):
+    with pytest.raises(InvalidTokenError):
+        verifier.verify(token)
+
+
+def test_unsupported_algorithm(verifier, key):
+    header = _b64(json.dumps({'alg': 'none', 'kid': key.kid}).encode())
+    payload = make_token(key).split('.')[1]
+    with pytest.raises(InvalidTokenError, match='algorithm'):
+        verifier.verify(f'{header}.{payload}.')
+
+
+def test_verify_rs256_rejects_wrong_length(key):
+    assert not verify_rs256(b'data', b'\x00' * 10, key.n, key.e)
+
+
+def test_sign_out_revokes_earlier_tokens(verifier, key):
+    token = make_token(key, iat=int(time.time()) - 10)
+    verifier.verify(token)
+    verifier.sign_out('user@example.com')
+    assert verifier.cache.get(token) is None
+    with pytest.raises(InvalidTokenError, match='revoked'):
+        verifier.verify(token)
+
+
+def test_sign_out_keeps_later_and_other_tokens(verifier, key):
+    verifier.sign_out('user@example.com')
+    assert verifier.verify(make_token(key, iat=int(time.time()) + 1))
+    assert verifier.verify(make_token(key, username='other@example.com', iat=0))
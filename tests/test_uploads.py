@@ -0,0 +1,92 @@
+import pytest
+
+from conftest import sign_in
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def upload(client, auth):
+    response = client.post('/api/uploads', headers=auth, json={
+        'fileName': 'car.jpg', 'fileType': 'image/jpeg', 'fileSize': 12 * MB, 'partSize': 5 * MB,
+    })
+    assert response.status_code == 201
+    return response.json
+
+
+def test_key_records_owner_and_part_count(app_module):
+    key = app_module.multipart_upload_key('a/b.jpg', 'alice', 3)
+    assert app_module.UPLOAD_KEY_PATTERN.match(key)
+    assert key.endswith('-a_b.jpg')
+    assert app_module.multipart_part_count(key, 'alice') == 3
+    assert app_module.multipart_part_count(key, 'mallory') is None
+    # Changing the embedded part count breaks the owner check
+    forged = key[:14] + '00ff' + key[18:]
+    assert app_module.multipart_part_count(forged, 'alice') is None
+
+
+def test_presign_parts(client, auth, upload):
+    assert len(upload['parts']) == 3
+    response = client.post('/api/uploads/parts', headers=auth, json={
+        'key': upload['key'], 'uploadId': upload['uploadId'], 'partNumbers': [1, 3],
+    })
+    assert response.status_code == 200
+    assert [part['partNumber'] for part in response.json['parts']] == [1, 3]
+
+
+@pytest.mark.parametrize('changes', [
+    {'uploadId': 5},
+    {'partNumbers': [True]},
+    {'partNumbers': [4]},
+    {'partNumbers': [1, 2, 3, 1]},
+    {'partNumbers': '1'},
+])
+def test_presign_parts_rejects_bad_input(client, auth, upload, changes):
+    body = {'key': upload['key'], 'uploadId': upload['uploadId'], 'partNumbers': [1]}
+    response = client.post('/api/uploads/parts', headers=auth, json={**body, **changes})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('path, extra', [
+    ('/api/uploads/parts', {'partNumbers': [1]}),
+    ('/api/uploads/complete', {'parts': [{'PartNumber': 1, 'ETag': '"x"'}]}),
+    ('/api/uploads/abort', {}),
+])
+def test_other_users_cannot_touch_an_upload(client, upload, path, extra):
+    response = client.post(path, headers=sign_in(client), json={
+        'key': upload['key'], 'uploadId': upload['uploadId'], **extra,
+    })
+    assert response.status_code == 400
+    assert response.json['error'] == 'Invalid key'
+
+
+def test_owner_can_abort(client, auth, upload):
+    response = client.post('/api/uploads/abort', headers=auth, json={
+        'key': upload['key'], 'uploadId': upload['uploadId'],
+    })
+    assert response.status_code == 200
+
+
+def test_bulk_upload_urls(client, auth, app_module):
+    files = [{'fileName': f'dir/car-{n}.jpg', 'fileType': 'image/jpeg'} for n in range(3)]
+    response = client.post('/api/upload-urls', headers=auth, json={'files': files})
+    assert response.status_code == 200
+    uploads = response.json['uploads']
+    assert len(uploads) == 3
+    assert len({upload['uploadUrl'] for upload in uploads}) == 3
+    for n, upload in enumerate(uploads):
+        key = upload['imageUrl'].rsplit('/', 1)[1]
+        assert app_module.UPLOAD_KEY_PATTERN.match(key)
+        assert key.endswith(f'-dir_car-{n}.jpg')
+        assert key in upload['uploadUrl']
+
+
+@pytest.mark.parametrize('files', [
+    [],
+    'car.jpg',
+    [{'fileName': 'car.jpg'}],
+    ['car.jpg'],
+    [{'fileName': 'car.jpg', 'fileType': 'image/jpeg'}] * 21,
+])
+def test_bulk_upload_urls_rejects_bad_input(client, auth, files):
+    assert client.post('/api/upload-urls', headers=auth, json={'files': files}).status_code == 400